@@ -0,0 +1,178 @@
+"""Token-basierte Admission Control vor dem MFA-Workflow.
+
+Das Foundry-Deployment ist auf 50k TPM begrenzt; der Proxy macht bewusst
+keine Retries. Statt jeden Request sofort zu starten (→ 429 von Foundry
+mitten in der Agent-Kette), schätzt der Scheduler die Kosten pro Request
+und verwaltet ein Token-Bucket-Budget:
+
+- Kosten = (Prompt-Tokens + Pauschale pro Agent-Aufruf) × erwartete Aufrufe
+- Reicht das Budget nicht, wird gewartet (Priorität: direct vor Einzel-Agent
+  vor Synthese) – oder, wenn die Wartezeit zu lang wäre, sofort mit
+  AdmissionRejected (→ HTTP 429 + Retry-After) abgelehnt.
+- Nach dem Request wird die Schätzung mit dem tatsächlichen Verlauf
+  (genutzte Agents, Antwortlänge) verrechnet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any
+
+# Erwartete Agent-Aufrufe pro Route (inkl. Triage); None = Route noch unbekannt
+EXPECTED_CALLS = {"direct": 2, "web": 2, "context": 2, "synthesis": 4, None: 3}
+
+# Niedriger Wert = höhere Priorität; "prefetch" (Vorab-Antworten) kommt nach allen Requests
+PRIORITY = {"direct": 0, "web": 1, "context": 1, None: 2, "synthesis": 2, "prefetch": 3}
+
+
+def estimate_tokens(text: str) -> int:
+    """Grobe Token-Schätzung (~4 Zeichen pro Token, DE/EN gemischt)."""
+    return len(text) // 4 + 1
+
+
+class AdmissionRejected(Exception):
+    """Request wird nicht angenommen; retry_after in Sekunden."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("cost", "future")
+
+    def __init__(self, cost: int, future: asyncio.Future[None]):
+        self.cost = cost
+        self.future = future
+
+
+class TokenBucketScheduler:
+    """Token-Bucket (TPM) mit Prioritäts-Warteschlange und Load Shedding."""
+
+    def __init__(
+        self,
+        tokens_per_minute: int,
+        tokens_per_call: int = 1500,
+        max_queue_seconds: float = 20.0,
+        max_queue_length: int = 50,
+    ):
+        self.capacity = float(tokens_per_minute)
+        self.rate = tokens_per_minute / 60.0
+        self.tokens_per_call = tokens_per_call
+        self.max_queue_seconds = max_queue_seconds
+        self.max_queue_length = max_queue_length
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+        self.stats: dict[str, Any] = {
+            "admitted": 0,
+            "queued": 0,
+            "rejected": 0,
+            "estimated_tokens": 0,
+            "settled_tokens": 0,
+            "queue_wait_ms_total": 0.0,
+        }
+
+    def estimate(self, prompt: str, route: str | None) -> int:
+        """Geschätzte Kosten eines Requests für die (ggf. vorhergesagte) Route."""
+        calls = EXPECTED_CALLS.get(route, EXPECTED_CALLS[None])
+        return calls * (estimate_tokens(prompt) + self.tokens_per_call)
+
+    def actual(self, prompt: str, agents_used: list[str], response: str) -> int:
+        """Nachträgliche Kosten-Schätzung aus dem tatsächlichen Verlauf."""
+        return len(agents_used) * (estimate_tokens(prompt) + self.tokens_per_call) + estimate_tokens(response)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _queued_ahead(self, priority: int) -> int:
+        return sum(w.cost for p, _, w in self._queue if p <= priority and not w.future.done())
+
+    async def admit(self, cost: int, route: str | None) -> int:
+        """Wartet auf Budget für cost Tokens. Liefert die verbuchten Tokens.
+
+        Raises:
+            AdmissionRejected: Queue voll oder erwartete Wartezeit zu lang
+        """
+        cost = min(cost, int(self.capacity))  # Riesige Prompts nicht dauerhaft blockieren
+        priority = PRIORITY.get(route, PRIORITY[None])
+        self._refill()
+        if not self._queue and self._tokens >= cost:
+            self._tokens -= cost
+            self._admitted(cost, 0.0)
+            return cost
+
+        deficit = cost + self._queued_ahead(priority) - self._tokens
+        wait_seconds = max(deficit, 0) / self.rate
+        if len(self._queue) >= self.max_queue_length or wait_seconds > self.max_queue_seconds:
+            self.stats["rejected"] += 1
+            raise AdmissionRejected(
+                "MFA token budget exhausted, retry later",
+                retry_after=math.ceil(max(wait_seconds, 1.0)),
+            )
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), _Waiter(cost, future)))
+        self.stats["queued"] += 1
+        started = time.monotonic()
+        self._drain()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._tokens += cost  # bereits verbucht, Client ist weg → zurückgeben
+            raise
+        self._admitted(cost, (time.monotonic() - started) * 1000)
+        return cost
+
+    def _admitted(self, cost: int, waited_ms: float) -> None:
+        self.stats["admitted"] += 1
+        self.stats["estimated_tokens"] += cost
+        self.stats["queue_wait_ms_total"] += waited_ms
+
+    def _drain(self) -> None:
+        """Bedient die Warteschlange in Prioritätsreihenfolge, solange Budget reicht."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        self._refill()
+        while self._queue:
+            _, _, waiter = self._queue[0]
+            if waiter.future.done():  # abgebrochen
+                heapq.heappop(self._queue)
+                continue
+            if self._tokens < waiter.cost:
+                delay = (waiter.cost - self._tokens) / self.rate
+                self._wakeup = asyncio.get_running_loop().call_later(delay, self._drain)
+                return
+            heapq.heappop(self._queue)
+            self._tokens -= waiter.cost
+            waiter.future.set_result(None)
+
+    def settle(self, charged: int, actual: int) -> None:
+        """Verrechnet die Schätzung mit den tatsächlich verbrauchten Tokens."""
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens + charged - actual)
+        self.stats["settled_tokens"] += actual
+        if self._queue:
+            self._drain()
+
+    def snapshot(self) -> dict[str, Any]:
+        self._refill()
+        admitted = self.stats["admitted"]
+        return {
+            **{k: v for k, v in self.stats.items() if k != "queue_wait_ms_total"},
+            "avg_queue_wait_ms": round(self.stats["queue_wait_ms_total"] / admitted, 1) if admitted else 0.0,
+            "tokens_available": int(self._tokens),
+            "tokens_per_minute": int(self.capacity),
+            "queue_length": sum(1 for _, _, w in self._queue if not w.future.done()),
+        }
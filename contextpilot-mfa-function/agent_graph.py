@@ -0,0 +1,402 @@
+"""Deklarativer Agent-Graph (DAG) statt fest verdrahteter Routing-Zweige.
+
+Knoten sind Agents. Kanten ergeben sich aus
+- "when": Triage-Flags – der Knoten ist aktiv, wenn eines der Flags im
+  Routing gesetzt ist (ohne "when" immer aktiv)
+- "after" + "join": Abhängigkeiten – "all" läuft nur, wenn alle Vorgänger
+  erfolgreich waren (Fan-In des Synthesizers), "any" schon bei einem
+
+Ausführung: ein Knoten startet, sobald über alle Vorgänger entschieden ist;
+bereite Knoten laufen parallel (höchstens max_parallel), jeder mit eigenem
+Timeout. Ein fehlgeschlagener Knoten bricht die anderen nicht ab, seine
+Nachfolger werden je nach "join" übersprungen.
+
+Antwort: Ausgaben erfolgreicher Knoten, die kein erfolgreicher Nachfolger
+weiterverarbeitet hat (normalerweise genau einer). Steht beim Start eines
+Knotens fest, dass nur er die Antwort liefern kann, wird er gestreamt.
+
+Konfiguration (optional) als JSON-Datei über MFA_AGENT_GRAPH:
+    {"max_parallel": 4, "nodes": [{"name": "web", "agent": "$AURA_WEB_AGENT_NAME",
+     "label": "AURAContextPilotWeb", "when": ["web"], "timeout": 90}, ...]}
+"agent" darf App Settings als $NAME referenzieren; "prompt" ist "question"
+(Benutzerfrage) oder "synthesis" (Prompt aus den Ausgaben der Vorgänger).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Triage → web/context parallel → Synthesizer nur, wenn beide erfolgreich waren
+DEFAULT_GRAPH: dict[str, Any] = {
+    "max_parallel": 4,
+    "nodes": [
+        {"name": "web", "agent": "$AURA_WEB_AGENT_NAME", "label": "AURAContextPilotWeb", "when": ["web"]},
+        {"name": "context", "agent": "$AURA_CONTEXT_AGENT_NAME", "label": "AURAContextPilot", "when": ["context"]},
+        {
+            "name": "synthesizer",
+            "agent": "$AURA_SYNTHESIZER_AGENT_NAME",
+            "label": "AURAContextPilotResponseSynthesizer",
+            "after": ["web", "context"],
+            "join": "all",
+            "prompt": "synthesis",
+        },
+    ],
+}
+
+JOINS = ("all", "any")
+PROMPTS = ("question", "synthesis")
+
+
+@dataclass
+class GraphNode:
+    name: str
+    agent: str
+    label: str
+    when: list[str] = field(default_factory=list)
+    after: list[str] = field(default_factory=list)
+    join: str = "all"
+    prompt: str = "question"
+    timeout: float | None = None
+
+
+# invoke(node, inputs, stream) → Text-Deltas (ohne stream: die gesamte Antwort auf einmal)
+Invoke = Callable[[GraphNode, dict[str, str], bool], AsyncIterator[str]]
+
+# on_timeout(node, seconds): Knoten-Timeout abgelaufen (der Aufruf wurde abgebrochen)
+OnTimeout = Callable[[GraphNode, float], None]
+
+
+def _resolve_agent(value: str) -> str:
+    agent = os.path.expandvars(value)
+    if "$" in agent:
+        raise ValueError(f"Agent graph: unresolved app setting in agent '{value}'")
+    return agent
+
+
+class AgentGraph:
+    """Validierter DAG aus Agent-Knoten plus Ausführungsstatistik."""
+
+    def __init__(self, nodes: list[dict[str, Any]], default_timeout: float | None = None, max_parallel: int = 4):
+        self.max_parallel = max(1, max_parallel)
+        self.nodes: dict[str, GraphNode] = {}
+        for spec in nodes:
+            node = GraphNode(
+                name=spec["name"],
+                agent=_resolve_agent(spec["agent"]),
+                label=spec.get("label") or spec["agent"],
+                when=list(spec.get("when", [])),
+                after=list(spec.get("after", [])),
+                join=spec.get("join", "all"),
+                prompt=spec.get("prompt", "question"),
+                timeout=float(spec["timeout"]) if spec.get("timeout") is not None else default_timeout,
+            )
+            if node.name in self.nodes:
+                raise ValueError(f"Agent graph: duplicate node '{node.name}'")
+            if node.join not in JOINS:
+                raise ValueError(f"Agent graph: node '{node.name}' has unknown join '{node.join}'")
+            if node.prompt not in PROMPTS:
+                raise ValueError(f"Agent graph: node '{node.name}' has unknown prompt '{node.prompt}'")
+            if node.prompt == "synthesis" and not node.after:
+                raise ValueError(f"Agent graph: synthesis node '{node.name}' needs 'after'")
+            self.nodes[node.name] = node
+        for node in self.nodes.values():
+            unknown = [dep for dep in node.after if dep not in self.nodes]
+            if unknown:
+                raise ValueError(f"Agent graph: node '{node.name}' depends on unknown {unknown}")
+        self.order = self._topological_order()
+        self.dependents: dict[str, list[str]] = {name: [] for name in self.order}
+        for name in self.order:
+            for dep in self.nodes[name].after:
+                self.dependents[dep].append(name)
+        self.stats: dict[str, Any] = {
+            "runs": 0,
+            "nodes": {
+                name: {"completed": 0, "failed": 0, "timeouts": 0, "unavailable": 0, "skipped": 0, "total_ms": 0.0}
+                for name in self.order
+            },
+        }
+
+    @classmethod
+    def from_config(cls, path: str | None, default_timeout: float | None, max_parallel: int) -> "AgentGraph":
+        """Lädt den Graphen aus einer JSON-Datei (falls gesetzt), sonst DEFAULT_GRAPH."""
+        config = DEFAULT_GRAPH
+        if path:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        return cls(
+            nodes=config["nodes"],
+            default_timeout=default_timeout,
+            max_parallel=int(config.get("max_parallel", max_parallel)),
+        )
+
+    def _topological_order(self) -> list[str]:
+        """Reihenfolge aus der Konfiguration, Vorgänger jeweils zuerst (Zyklen → ValueError)."""
+        order: list[str] = []
+        state: dict[str, str] = {}
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Agent graph: cycle {' → '.join((*path, name))}")
+            state[name] = "visiting"
+            for dep in self.nodes[name].after:
+                visit(dep, (*path, name))
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, ())
+        return order
+
+    def active(self, routing: dict[str, Any]) -> set[str]:
+        """Knoten, deren Triage-Flags gesetzt sind (ohne Rücksicht auf Abhängigkeiten)."""
+        return {
+            name for name, node in self.nodes.items()
+            if not node.when or any(routing.get(flag) for flag in node.when)
+        }
+
+    def plan(self, routing: dict[str, Any]) -> list[str]:
+        """Knoten, die bei diesem Routing laufen können (falls alle Vorgänger erfolgreich sind)."""
+        return [name for name, ok in self._possible(routing, {}).items() if ok]
+
+    def _possible(self, routing: dict[str, Any], status: dict[str, str]) -> dict[str, bool]:
+        active = self.active(routing)
+        possible: dict[str, bool] = {}
+        for name in self.order:
+            node = self.nodes[name]
+            if name in status and status[name] != "waiting":
+                possible[name] = status[name] in ("running", "completed")
+            elif name not in active:
+                possible[name] = False
+            elif not node.after:
+                possible[name] = True
+            else:
+                deps = [possible[dep] for dep in node.after]
+                possible[name] = all(deps) if node.join == "all" else any(deps)
+        return possible
+
+    def run(
+        self,
+        routing: dict[str, Any],
+        invoke: Invoke,
+        stream: bool = False,
+        preset: dict[str, Awaitable[str]] | None = None,
+        unavailable: set[str] | None = None,
+        on_timeout: OnTimeout | None = None,
+    ) -> "GraphRun":
+        """Startet eine Ausführung; Events über `async for event in graph.run(...)`.
+
+        preset: bereits laufende Aufrufe (Spekulation); unavailable: Knoten, die
+        sofort als fehlgeschlagen gelten (offener Circuit Breaker); on_timeout:
+        Rückmeldung abgelaufener Knoten-Timeouts (der abgebrochene Aufruf selbst
+        sieht nur ein CancelledError).
+        """
+        self.stats["runs"] += 1
+        return GraphRun(self, routing, invoke, stream, preset or {}, unavailable or set(), on_timeout)
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "max_parallel": self.max_parallel,
+            "nodes": [
+                {
+                    "name": node.name,
+                    "label": node.label,
+                    "when": node.when,
+                    "after": node.after,
+                    "join": node.join,
+                    "prompt": node.prompt,
+                    "timeout": node.timeout,
+                }
+                for node in (self.nodes[name] for name in self.order)
+            ],
+        }
+
+    def snapshot(self) -> dict[str, Any]:
+        nodes: dict[str, Any] = {}
+        for name, stats in self.stats["nodes"].items():
+            finished = stats["completed"] + stats["failed"]
+            nodes[name] = {
+                **{key: value for key, value in stats.items() if key != "total_ms"},
+                "avg_ms": round(stats["total_ms"] / finished, 1) if finished else 0.0,
+            }
+        return {**self.describe(), "runs": self.stats["runs"], "node_stats": nodes}
+
+
+class GraphRun:
+    """Eine Ausführung des Graphen: liefert Agent-/Delta-Events, danach Ergebnisse.
+
+    Nach der Iteration: outputs (Knoten → Text), errors (Knoten → Fehler),
+    answer_nodes (Knoten, deren Ausgabe die Antwort ist), streamed (Knoten,
+    deren Antwort als Deltas geliefert wurde).
+    """
+
+    def __init__(
+        self,
+        graph: AgentGraph,
+        routing: dict[str, Any],
+        invoke: Invoke,
+        stream: bool,
+        preset: dict[str, Awaitable[str]],
+        unavailable: set[str],
+        on_timeout: OnTimeout | None = None,
+    ):
+        self.graph = graph
+        self.routing = routing
+        self.invoke = invoke
+        self.stream = stream
+        self.preset = preset
+        self.unavailable = unavailable
+        self.on_timeout = on_timeout
+        self.outputs: dict[str, str] = {}
+        self.errors: dict[str, str] = {}
+        self.streamed: set[str] = set()
+        self.status: dict[str, str] = {}
+        self._slots = asyncio.Semaphore(graph.max_parallel)
+        self._queue: asyncio.Queue[tuple[str, Any]] = asyncio.Queue()
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def __aiter__(self) -> AsyncIterator[dict[str, Any]]:
+        return self._events()
+
+    @property
+    def answer_nodes(self) -> list[str]:
+        return [
+            name for name in self.graph.order
+            if name in self.outputs and not any(dep in self.outputs for dep in self.graph.dependents[name])
+        ]
+
+    @property
+    def answer(self) -> str:
+        return "\n\n".join(self.outputs[name] for name in self.answer_nodes)
+
+    def labels(self) -> list[str]:
+        """Anzeigenamen der erfolgreichen Knoten in Graph-Reihenfolge (agents_used)."""
+        return [self.graph.nodes[name].label for name in self.graph.order if name in self.outputs]
+
+    async def _events(self) -> AsyncIterator[dict[str, Any]]:
+        active = self.graph.active(self.routing)
+        for name in self.graph.order:
+            self.status[name] = "waiting" if name in active else "skipped"
+        try:
+            for name in self.graph.order:
+                if name in self.unavailable and self.status[name] == "waiting":
+                    self.status[name] = "failed"
+                    self.errors[name] = "circuit open"
+                    self.graph.stats["nodes"][name]["unavailable"] += 1
+                    label = self.graph.nodes[name].label
+                    yield {"event": "agent", "agent": label, "status": "failed", "error": "circuit open"}
+            self._schedule()
+            while self._tasks:
+                kind, item = await self._queue.get()
+                if kind == "event":
+                    yield item
+                    continue
+                name, outcome, elapsed_ms = item
+                self._tasks.pop(name)
+                node = self.graph.nodes[name]
+                stats = self.graph.stats["nodes"][name]
+                stats["total_ms"] += elapsed_ms
+                if isinstance(outcome, str) and outcome:
+                    self.status[name] = "completed"
+                    self.outputs[name] = outcome
+                    stats["completed"] += 1
+                    yield {"event": "agent", "agent": node.label, "status": "completed"}
+                else:
+                    if isinstance(outcome, asyncio.TimeoutError):
+                        error = str(outcome) or f"timeout after {node.timeout:g}s"
+                        stats["timeouts"] += 1
+                    elif isinstance(outcome, BaseException):
+                        error = f"{type(outcome).__name__}: {outcome}"
+                    else:
+                        error = "empty response"
+                    self.status[name] = "failed"
+                    self.errors[name] = error
+                    stats["failed"] += 1
+                    logger.warning("MFA graph node '%s' failed: %s", name, error)
+                    yield {"event": "agent", "agent": node.label, "status": "failed", "error": error}
+                self._schedule()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            if self._tasks:
+                await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            for awaitable in self.preset.values():
+                if isinstance(awaitable, asyncio.Future) and not awaitable.done():
+                    awaitable.cancel()  # übernommene Spekulation, deren Knoten nie startete
+            for name, state in self.status.items():
+                if state in ("waiting", "skipped"):
+                    self.graph.stats["nodes"][name]["skipped"] += 1
+
+    def _schedule(self) -> None:
+        """Startet alle Knoten, deren Vorgänger entschieden sind; überspringt unerfüllbare."""
+        for name in self.graph.order:
+            if self.status[name] != "waiting":
+                continue
+            node = self.graph.nodes[name]
+            deps = [self.status[dep] for dep in node.after]
+            if any(state in ("waiting", "running") for state in deps):
+                continue
+            succeeded = [state == "completed" for state in deps]
+            if node.after and not (all(succeeded) if node.join == "all" else any(succeeded)):
+                self.status[name] = "skipped"
+                continue
+            self.status[name] = "running"
+            inputs = {dep: self.outputs[dep] for dep in node.after if dep in self.outputs}
+            self._tasks[name] = asyncio.create_task(self._execute(node, inputs, self._is_final(name)))
+
+    def _is_final(self, name: str) -> bool:
+        """True, wenn nur dieser Knoten noch die Antwort liefern kann (→ streamen)."""
+        if not self.stream or name in self.preset:
+            return False
+        possible = self.graph._possible(self.routing, self.status)
+        sinks = [
+            node for node, ok in possible.items()
+            if ok and not any(possible[dep] for dep in self.graph.dependents[node])
+        ]
+        return sinks == [name]
+
+    async def _execute(self, node: GraphNode, inputs: dict[str, str], final: bool) -> None:
+        started = time.perf_counter()
+        outcome: Any
+        try:
+            async with self._slots:
+                await self._queue.put(("event", {"event": "agent", "agent": node.label, "status": "started"}))
+                with span("graph.node", node=node.name, agent=node.agent, final=final):
+                    if node.name in self.preset:
+                        outcome = await asyncio.wait_for(self.preset[node.name], node.timeout)
+                    else:
+                        outcome = await asyncio.wait_for(self._collect(node, inputs, final), node.timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            outcome = e
+            seconds = time.perf_counter() - started
+            # Nur der eigene Timeout des Knotens; Deadline-Timeouts im Aufruf meldet dieser selbst
+            if isinstance(e, asyncio.TimeoutError) and node.timeout is not None and seconds >= node.timeout:
+                if self.on_timeout is not None:
+                    self.on_timeout(node, seconds)
+        await self._queue.put(("done", (node.name, outcome, (time.perf_counter() - started) * 1000)))
+
+    async def _collect(self, node: GraphNode, inputs: dict[str, str], final: bool) -> str:
+        text = ""
+        deltas = self.invoke(node, inputs, final)
+        try:
+            async for delta in deltas:
+                text += delta
+                if final:
+                    self.streamed.add(node.name)
+                    await self._queue.put(("event", {"delta": delta, "partial": text}))
+        finally:
+            await deltas.aclose()
+        return text
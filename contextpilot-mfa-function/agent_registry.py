@@ -0,0 +1,255 @@
+"""Prozessweite Registry für Foundry-Agent-Handles (MAF, Python).
+
+Hält Credential, HTTP-Session und aufgelöste Agents über mehrere Requests
+im selben Functions-Worker warm, statt pro Aufruf DefaultAzureCredential
+und AzureAIClient(...).create_agent() neu aufzubauen.
+
+- TTL: Handles werden nach AURA_AGENT_REGISTRY_TTL_SECONDS neu aufgelöst,
+  damit neue Agent-Versionen (use_latest_version) übernommen werden.
+- Leases: laufende agent.run()-Aufrufe halten ihr Handle; abgelöste Handles
+  werden erst geschlossen, wenn der letzte Aufrufer fertig ist.
+- Fehler: nur Auth- und Not-Found-Fehler verwerfen ein Handle; transiente
+  Fehler (429, 5xx, Timeouts) lassen es im Cache.
+- invalidate(): verwirft einzelne oder alle Handles explizit; ein abgelöstes
+  Credential wird geschlossen, sobald der letzte laufende Aufruf fertig ist.
+- warm(): löst Credential und Agents vorab auf (Warm-up nach Cold Start).
+- deployment: optional abweichendes Modell-Deployment pro Lease (Hedging);
+  solche Handles werden als "<agent>@<deployment>" getrennt gecacht.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Any, AsyncIterator
+
+from agent_framework.azure import AzureAIClient
+from azure.core.exceptions import ClientAuthenticationError, ResourceNotFoundError
+from azure.identity.aio import DefaultAzureCredential
+
+from tracing import span
+
+# Token-Scope für Azure AI Foundry (Projects/Agents)
+FOUNDRY_TOKEN_SCOPE = "https://ai.azure.com/.default"
+
+# HTTP-Status, nach denen ein Handle nicht mehr taugt (Token/Rechte weg, Agent gelöscht)
+_STALE_STATUS = {401, 403, 404}
+
+logger = logging.getLogger(__name__)
+
+
+def _is_stale_handle_error(error: BaseException) -> bool:
+    """True, wenn der Fehler das Handle selbst betrifft (Auth, Agent nicht gefunden).
+
+    Folgt der __cause__-Kette, weil agent_framework SDK-Fehler einpackt.
+    """
+    seen = 0
+    current: BaseException | None = error
+    while current is not None and seen < 5:
+        if isinstance(current, (ClientAuthenticationError, ResourceNotFoundError)):
+            return True
+        status = getattr(current, "status_code", None) or getattr(getattr(current, "response", None), "status_code", None)
+        if status in _STALE_STATUS:
+            return True
+        current = current.__cause__
+        seen += 1
+    return False
+
+
+class _AgentHandle:
+    """Ein geöffneter Agent inkl. Client-Kontext und Lease-Zähler."""
+
+    def __init__(self, agent: Any, stack: contextlib.AsyncExitStack, created_at: float):
+        self.agent = agent
+        self.stack = stack
+        self.created_at = created_at
+        self.leases = 0
+        self.retired = False
+
+    async def close(self) -> None:
+        try:
+            await self.stack.aclose()
+        except Exception as e:  # Schließen darf den Request nie scheitern lassen
+            logger.warning("Closing agent handle failed: %s", e)
+
+
+class AgentRegistry:
+    """Cache für Credential und Agent-Handles, keyed by agent name."""
+
+    def __init__(
+        self,
+        project_endpoint: str,
+        model_deployment_name: str,
+        ttl_seconds: float = 900.0,
+    ):
+        self._project_endpoint = project_endpoint
+        self._model_deployment_name = model_deployment_name
+        self._ttl_seconds = ttl_seconds
+        self._credential: DefaultAzureCredential | None = None
+        self._handles: dict[str, _AgentHandle] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._credential_lock: asyncio.Lock | None = None
+        # Abgelöste Credentials, die laufende Aufrufe noch nutzen (Credential, Handles)
+        self._orphaned_credentials: list[tuple[DefaultAzureCredential, list[_AgentHandle]]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "invalidations": 0}
+
+    def _bind_loop(self) -> None:
+        """aiohttp-Sessions sind an ihren Event Loop gebunden.
+
+        Läuft der Worker (oder ein Test via asyncio.run) auf einem neuen Loop,
+        werden alte Handles verworfen, ohne sie auf dem falschen Loop zu schließen.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._locks.clear()
+            self._handles.clear()
+            self._credential = None
+            self._orphaned_credentials.clear()
+            self._credential_lock = asyncio.Lock()
+
+    async def _ensure_credential(self) -> DefaultAzureCredential:
+        # Eigener Lock: parallele Kaltstarts mehrerer Agents teilen ein Credential
+        async with self._credential_lock:
+            if self._credential is None:
+                with span("credential"):
+                    credential = DefaultAzureCredential()
+                    # Erstes Token hier holen, damit es nicht im ersten agent.run steckt
+                    await credential.get_token(FOUNDRY_TOKEN_SCOPE)
+                    self._credential = credential
+            return self._credential
+
+    async def _open(self, agent_name: str, deployment: str | None = None) -> _AgentHandle:
+        credential = await self._ensure_credential()
+        stack = contextlib.AsyncExitStack()
+        try:
+            with span("agent.resolve", agent=agent_name):
+                agent = await stack.enter_async_context(
+                    AzureAIClient(
+                        credential=credential,
+                        project_endpoint=self._project_endpoint,
+                        model_deployment_name=deployment or self._model_deployment_name,
+                        agent_name=agent_name,
+                        use_latest_version=True,
+                    ).create_agent()
+                )
+        except BaseException:
+            await stack.aclose()
+            raise
+        return _AgentHandle(agent, stack, time.monotonic())
+
+    async def _acquire(self, key: str, agent_name: str, deployment: str | None) -> _AgentHandle:
+        self._bind_loop()
+        # Lock pro Agent: kalte Auflösungen verschiedener Agents laufen parallel
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            handle = self._handles.get(key)
+            if handle is not None and time.monotonic() - handle.created_at < self._ttl_seconds:
+                self.stats["hits"] += 1
+            else:
+                if handle is not None:
+                    self.stats["refreshes"] += 1
+                    await self._retire(handle)
+                self.stats["misses"] += 1
+                handle = await self._open(agent_name, deployment)
+                self._handles[key] = handle
+            handle.leases += 1
+            return handle
+
+    async def _retire(self, handle: _AgentHandle) -> None:
+        handle.retired = True
+        if handle.leases == 0:
+            await handle.close()
+
+    async def _release(self, handle: _AgentHandle) -> None:
+        handle.leases -= 1
+        if handle.retired and handle.leases == 0:
+            await handle.close()
+            await self._close_orphaned_credentials()
+
+    async def _close_orphaned_credentials(self) -> None:
+        """Schließt abgelöste Credentials, deren Handles keine Leases mehr haben."""
+        ready = [entry for entry in self._orphaned_credentials if all(h.leases == 0 for h in entry[1])]
+        if not ready:
+            return
+        self._orphaned_credentials = [entry for entry in self._orphaned_credentials if entry not in ready]
+        for credential, _ in ready:
+            with contextlib.suppress(Exception):
+                await credential.close()
+
+    @contextlib.asynccontextmanager
+    async def lease(self, agent_name: str, deployment: str | None = None) -> AsyncIterator[Any]:
+        """Liefert ein warmes Agent-Handle für die Dauer des Blocks.
+
+        Scheitert ein Aufruf an Auth oder Not-Found, wird das Handle verworfen,
+        damit der nächste Request den Agent frisch auflöst (z.B. nach
+        Löschen/Umbenennen). Transiente Fehler (429, 5xx) behalten das Handle:
+        neu auflösen hilft dort nicht und kostet unter Last zusätzliche Aufrufe.
+        """
+        key = f"{agent_name}@{deployment}" if deployment else agent_name
+        handle = await self._acquire(key, agent_name, deployment)
+        try:
+            yield handle.agent
+        except Exception as e:
+            if _is_stale_handle_error(e) and self._handles.get(key) is handle:
+                del self._handles[key]
+                handle.retired = True
+            raise
+        finally:
+            await self._release(handle)
+
+    async def invalidate(self, agent_name: str | None = None) -> int:
+        """Verwirft ein Handle (oder alle inkl. Credential). Liefert die Anzahl."""
+        self._bind_loop()
+        names = [
+            key for key in self._handles
+            if agent_name is None or key == agent_name or key.startswith(f"{agent_name}@")
+        ]
+        # Erst alle Handles austragen, dann schließen (kein await dazwischen)
+        dropped = [handle for name in names if (handle := self._handles.pop(name, None))]
+        credential = None
+        if agent_name is None:
+            credential, self._credential = self._credential, None
+        in_flight = [handle for handle in dropped if handle.leases > 0]
+        for handle in dropped:
+            await self._retire(handle)
+        if credential is not None:
+            # Laufende Aufrufe nutzen das Credential noch → beim letzten _release schließen
+            self._orphaned_credentials.append((credential, in_flight))
+            await self._close_orphaned_credentials()
+        self.stats["invalidations"] += len(dropped)
+        return len(dropped)
+
+    async def warm(self, agent_names: list[str]) -> dict[str, dict[str, Any]]:
+        """Löst Credential und alle Agents parallel vorab auf.
+
+        Fehler werden pro Agent gemeldet, nicht geworfen (Warm-up ist best effort).
+        """
+        async def warm_one(agent_name: str) -> dict[str, Any]:
+            started = time.perf_counter()
+            try:
+                async with self.lease(agent_name):
+                    pass
+            except Exception as e:
+                logger.warning("Warm-up of agent '%s' failed: %s", agent_name, e)
+                return {"ok": False, "error": str(e), "ms": round((time.perf_counter() - started) * 1000, 1)}
+            return {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+
+        names = list(dict.fromkeys(agent_names))
+        results = await asyncio.gather(*(warm_one(name) for name in names))
+        return dict(zip(names, results))
+
+    def snapshot(self) -> dict[str, Any]:
+        """Zustand für Diagnose (Alter der Handles in Sekunden, Zähler)."""
+        now = time.monotonic()
+        return {
+            "ttl_seconds": self._ttl_seconds,
+            "agents": {
+                name: {"age_seconds": round(now - handle.created_at, 1), "leases": handle.leases}
+                for name, handle in self._handles.items()
+            },
+            **self.stats,
+        }
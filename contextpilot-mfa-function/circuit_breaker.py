@@ -0,0 +1,163 @@
+"""Circuit Breaker pro Agent (Fehlerrate + Latenz) für degradiertes Routing.
+
+Ist AURAContextPilotWeb oder der Synthesizer gedrosselt oder down, wartet
+sonst jeder Request auf dessen Fehler bzw. Timeout. Jeder Agent bekommt
+deshalb einen Breaker:
+
+- closed: Aufrufe laufen; Ergebnisse landen in einem Zeitfenster
+  (window_seconds). Ab min_calls Aufrufen öffnet der Breaker, wenn die
+  Fehlerrate ≥ failure_rate oder der Anteil langsamer Aufrufe
+  (≥ slow_call_seconds) ≥ slow_call_rate ist.
+- open: Aufrufe werden sofort mit CircuitOpen abgelehnt; der Workflow
+  degradiert (z.B. nur Context-Agent, Synthese überspringen).
+- half_open: nach cooldown_seconds darf ein Probe-Aufruf durch; Erfolg
+  schließt den Breaker, Fehler öffnet ihn erneut.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(Exception):
+    """Aufruf abgelehnt, weil der Breaker des Agents offen ist."""
+
+    def __init__(self, agent: str, retry_after: float):
+        super().__init__(f"circuit open for {agent} (retry in {retry_after:.0f}s)")
+        self.agent = agent
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Zustand eines Agents: Ergebnisse im Zeitfenster plus open/half_open-Zeitpunkte."""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 60.0,
+        slow_call_rate: float = 0.5,
+        min_calls: int = 5,
+        window_seconds: float = 60.0,
+        cooldown_seconds: float = 30.0,
+    ):
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.window_seconds = window_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.state = CLOSED
+        self._calls: deque[tuple[float, bool, bool]] = deque()  # (zeit, ok, langsam)
+        self._opened_at = 0.0
+        self._probe_at: float | None = None
+        self.stats = {"calls": 0, "failures": 0, "slow": 0, "rejected": 0, "opened": 0, "last_error": None}
+
+    def _prune(self, now: float) -> None:
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def is_open(self) -> bool:
+        """True, solange Aufrufe abgelehnt würden (ohne einen Probe-Slot zu belegen)."""
+        now = time.monotonic()
+        if self.state == OPEN:
+            return now - self._opened_at < self.cooldown_seconds
+        if self.state == HALF_OPEN:
+            # Probe läuft noch (abgebrochene Probes blockieren höchstens einen Cooldown)
+            return self._probe_at is not None and now - self._probe_at < self.cooldown_seconds
+        return False
+
+    def allow(self) -> bool:
+        """Darf ein Aufruf starten? Nach dem Cooldown wird genau ein Probe-Aufruf erlaubt."""
+        if self.is_open():
+            self.stats["rejected"] += 1
+            return False
+        if self.state != CLOSED:
+            self.state = HALF_OPEN
+            self._probe_at = time.monotonic()
+        return True
+
+    def retry_after(self) -> float:
+        started = self._opened_at if self.state == OPEN else (self._probe_at or 0.0)
+        return max(self.cooldown_seconds - (time.monotonic() - started), 0.0)
+
+    def record(self, ok: bool, seconds: float, error: str | None = None) -> None:
+        now = time.monotonic()
+        slow = seconds >= self.slow_call_seconds
+        self.stats["calls"] += 1
+        self.stats["failures"] += int(not ok)
+        self.stats["slow"] += int(slow)
+        if error:
+            self.stats["last_error"] = error
+        if self.state == HALF_OPEN:
+            if ok and not slow:
+                self.state = CLOSED
+                self._calls.clear()
+            else:
+                self._open(now)
+            self._probe_at = None
+            return
+        if self.state == OPEN:
+            return  # Nachzügler aus der Zeit vor dem Öffnen
+        self._calls.append((now, ok, slow))
+        self._prune(now)
+        total = len(self._calls)
+        if total < self.min_calls:
+            return
+        failures = sum(1 for _, call_ok, _ in self._calls if not call_ok)
+        slow_calls = sum(1 for _, _, call_slow in self._calls if call_slow)
+        if failures >= self.failure_rate * total or slow_calls >= self.slow_call_rate * total:
+            self._open(now)
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self._opened_at = now
+        self._calls.clear()
+        self.stats["opened"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        now = time.monotonic()
+        self._prune(now)
+        total = len(self._calls)
+        return {
+            "state": OPEN if self.is_open() else self.state,
+            "window_calls": total,
+            "window_failure_rate": round(sum(1 for _, ok, _ in self._calls if not ok) / total, 3) if total else 0.0,
+            "retry_after": round(self.retry_after(), 1) if self.is_open() else 0.0,
+            **self.stats,
+        }
+
+
+class BreakerRegistry:
+    """Ein CircuitBreaker pro Agent-Name (lazy angelegt, gleiche Schwellen)."""
+
+    def __init__(self, **settings: Any):
+        self._settings = settings
+        self._breakers: dict[str, CircuitBreaker] = {}
+
+    def get(self, agent: str) -> CircuitBreaker:
+        breaker = self._breakers.get(agent)
+        if breaker is None:
+            breaker = self._breakers[agent] = CircuitBreaker(**self._settings)
+        return breaker
+
+    def is_open(self, agent: str) -> bool:
+        return agent in self._breakers and self._breakers[agent].is_open()
+
+    def check(self, agent: str) -> None:
+        """Wirft CircuitOpen, wenn der Aufruf abgelehnt wird."""
+        breaker = self.get(agent)
+        if not breaker.allow():
+            raise CircuitOpen(agent, breaker.retry_after())
+
+    def record(self, agent: str, ok: bool, seconds: float, error: str | None = None) -> None:
+        self.get(agent).record(ok, seconds, error)
+
+    def open_agents(self) -> list[str]:
+        return [agent for agent, breaker in self._breakers.items() if breaker.is_open()]
+
+    def snapshot(self) -> dict[str, Any]:
+        return {agent: breaker.snapshot() for agent, breaker in self._breakers.items()}
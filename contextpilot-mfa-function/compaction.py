@@ -0,0 +1,214 @@
+"""Token-Budget für den Synthesizer-Prompt (Kompaktierung vor der Synthese).
+
+Web- und Context-Antwort gingen bisher wörtlich in den Synthesizer-Prompt;
+lange Web-Antworten machen die Synthese langsam und kosten TPM. Vor der
+Synthese werden beide Antworten deshalb kompaktiert:
+
+1. Quellen (Zeilen wie "Sources:", "[1] https://...", reine URL-Zeilen)
+   werden vom Fließtext getrennt und bleiben immer erhalten.
+2. Doppelte Sätze werden entfernt – innerhalb einer Antwort und zwischen
+   beiden (der Satz bleibt in der Context-Antwort, interne Daten haben Vorrang).
+   Quellen, die beide Antworten nennen, erscheinen nur einmal.
+3. Der Fließtext jeder Antwort wird auf token_budget Tokens gekürzt (Sätze in
+   Originalreihenfolge); URLs aus gekürzten Sätzen wandern in die Quellen.
+
+Token-Schätzung wie in admission (~4 Zeichen pro Token).
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from admission import estimate_tokens
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-ZÄÖÜ0-9])")
+# Abkürzungen, nach denen kein Satzende ist ("5 Mrd. Euro", "z.B. Azure")
+_ABBREVIATION = re.compile(
+    r"(?:\b(?:Mrd|Mio|Tsd|Nr|bzw|ca|vgl|inkl|ggf|usw|etc|Dr|Prof|Abs|Jan|Feb|Mr|Mrs|vs|No|Inc|Ltd|Co)|\b\w\.\w)\.$",
+    re.IGNORECASE,
+)
+_URL = re.compile(r"https?://[^\s)\]>\"']+")
+_SOURCE_LINE = re.compile(
+    r"^\s*(?:[-*]\s*)?(?:\[\d+\]|\d+\.\s+https?://|(?:quellen?|sources?|references?|referenzen)\s*:?)",
+    re.IGNORECASE,
+)
+_SOURCE_HEADING = re.compile(r"(?:#+\s*)?(?:quellen?|sources?|references?|referenzen)\s*:?", re.IGNORECASE)
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+TRIMMED_MARKER = "[…]"
+
+
+def _sentence_key(sentence: str) -> str:
+    return _NON_WORD.sub(" ", sentence.casefold()).strip()
+
+
+def _split_sentences(line: str) -> list[str]:
+    sentences: list[str] = []
+    for part in _SENTENCE_BOUNDARY.split(line):
+        if not part.strip():
+            continue
+        if sentences and _ABBREVIATION.search(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+def _is_source_line(line: str) -> bool:
+    stripped = line.strip()
+    return bool(_SOURCE_LINE.match(stripped)) or bool(_URL.fullmatch(stripped.lstrip("-* ")))
+
+
+def split_response(text: str) -> tuple[list[list[str]], list[str]]:
+    """Zerlegt eine Antwort in Zeilen aus Sätzen und eine Liste von Quellen-Zeilen."""
+    lines: list[list[str]] = []
+    sources: list[str] = []
+    in_sources = False
+    for raw in text.splitlines():
+        line = raw.rstrip()
+        if not line.strip():
+            in_sources = False
+            lines.append([])
+            continue
+        if _SOURCE_HEADING.fullmatch(line.strip()):
+            # Überschrift "Sources:" leitet einen Quellen-Block ein
+            in_sources = True
+            continue
+        if _is_source_line(line) or (in_sources and _URL.search(line)):
+            in_sources = True
+            sources.append(line.strip())
+            continue
+        in_sources = False
+        lines.append(_split_sentences(line))
+    return lines, sources
+
+
+class SynthesisCompactor:
+    """Kompaktiert Web-/Context-Antwort vor der Synthese und zählt die Einsparung."""
+
+    def __init__(self, token_budget: int = 1500):
+        self.token_budget = token_budget
+        self.stats = {
+            "requests": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "duplicates_removed": 0,
+            "trimmed": 0,
+        }
+
+    def compact_all(self, responses: dict[str, str]) -> tuple[dict[str, str], dict[str, Any]]:
+        """Kompaktiert die Antworten der Vorgänger eines Synthese-Knotens (Name → Text).
+
+        Liefert (Name → kompaktierter Text, report mit den gesparten Tokens).
+        Die Context-Antwort wird zuerst verarbeitet, die übrigen in dict-Reihenfolge;
+        das Ergebnis behält die Reihenfolge von responses.
+        """
+        before = sum(estimate_tokens(text) for text in responses.values())
+        seen: set[str] = set()
+        duplicates = 0
+        compacted: dict[str, str] = {}
+        trimmed_any = False
+        # Context zuerst: bei Überschneidung bleibt der Satz in der Context-Antwort
+        for name in sorted(responses, key=lambda name: name != "context"):
+            lines, sources = split_response(responses[name])
+            kept_lines, removed = self._dedupe(lines, seen)
+            duplicates += removed
+            kept_lines, overflow_urls, trimmed = self._trim(kept_lines)
+            trimmed_any = trimmed_any or trimmed
+            kept_sources = self._dedupe_sources(sources + overflow_urls, seen)
+            compacted[name] = self._render(kept_lines, kept_sources, trimmed)
+        compacted = {name: compacted[name] for name in responses}
+
+        after = sum(estimate_tokens(text) for text in compacted.values())
+        report = {
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": max(before - after, 0),
+            "duplicates_removed": duplicates,
+            "trimmed": trimmed_any,
+        }
+        self.stats["requests"] += 1
+        self.stats["tokens_before"] += before
+        self.stats["tokens_after"] += after
+        self.stats["duplicates_removed"] += duplicates
+        self.stats["trimmed"] += int(trimmed_any)
+        return compacted, report
+
+    @staticmethod
+    def _dedupe(lines: list[list[str]], seen: set[str]) -> tuple[list[list[str]], int]:
+        removed = 0
+        kept_lines: list[list[str]] = []
+        for sentences in lines:
+            kept: list[str] = []
+            for sentence in sentences:
+                key = _sentence_key(sentence)
+                if len(key) > 12 and key in seen:  # kurze Fragmente ("Ja.") nicht deduplizieren
+                    removed += 1
+                    continue
+                seen.add(key)
+                kept.append(sentence)
+            if kept or not sentences:
+                kept_lines.append(kept)
+        return kept_lines, removed
+
+    def _trim(self, lines: list[list[str]]) -> tuple[list[list[str]], list[str], bool]:
+        """Behält Sätze in Originalreihenfolge bis zum Budget; URLs gekürzter Sätze bleiben erhalten."""
+        if self.token_budget <= 0:
+            return lines, [], False
+        used = 0
+        kept_lines: list[list[str]] = []
+        overflow_urls: list[str] = []
+        trimmed = False
+        for sentences in lines:
+            kept: list[str] = []
+            for sentence in sentences:
+                cost = estimate_tokens(sentence)
+                if trimmed or used + cost > self.token_budget:
+                    trimmed = True
+                    overflow_urls.extend(_URL.findall(sentence))
+                    continue
+                used += cost
+                kept.append(sentence)
+            if kept or (not sentences and not trimmed):
+                kept_lines.append(kept)
+        return kept_lines, overflow_urls, trimmed
+
+    @staticmethod
+    def _dedupe_sources(sources: list[str], seen: set[str]) -> list[str]:
+        kept: list[str] = []
+        for source in sources:
+            urls = _URL.findall(source)
+            keys = urls or [_sentence_key(source)]
+            if all(f"src:{key}" in seen for key in keys):
+                continue
+            seen.update(f"src:{key}" for key in keys)
+            kept.append(source)
+        return kept
+
+    @staticmethod
+    def _render(lines: list[list[str]], sources: list[str], trimmed: bool) -> str:
+        body: list[str] = []
+        for sentences in lines:
+            if not sentences:
+                if body and body[-1]:
+                    body.append("")  # Leerzeilen zusammenfassen
+                continue
+            body.append(" ".join(sentences))
+        while body and not body[-1]:
+            body.pop()
+        if trimmed:
+            body.append(TRIMMED_MARKER)
+        if sources:
+            body.extend(["", "Sources:", *sources])
+        return "\n".join(body)
+
+    def snapshot(self) -> dict[str, Any]:
+        saved = self.stats["tokens_before"] - self.stats["tokens_after"]
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "token_budget": self.token_budget,
+            "tokens_saved": saved,
+            "avg_tokens_saved": round(saved / requests, 1) if requests else 0.0,
+        }
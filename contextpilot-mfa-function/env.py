@@ -0,0 +1,15 @@
+"""Gemeinsames Parsen von Feature-Flags aus App Settings (leichtgewichtig, ohne Heavy-Imports)."""
+
+from __future__ import annotations
+
+import os
+
+_TRUE = ("1", "true", "yes")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """True für "1"/"true"/"yes" (Groß-/Kleinschreibung egal); ungesetzt → default."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in _TRUE
@@ -0,0 +1,215 @@
+"""Lokaler Fast-Path-Router vor AURATriage.
+
+Klassifiziert eindeutige Prompts ohne LLM-Aufruf und liefert dasselbe
+Routing-dict wie parse_triage_response. Bei niedriger Konfidenz (None)
+entscheidet weiterhin die Remote-Triage.
+
+Regeln:
+- "keywords": einzelne Wörter → Keyword-Index (ein dict-Lookup pro Token)
+- "patterns": Regex auf dem normalisierten Prompt (Phrasen, Jahreszahlen)
+- "route": direct | web | context, "weight": Beitrag zur Konfidenz (0..1)
+
+Konfiguration (optional) als JSON-Datei über MFA_FAST_ROUTER_RULES:
+    {"threshold": 0.6, "max_chars": 400, "internal_terms": ["..."], "rules": [...]}
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any
+
+from response_cache import normalize_prompt, route_of
+
+_TOKEN = re.compile(r"[\w\-]+", re.UNICODE)
+
+DEFAULT_RULES: list[dict[str, Any]] = [
+    {
+        "name": "translation",
+        "route": "direct",
+        "weight": 0.9,
+        "keywords": ["übersetze", "übersetzen", "übersetzung", "translate", "translation"],
+        "patterns": [
+            r"\bauf (englisch|deutsch|französisch|italienisch|spanisch)\b",
+            r"\bin (english|german|french|italian|spanish)\b",
+            r"\bwas hei(ss|ß)t\b",
+        ],
+    },
+    {
+        "name": "definition",
+        "route": "direct",
+        "weight": 0.7,
+        "keywords": ["definition", "definiere", "bedeutet", "bedeutung", "meaning", "abkürzung", "acronym"],
+        "patterns": [r"^(was ist|was sind|what is|what are|what does) (ein |eine |a |an |the )?\S+$"],
+    },
+    {
+        "name": "current_events",
+        "route": "web",
+        "weight": 0.8,
+        "keywords": [
+            "heute", "gestern", "aktuell", "aktuelle", "aktuellen", "news", "nachrichten",
+            "neueste", "neuesten", "latest", "today", "yesterday", "current", "kurs", "börse",
+        ],
+        "patterns": [r"\b20[2-9]\d\b", r"\b(diese|letzte|nächste) woche\b", r"\b(this|last|next) week\b"],
+    },
+    {
+        "name": "internal",
+        "route": "context",
+        "weight": 0.6,
+        "keywords": ["unser", "unsere", "unserem", "unseren", "intern", "interne", "internen", "our", "internal"],
+        "patterns": [],
+    },
+]
+
+
+@dataclass
+class _Rule:
+    name: str
+    route: str
+    weight: float
+    keywords: list[str] = field(default_factory=list)
+    patterns: list[re.Pattern[str]] = field(default_factory=list)
+
+
+class FastRouter:
+    """Regel- und Keyword-basierter Pre-Router mit Konfidenz-Schwelle."""
+
+    def __init__(
+        self,
+        rules: list[dict[str, Any]],
+        internal_terms: list[str] | None = None,
+        threshold: float = 0.6,
+        max_chars: int = 400,
+    ):
+        self.threshold = threshold
+        self.max_chars = max_chars
+        self._rules = [
+            _Rule(
+                name=rule["name"],
+                route=rule["route"],
+                weight=float(rule.get("weight", 0.5)),
+                keywords=[normalize_prompt(k) for k in rule.get("keywords", [])],
+                patterns=[re.compile(p) for p in rule.get("patterns", [])],
+            )
+            for rule in rules
+        ]
+        if internal_terms:
+            # Interne Projektnamen sind ein starkes Signal für den Business-Index
+            self._rules.append(_Rule(
+                name="internal_terms",
+                route="context",
+                weight=0.9,
+                keywords=[normalize_prompt(t) for t in internal_terms if t.strip()],
+            ))
+        self._index: dict[str, list[_Rule]] = {}
+        self._phrases: list[tuple[str, _Rule]] = []
+        for rule in self._rules:
+            for keyword in rule.keywords:
+                if " " in keyword:
+                    self._phrases.append((keyword, rule))
+                else:
+                    self._index.setdefault(keyword, []).append(rule)
+        self.stats: dict[str, Any] = {
+            "fast_path": 0,
+            "fallthrough": 0,
+            "routes": {"direct": 0, "web": 0, "context": 0, "synthesis": 0},
+            "rules": {},
+        }
+        self._triage_ms_avg: float | None = None
+
+    @classmethod
+    def from_config(cls, path: str | None, internal_terms: list[str], threshold: float) -> "FastRouter":
+        """Lädt Regeln aus einer JSON-Datei (falls gesetzt), sonst DEFAULT_RULES."""
+        config: dict[str, Any] = {}
+        if path:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        return cls(
+            rules=config.get("rules", DEFAULT_RULES),
+            internal_terms=[*config.get("internal_terms", []), *internal_terms],
+            threshold=float(config.get("threshold", threshold)),
+            max_chars=int(config.get("max_chars", 400)),
+        )
+
+    def score(self, prompt: str) -> tuple[dict[str, float], list[str]]:
+        """Summiert Regel-Gewichte pro Route (max. 1.0) und liefert die Treffer."""
+        text = normalize_prompt(prompt)
+        matched: dict[str, _Rule] = {}
+        for token in _TOKEN.findall(text):
+            for rule in self._index.get(token, ()):
+                matched[rule.name] = rule
+        for phrase, rule in self._phrases:
+            if phrase in text:
+                matched[rule.name] = rule
+        for rule in self._rules:
+            if rule.name not in matched and any(p.search(text) for p in rule.patterns):
+                matched[rule.name] = rule
+        scores = {"direct": 0.0, "web": 0.0, "context": 0.0}
+        for rule in matched.values():
+            scores[rule.route] = min(1.0, scores[rule.route] + rule.weight)
+        return scores, sorted(matched)
+
+    def classify(self, prompt: str) -> dict[str, Any] | None:
+        """Routing-dict wie parse_triage_response, oder None (→ Remote-Triage)."""
+        routing = self._decide(prompt)
+        if routing is None:
+            self.stats["fallthrough"] += 1
+            return None
+        self.stats["fast_path"] += 1
+        self.stats["routes"][route_of(routing)] += 1
+        for name in routing["fast_path_rules"]:
+            self.stats["rules"][name] = self.stats["rules"].get(name, 0) + 1
+        return routing
+
+    def explain(self, prompt: str) -> dict[str, Any] | None:
+        """Wie classify, aber ohne Zähler (Diagnose)."""
+        return self._decide(prompt)
+
+    def _decide(self, prompt: str) -> dict[str, Any] | None:
+        if len(prompt) > self.max_chars:
+            return None  # Lange Prompts (Transkript-Ausschnitte) → Triage
+        scores, rules = self.score(prompt)
+        web, context = scores["web"], scores["context"]
+
+        # Web + Context beide eindeutig → Synthese-Route
+        if web >= self.threshold and context >= self.threshold:
+            return _routing(False, True, True, rules, min(web, context))
+
+        # Sonst: beste Route, Konfidenz = Abstand zur zweitbesten
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best, best_score), (_, second_score) = ranked[0], ranked[1]
+        confidence = best_score - second_score
+        if confidence < self.threshold:
+            return None
+        return _routing(best == "direct", best == "web", best == "context", rules, confidence)
+
+    def record_triage(self, elapsed_ms: float) -> None:
+        """Misst die Remote-Triage-Latenz (EWMA) für die Einsparungs-Schätzung."""
+        if self._triage_ms_avg is None:
+            self._triage_ms_avg = elapsed_ms
+        else:
+            self._triage_ms_avg = 0.8 * self._triage_ms_avg + 0.2 * elapsed_ms
+
+    def snapshot(self) -> dict[str, Any]:
+        total = self.stats["fast_path"] + self.stats["fallthrough"]
+        avg = self._triage_ms_avg
+        return {
+            **self.stats,
+            "fast_path_rate": round(self.stats["fast_path"] / total, 3) if total else 0.0,
+            "threshold": self.threshold,
+            "triage_ms_avg": round(avg, 1) if avg is not None else None,
+            "estimated_saved_ms": round(avg * self.stats["fast_path"]) if avg is not None else None,
+        }
+
+
+def _routing(direct: bool, web: bool, context: bool, rules: list[str], confidence: float) -> dict[str, Any]:
+    return {
+        "direct": direct,
+        "web": web,
+        "context": context,
+        "reasoning": f"Fast path ({', '.join(rules)}; confidence {confidence:.2f})",
+        "direct_response": None,
+        "fast_path": True,
+        "fast_path_rules": rules,
+    }
@@ -2,40 +2,171 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 import uuid
 
 import azure.functions as func
 
+from env import env_flag
+
+# HTTP-Streaming (SSE) braucht die FastAPI-Extension; ohne sie bleibt nur /mfa aktiv
+try:
+    from azurefunctions.extensions.http.fastapi import Request, StreamingResponse
+except ImportError:  # pragma: no cover - abhängig vom Deployment
+    Request = StreamingResponse = None
+
 # SECURITY: AuthLevel.FUNCTION erfordert x-functions-key Header oder ?code= Parameter
 # Lokal: Azure Functions Core Tools ignoriert dies standardmäßig
 # Azure: Proxy muss MFA_X_FUNCTION_KEY in App Settings haben
 app = func.FunctionApp(http_auth_level=func.AuthLevel.FUNCTION)
 
+# Cold Start: schwere Module im Hintergrund-Thread vorladen (blockiert das Indexing nicht)
+if env_flag("MFA_WARMUP_ON_STARTUP", True):
+    import warmup
+
+    warmup.preload_in_background()
+
 
 @app.route(route="healthz", methods=["GET"])
 def healthz(req: func.HttpRequest) -> func.HttpResponse:
     """Health check endpoint - lädt ohne Heavy-Imports."""
     return func.HttpResponse(
-        json.dumps({"ok": True, "version": "2.5"}),
+        json.dumps({"ok": True, "version": "2.7"}),
         status_code=200,
         mimetype="application/json",
     )
 
 
+@app.route(route="status", methods=["GET"])
+def status(req: func.HttpRequest) -> func.HttpResponse:
+    """Betriebszustand: Circuit Breaker pro Agent und degradierte Agents (lädt mfa_workflow)."""
+    try:
+        from mfa_workflow import breakers
+    except Exception as e:
+        return func.HttpResponse(
+            json.dumps({"ok": False, "error": f"{type(e).__name__}: {e}"}),
+            status_code=503,
+            mimetype="application/json",
+        )
+    open_agents = breakers.open_agents() if breakers is not None else []
+    payload = {
+        "ok": True,
+        "version": "2.7",
+        "degraded": bool(open_agents),
+        "open_circuits": open_agents,
+        "breakers": breakers.snapshot() if breakers is not None else {"enabled": False},
+    }
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="metrics", methods=["GET"])
+async def metrics_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """Prometheus-Scrape: Requests pro Route, Latenz-Histogramme, In-Flight, Tokens.
+
+    async, damit das Rendern auf demselben Event-Loop läuft wie der Workflow
+    (die Metriken kommen ohne Locks aus).
+    """
+    from mfa_workflow import metrics
+
+    if metrics is None:
+        return func.HttpResponse(
+            json.dumps({"enabled": False}),
+            status_code=200,
+            mimetype="application/json",
+        )
+    return func.HttpResponse(
+        metrics.render(),
+        status_code=200,
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+    )
+
+
+@app.route(route="warmup", methods=["GET", "POST"])
+async def warmup_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """Warm-up: Module laden, Token holen, Agents auflösen.
+
+    Query:
+        ?background=1   sofort 202, Warm-up läuft im Hintergrund weiter
+        ?profile=1      Import-Profil (python -X importtime) statt Warm-up
+    """
+    import warmup
+
+    if req.params.get("profile") in ("1", "true"):
+        profile = await asyncio.get_running_loop().run_in_executor(None, warmup.profile_imports)
+        return func.HttpResponse(
+            json.dumps(profile),
+            status_code=200,
+            mimetype="application/json",
+        )
+    if req.params.get("background") in ("1", "true"):
+        started = warmup.warm_up_in_background()
+        return func.HttpResponse(
+            json.dumps({"started": started}),
+            status_code=202,
+            mimetype="application/json",
+        )
+    report = await warmup.warm_up()
+    return func.HttpResponse(
+        json.dumps(report),
+        status_code=200 if report["ok"] else 503,
+        mimetype="application/json",
+    )
+
+
+if hasattr(app, "warm_up_trigger"):
+
+    @app.warm_up_trigger("warmup_context")
+    async def warmup_trigger(warmup_context) -> None:
+        """Warm-up-Trigger (Premium/Elastic Premium): vor dem ersten Request einer Instanz."""
+        import warmup
+
+        report = await warmup.warm_up()
+        logging.info("MFA warm-up trigger finished: %s", report)
+
+
 @app.route(route="mfa", methods=["POST"])
 async def mfa_endpoint(req: func.HttpRequest) -> func.HttpResponse:
     """HTTP Endpoint für MFA-Anfragen.
 
     Request Body:
-        { "prompt": "..." }
+        { "prompt": "...", "timings": false, "session_id": "...", "deadline_ms": 60000 }
 
     Response:
-        { "output_text": "...", "workflow": "mfa" }
+        { "output_text": "...", "workflow": "mfa", "agents_used": [...], "routing": {...} }
+
+        Mit "session_id" (oder Header x-session-id) gilt der Prompt als Folgefrage,
+        sofern die Session schon Turns hat (routing.follow_up); es reicht, nur die
+        neue Frage zu schicken.
+
+        routing.partial/routing.failed markieren Teilergebnisse, wenn ein
+        paralleler Agent-Branch fehlgeschlagen ist (Synthesizer übersprungen).
+        routing.compaction: Token vor/nach der Kompaktierung des Synthese-Prompts
+        (null, wenn kein Synthesizer lief).
+        routing.condensed: Token vor/nach der Verdichtung des Eingangs-Prompts
+        (tokens_before, tokens_after, triage_tokens; condensed=false, wenn der
+        Prompt unverändert blieb).
+        routing.degraded: Agents, die wegen offenem Circuit Breaker übergangen
+        wurden (Zustand unter GET /status).
+        routing.prefetched: Antwort stammt aus einem Transkript-Prefetch
+        (POST /api/mfa/prefetch).
+        Mit "timings": true (oder ?timings=1) zusätzlich die Phasen-Spans unter "timings".
+
+        "deadline_ms" (oder Header x-mfa-deadline-ms): End-to-End-Budget; jeder
+        Agent-Aufruf bekommt einen Anteil des Restbudgets als Timeout.
+
+    Mit MFA_CAPTURE_PATH wird jeder Request anonymisiert mitgeschnitten
+    (Prompt-Hash, Länge, Ankunftszeit, Routing, Phasen-Timings; siehe traffic_capture.py).
     """
 
     correlation_id = req.headers.get("x-correlation-id") or str(uuid.uuid4())
+    arrived, started = time.time(), time.perf_counter()
 
     try:
         body = req.get_json()
@@ -56,23 +187,192 @@ async def mfa_endpoint(req: func.HttpRequest) -> func.HttpResponse:
             headers={"x-correlation-id": correlation_id},
         )
 
+    session_id = _session_id(req, body)
+    if session_id is not None and not _valid_session_id(session_id):
+        return func.HttpResponse(
+            json.dumps({"error": "'session_id' must be a string of 1-128 characters"}),
+            status_code=400,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+    deadline_ms = _deadline_ms(req, body)
+    if deadline_ms is not None and not _valid_deadline_ms(deadline_ms):
+        return func.HttpResponse(
+            json.dumps({"error": "'deadline_ms' must be a positive number"}),
+            status_code=400,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+    trace = None
     try:
         # Lazy import: verhindert, dass Worker-Indexing bei ImportError komplett ausfällt
-        from mfa_workflow import run_mfa_workflow
-
-        result = await run_mfa_workflow(prompt)
-        return func.HttpResponse(
-            json.dumps({
-                "output_text": result["response"],
-                "workflow": "mfa",
-                "agents_used": result["agents_used"],
-                "routing": {
-                    "direct": result["routing"].get("direct", False),
-                    "web": result["routing"].get("web", False),
-                    "context": result["routing"].get("context", False),
-                    "reasoning": result["routing"].get("reasoning", ""),
-                },
-            }),
+        from admission import AdmissionRejected
+        from hedging import deadline_scope
+        from mfa_workflow import public_routing, run_mfa_workflow
+        from tracing import start_trace
+
+        with start_trace(correlation_id) as trace, deadline_scope(_deadline_seconds(deadline_ms)):
+            result = await run_mfa_workflow(prompt, session_id=session_id)
+        _capture(prompt, arrived, started, 200, trace, result)
+        payload = {
+            "output_text": result["response"],
+            "workflow": "mfa",
+            "agents_used": result["agents_used"],
+            "routing": public_routing(result["routing"]),
+        }
+        if session_id is not None:
+            payload["session_id"] = session_id
+        if _wants_timings(req.params, body):
+            payload["timings"] = trace.timings()
+        return func.HttpResponse(
+            json.dumps(payload),
+            status_code=200,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+    except AdmissionRejected as e:
+        _capture(prompt, arrived, started, 429, trace)
+        return _rejected_response(e, correlation_id)
+    except Exception as e:
+        _capture(prompt, arrived, started, 500, trace)
+        return func.HttpResponse(
+            json.dumps({"error": str(e), "hint": "Check Azure Function logs for details"}),
+            status_code=500,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+
+def _capture(prompt: str, arrived: float, started: float, status: int, trace, result: dict | None = None) -> None:
+    """Request an den Traffic-Mitschnitt geben (No-Op ohne MFA_CAPTURE_PATH)."""
+    try:
+        from mfa_workflow import capture
+    except Exception:  # Workflow nicht importierbar → nichts mitzuschneiden
+        return
+    if capture is not None:
+        capture.record(
+            prompt,
+            arrived,
+            status,
+            (time.perf_counter() - started) * 1000,
+            result,
+            trace.timings() if trace is not None else None,
+        )
+
+
+def _wants_timings(query, body: dict | None) -> bool:
+    """Phasen-Timings nur auf Anfrage in die Response (Body "timings": true oder ?timings=1).
+
+    query: Query-Parameter – req.params (func.HttpRequest) bzw. req.query_params
+    (FastAPI-Request der Streaming-Routen).
+    """
+    return (body or {}).get("timings") is True or query.get("timings") in ("1", "true")
+
+
+def _session_id(req, body: dict | None):
+    """Session-ID aus dem Body ("session_id") oder dem Header x-session-id."""
+    session_id = (body or {}).get("session_id") if isinstance(body, dict) else None
+    return session_id if session_id is not None else req.headers.get("x-session-id")
+
+
+def _valid_session_id(session_id) -> bool:
+    return isinstance(session_id, str) and 0 < len(session_id) <= 128
+
+
+def _deadline_ms(req, body: dict | None):
+    """End-to-End-Budget aus dem Body ("deadline_ms") oder dem Header x-mfa-deadline-ms."""
+    deadline_ms = (body or {}).get("deadline_ms") if isinstance(body, dict) else None
+    header = req.headers.get("x-mfa-deadline-ms")
+    if deadline_ms is None and header is not None:
+        try:
+            return float(header)
+        except ValueError:
+            return header  # ungültig → 400
+    return deadline_ms
+
+
+def _valid_deadline_ms(deadline_ms) -> bool:
+    return isinstance(deadline_ms, (int, float)) and not isinstance(deadline_ms, bool) and deadline_ms > 0
+
+
+def _deadline_seconds(deadline_ms) -> float:
+    """Angefordertes Budget (höchstens MFA_DEFAULT_DEADLINE_SECONDS), sonst der Default."""
+    from mfa_workflow import MFA_DEFAULT_DEADLINE_SECONDS
+
+    if deadline_ms is None:
+        return MFA_DEFAULT_DEADLINE_SECONDS
+    if MFA_DEFAULT_DEADLINE_SECONDS <= 0:
+        return deadline_ms / 1000
+    return min(deadline_ms / 1000, MFA_DEFAULT_DEADLINE_SECONDS)
+
+
+def _rejected_response(rejected, correlation_id: str) -> func.HttpResponse:
+    """429 mit Retry-After, wenn die Admission Control einen Request ablehnt."""
+    return func.HttpResponse(
+        json.dumps({"error": rejected.reason, "retry_after": rejected.retry_after}),
+        status_code=429,
+        mimetype="application/json",
+        headers={"x-correlation-id": correlation_id, "Retry-After": str(rejected.retry_after)},
+    )
+
+
+@app.route(route="mfa/batch", methods=["POST"])
+async def mfa_batch_endpoint(req: func.HttpRequest) -> func.HttpResponse:
+    """Mehrere Prompts in einem Request (z.B. markierte Fragen aus dem Transkript).
+
+    Request Body:
+        { "prompts": ["...", "..."], "timings": false, "deadline_ms": 60000 }
+
+    Response:
+        { "results": [ { "index": 0, "output_text": "...", "workflow": "mfa",
+                         "agents_used": [...], "routing": {...} }
+                     | { "index": 1, "error": "...", ["retry_after": 5] }, ... ] }
+
+        Ergebnisse in Eingabe-Reihenfolge; identische Prompts laufen nur einmal.
+        Fehler betreffen nur das jeweilige Item (HTTP 200 für den Batch).
+        "deadline_ms" (oder Header x-mfa-deadline-ms) gilt für den ganzen Batch,
+        Default wie bei /mfa.
+    """
+
+    correlation_id = req.headers.get("x-correlation-id") or str(uuid.uuid4())
+
+    try:
+        body = req.get_json()
+    except ValueError:
+        body = None
+
+    prompts, error = _batch_prompts(body)
+    if error:
+        return func.HttpResponse(
+            json.dumps({"error": error}),
+            status_code=400,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+    deadline_ms = _deadline_ms(req, body)
+    if deadline_ms is not None and not _valid_deadline_ms(deadline_ms):
+        return func.HttpResponse(
+            json.dumps({"error": "'deadline_ms' must be a positive number"}),
+            status_code=400,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+    try:
+        from hedging import deadline_scope
+        from mfa_workflow import public_routing, run_mfa_batch
+        from tracing import start_trace
+
+        with start_trace(correlation_id, name="mfa.batch") as trace, deadline_scope(_deadline_seconds(deadline_ms)):
+            outcomes = await run_mfa_batch(prompts)
+        payload = {"results": [_batch_item(i, outcome, public_routing) for i, outcome in enumerate(outcomes)]}
+        if _wants_timings(req.params, body):
+            payload["timings"] = trace.timings()
+        return func.HttpResponse(
+            json.dumps(payload),
             status_code=200,
             mimetype="application/json",
             headers={"x-correlation-id": correlation_id},
@@ -84,3 +384,592 @@ async def mfa_endpoint(req: func.HttpRequest) -> func.HttpResponse:
             mimetype="application/json",
             headers={"x-correlation-id": correlation_id},
         )
+
+
+def _batch_prompts(body) -> tuple[list[str], str | None]:
+    """Validiert "prompts" (Liste nicht-leerer Strings, max. MFA_BATCH_MAX_PROMPTS)."""
+    from mfa_workflow import MFA_BATCH_MAX_PROMPTS
+
+    prompts = body.get("prompts") if isinstance(body, dict) else None
+    if not isinstance(prompts, list) or not prompts:
+        return [], "Missing 'prompts' (non-empty list) in request body"
+    if not all(isinstance(p, str) and p.strip() for p in prompts):
+        return [], "'prompts' must only contain non-empty strings"
+    if len(prompts) > MFA_BATCH_MAX_PROMPTS:
+        return [], f"Too many prompts ({len(prompts)} > {MFA_BATCH_MAX_PROMPTS})"
+    return prompts, None
+
+
+def _batch_item(index: int, outcome: dict, public_routing) -> dict:
+    if "error" in outcome:
+        return {"index": index, **outcome}
+    return {
+        "index": index,
+        "output_text": outcome["response"],
+        "workflow": "mfa",
+        "agents_used": outcome["agents_used"],
+        "routing": public_routing(outcome["routing"]),
+    }
+
+
+@app.route(route="mfa/jobs", methods=["POST", "GET"])
+async def mfa_jobs(req: func.HttpRequest) -> func.HttpResponse:
+    """Asynchroner Job-Modus: POST legt einen Job an, GET liefert Job-Statistiken.
+
+    Request Body (POST):
+        { "prompt": "...", "timings": false }
+
+    Response (POST, 202):
+        { "job_id": "...", "status": "queued", "status_url": "/api/mfa/jobs/<job_id>" }
+    """
+    from mfa_workflow import job_manager
+
+    if req.method == "GET":
+        return func.HttpResponse(
+            json.dumps(job_manager.snapshot()),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    correlation_id = req.headers.get("x-correlation-id") or str(uuid.uuid4())
+    try:
+        body = req.get_json()
+    except ValueError:
+        body = None
+
+    prompt = body.get("prompt") if isinstance(body, dict) else None
+    if not isinstance(prompt, str) or not prompt.strip():
+        return func.HttpResponse(
+            json.dumps({"error": "Missing 'prompt' in request body"}),
+            status_code=400,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id},
+        )
+
+    from jobs import JobStoreFull, public_job
+
+    try:
+        job = await job_manager.submit(prompt, correlation_id, timings=_wants_timings(req.params, body))
+    except JobStoreFull as e:
+        return func.HttpResponse(
+            json.dumps({"error": str(e), "retry_after": 5}),
+            status_code=503,
+            mimetype="application/json",
+            headers={"x-correlation-id": correlation_id, "Retry-After": "5"},
+        )
+    status_url = f"/api/mfa/jobs/{job['job_id']}"
+    return func.HttpResponse(
+        json.dumps({**public_job(job), "status_url": status_url}),
+        status_code=202,
+        mimetype="application/json",
+        headers={"x-correlation-id": correlation_id, "Location": status_url},
+    )
+
+
+@app.route(route="mfa/jobs/{job_id}", methods=["GET", "DELETE"])
+async def mfa_job(req: func.HttpRequest) -> func.HttpResponse:
+    """Job-Status (GET) bzw. Abbruch (DELETE).
+
+    Response:
+        { "job_id": "...", "status": "queued|running|succeeded|failed|cancelled",
+          "routing": {...}, "agents": {"AURAContextPilotWeb": "started", ...},
+          "partial": "...", "result": { wie /mfa } | null, "error": "..." | null }
+    """
+    from jobs import public_job
+    from mfa_workflow import job_manager
+
+    job_id = req.route_params.get("job_id", "")
+    if req.method == "DELETE":
+        job = await job_manager.cancel(job_id)
+    else:
+        job = await job_manager.store.get(job_id)
+    if job is None:
+        return func.HttpResponse(
+            json.dumps({"error": f"Unknown or expired job '{job_id}'"}),
+            status_code=404,
+            mimetype="application/json",
+        )
+    return func.HttpResponse(
+        json.dumps(public_job(job)),
+        status_code=200,
+        mimetype="application/json",
+        headers={"x-correlation-id": job["correlation_id"]},
+    )
+
+
+@app.route(route="mfa/sessions", methods=["GET"])
+def mfa_sessions(req: func.HttpRequest) -> func.HttpResponse:
+    """Session-Store: Anzahl Sessions, geschätzter Speicher, Folgefragen, Evictions."""
+    from mfa_workflow import sessions
+
+    payload = {"enabled": False} if sessions is None else {"enabled": True, **sessions.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/sessions/{session_id}", methods=["GET", "DELETE"])
+def mfa_session(req: func.HttpRequest) -> func.HttpResponse:
+    """Verlauf einer Session (GET) bzw. Session verwerfen (DELETE, z.B. Meeting-Ende)."""
+    from mfa_workflow import sessions
+
+    session_id = req.route_params.get("session_id", "")
+    if sessions is None:
+        found, payload = False, {}
+    elif req.method == "DELETE":
+        found = sessions.delete(session_id)
+        payload = {"session_id": session_id, "deleted": found}
+    else:
+        payload = sessions.snapshot(session_id)
+        found = bool(payload)
+    if not found:
+        return func.HttpResponse(
+            json.dumps({"error": f"Unknown or expired session '{session_id}'"}),
+            status_code=404,
+            mimetype="application/json",
+        )
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/admission", methods=["GET"])
+def mfa_admission(req: func.HttpRequest) -> func.HttpResponse:
+    """Admission Control: Token-Budget, Warteschlange, angenommene/abgelehnte Requests."""
+    from mfa_workflow import scheduler
+
+    payload = {"enabled": False} if scheduler is None else {"enabled": True, **scheduler.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/inflight", methods=["GET"])
+def mfa_inflight(req: func.HttpRequest) -> func.HttpResponse:
+    """Single-Flight: laufende Workflows und Anzahl zusammengelegter Requests."""
+    from mfa_workflow import inflight
+
+    payload = {"enabled": False} if inflight is None else {"enabled": True, **inflight.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="agents/invalidate", methods=["POST"])
+async def agents_invalidate(req: func.HttpRequest) -> func.HttpResponse:
+    """Verwirft gecachte Agent-Handles, z.B. nach dem Publizieren neuer Agent-Versionen.
+
+    Request Body (optional):
+        { "agent": "AURAContextPilotWeb" }   # ohne "agent": alle Handles + Credential
+    """
+    try:
+        body = req.get_json()
+    except ValueError:
+        body = None
+
+    agent_name = (body or {}).get("agent")
+    if agent_name is not None and not isinstance(agent_name, str):
+        return func.HttpResponse(
+            json.dumps({"error": "'agent' must be a string"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+
+    from mfa_workflow import agent_registry, invalidate_agents
+
+    invalidated = await invalidate_agents(agent_name or None)
+    return func.HttpResponse(
+        json.dumps({"invalidated": invalidated, "registry": agent_registry.snapshot()}),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/cache", methods=["GET", "DELETE"])
+async def mfa_cache(req: func.HttpRequest) -> func.HttpResponse:
+    """Response-Cache: GET liefert Hit/Miss-Zähler, DELETE leert den Cache."""
+    from mfa_workflow import response_cache
+
+    if response_cache is None:
+        return func.HttpResponse(
+            json.dumps({"enabled": False}),
+            status_code=200,
+            mimetype="application/json",
+        )
+    if req.method == "DELETE":
+        await response_cache.clear()
+    return func.HttpResponse(
+        json.dumps({"enabled": True, **response_cache.snapshot()}),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/semantic-cache", methods=["GET", "DELETE"])
+def mfa_semantic_cache(req: func.HttpRequest) -> func.HttpResponse:
+    """Ähnlichkeits-Cache (Context-Agent): GET liefert Trefferquote, DELETE leert den Index."""
+    from mfa_workflow import semantic_cache
+
+    if semantic_cache is None:
+        return func.HttpResponse(
+            json.dumps({"enabled": False}),
+            status_code=200,
+            mimetype="application/json",
+        )
+    if req.method == "DELETE":
+        semantic_cache.clear()
+    return func.HttpResponse(
+        json.dumps({"enabled": True, **semantic_cache.snapshot()}),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/prefetch", methods=["POST", "GET"])
+async def mfa_prefetch(req: func.HttpRequest) -> func.HttpResponse:
+    """Transkript-Prefetch: POST nimmt laufende Segmente an, GET liefert Hit-Rate und Token-Verbrauch.
+
+    Request Body (POST):
+        { "stream_id": "meeting-1", "segments": ["[MIC] ...", "..."] }
+        ("text": "..." statt "segments" für ein einzelnes Segment)
+
+    Response (POST, 202):
+        { "enabled": true, "candidates": 4, "scheduled": [{"term": "...", "agent": "context", "mentions": 3}],
+          "tokens_remaining": 18400 }
+
+        Die Prefetches laufen im Hintergrund mit niedrigster Priorität; spätere
+        /mfa-Requests mit denselben Markierungen kommen aus dem Response-Cache
+        (routing.cached und routing.prefetched).
+    """
+    from mfa_workflow import prefetch_transcript, prefetcher
+
+    if prefetcher is None:
+        return func.HttpResponse(
+            json.dumps({"enabled": False}),
+            status_code=200,
+            mimetype="application/json",
+        )
+    if req.method == "GET":
+        return func.HttpResponse(
+            json.dumps({"enabled": True, **prefetcher.snapshot()}),
+            status_code=200,
+            mimetype="application/json",
+        )
+
+    try:
+        body = req.get_json()
+    except ValueError:
+        body = None
+    body = body if isinstance(body, dict) else {}
+    segments = body.get("segments", [body["text"]] if "text" in body else None)
+    if not isinstance(segments, list) or not segments or not all(isinstance(s, str) for s in segments):
+        return func.HttpResponse(
+            json.dumps({"error": "Missing 'segments' (list of strings) or 'text' in request body"}),
+            status_code=400,
+            mimetype="application/json",
+        )
+    stream_id = str(body.get("stream_id") or req.headers.get("x-session-id") or "default")
+    return func.HttpResponse(
+        json.dumps({"enabled": True, **prefetch_transcript(stream_id, segments)}),
+        status_code=202,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/router", methods=["GET"])
+def mfa_router(req: func.HttpRequest) -> func.HttpResponse:
+    """Fast-Path-Router: Anteil lokal gerouteter Prompts und geschätzte Einsparung.
+
+    Mit ?prompt=... wird zusätzlich die Entscheidung für diesen Prompt angezeigt
+    (ohne Zähler zu verändern).
+    """
+    from mfa_workflow import fast_router
+
+    if fast_router is None:
+        return func.HttpResponse(
+            json.dumps({"enabled": False}),
+            status_code=200,
+            mimetype="application/json",
+        )
+    payload = {"enabled": True, **fast_router.snapshot()}
+    prompt = req.params.get("prompt")
+    if prompt:
+        scores, rules = fast_router.score(prompt)
+        payload["explain"] = {"scores": scores, "rules": rules, "routing": fast_router.explain(prompt)}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/speculation", methods=["GET"])
+def mfa_speculation(req: func.HttpRequest) -> func.HttpResponse:
+    """Spekulative Ausführung: gestartete, übernommene und verschwendete Aufrufe."""
+    from mfa_workflow import speculation
+
+    payload = {"enabled": False} if speculation is None else {"enabled": True, **speculation.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/compaction", methods=["GET"])
+def mfa_compaction(req: func.HttpRequest) -> func.HttpResponse:
+    """Synthese-Kompaktierung: Token vorher/nachher, entfernte Duplikate, gekürzte Prompts."""
+    from mfa_workflow import compactor
+
+    payload = {"enabled": False} if compactor is None else {"enabled": True, **compactor.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/condenser", methods=["GET"])
+def mfa_condenser(req: func.HttpRequest) -> func.HttpResponse:
+    """Prompt-Verdichtung: Token vorher/nachher, Triage-Token, entfernte Duplikate/Füllwörter/Zeitstempel."""
+    from mfa_workflow import condenser
+
+    payload = {"enabled": False} if condenser is None else {"enabled": True, **condenser.snapshot()}
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/hedging", methods=["GET"])
+def mfa_hedging(req: func.HttpRequest) -> func.HttpResponse:
+    """Hedging: Hedge-Rate, Win-Rate, p95-Schwellen pro Agent, übersprungene Hedges (Budget)."""
+    from mfa_workflow import MFA_DEFAULT_DEADLINE_SECONDS, hedger
+
+    payload = {"enabled": False} if hedger is None else {"enabled": True, **hedger.snapshot()}
+    payload["default_deadline_seconds"] = MFA_DEFAULT_DEADLINE_SECONDS
+    return func.HttpResponse(
+        json.dumps(payload),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+@app.route(route="mfa/graph", methods=["GET"])
+def mfa_graph(req: func.HttpRequest) -> func.HttpResponse:
+    """Agent-Graph: Knoten, Kanten, Timeouts und Statistik pro Knoten (erfolgreich/fehlgeschlagen/übersprungen)."""
+    from mfa_workflow import agent_graph
+
+    return func.HttpResponse(
+        json.dumps(agent_graph.snapshot()),
+        status_code=200,
+        mimetype="application/json",
+    )
+
+
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event)}\n\n"
+
+
+if StreamingResponse is not None:
+
+    @app.route(route="mfa/stream", methods=["POST"])
+    async def mfa_stream_endpoint(req: Request) -> StreamingResponse:
+        """Streaming-Variante von /mfa (Server-Sent Events).
+
+        Request Body:
+            { "prompt": "...", "session_id": "...", "deadline_ms": 60000 }
+
+        Events (je "data: {...}"):
+            { "event": "routing", "routing": {...} }       nach Triage
+            { "event": "agent", "agent": "...", "status": "started|completed|failed" }
+            { "delta": "...", "partial": "..." }          finale Antwort, Token für Token
+            { "done": true, "output_text": "...", "workflow": "mfa", "agents_used": [...], "routing": {...} }
+            { "error": "...", "done": true }               bei Fehlern nach Stream-Beginn
+
+        Lehnt die Admission Control ab, kommt vor Stream-Beginn ein 429 mit Retry-After.
+        """
+
+        correlation_id = req.headers.get("x-correlation-id") or str(uuid.uuid4())
+        headers = {"x-correlation-id": correlation_id, "Cache-Control": "no-cache"}
+
+        try:
+            body = await req.json()
+        except ValueError:
+            body = None
+
+        prompt = body.get("prompt") if isinstance(body, dict) else None
+        if not isinstance(prompt, str) or not prompt.strip():
+            return StreamingResponse(
+                iter([_sse({"error": "Missing 'prompt' in request body", "done": True})]),
+                status_code=400,
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        session_id = _session_id(req, body)
+        if session_id is not None and not _valid_session_id(session_id):
+            return StreamingResponse(
+                iter([_sse({"error": "'session_id' must be a string of 1-128 characters", "done": True})]),
+                status_code=400,
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        deadline_ms = _deadline_ms(req, body)
+        if deadline_ms is not None and not _valid_deadline_ms(deadline_ms):
+            return StreamingResponse(
+                iter([_sse({"error": "'deadline_ms' must be a positive number", "done": True})]),
+                status_code=400,
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        from admission import AdmissionRejected
+        from hedging import deadline_scope
+        from mfa_workflow import iter_mfa_workflow, public_routing
+        from tracing import start_trace
+
+        want_timings = _wants_timings(req.query_params, body)
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            # Eigener Task: Trace-Kontext gilt für den gesamten Workflow-Lauf,
+            # unabhängig davon, in welchem Task der Stream gelesen wird
+            try:
+                with start_trace(correlation_id) as trace, deadline_scope(_deadline_seconds(deadline_ms)):
+                    async for event in iter_mfa_workflow(prompt, stream_tokens=True, session_id=session_id):
+                        if event.get("done") and want_timings:
+                            event = {**event, "timings": trace.timings()}
+                        queue.put_nowait(event)
+            except Exception as e:
+                queue.put_nowait(e)
+            finally:
+                queue.put_nowait(None)
+
+        async def consume():
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+
+        producer = asyncio.ensure_future(produce())
+        events_iter = consume()
+        try:
+            # Erstes Event vorab holen: Admission-Ablehnung wird so noch ein echtes 429
+            first_event = await events_iter.__anext__()
+        except AdmissionRejected as e:
+            return StreamingResponse(
+                iter([_sse({"error": e.reason, "retry_after": e.retry_after, "done": True})]),
+                status_code=429,
+                media_type="text/event-stream",
+                headers={**headers, "Retry-After": str(e.retry_after)},
+            )
+        except Exception as e:
+            logging.exception("MFA stream failed (correlation_id=%s)", correlation_id)
+            return StreamingResponse(
+                iter([_sse({"error": str(e), "done": True})]),
+                status_code=500,
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        async def events():
+            try:
+                async for event in _prepend(first_event, events_iter):
+                    if event.get("done"):
+                        yield _sse({
+                            "done": True,
+                            "output_text": event["response"],
+                            "workflow": "mfa",
+                            "agents_used": event["agents_used"],
+                            "routing": public_routing(event["routing"]),
+                            **({"timings": event["timings"]} if "timings" in event else {}),
+                            **({"session_id": session_id} if session_id is not None else {}),
+                        })
+                    else:
+                        yield _sse(event)
+            except Exception as e:
+                logging.exception("MFA stream failed (correlation_id=%s)", correlation_id)
+                yield _sse({"error": str(e), "done": True})
+            finally:
+                producer.cancel()  # Client weg → laufende Agents abbrechen
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+if StreamingResponse is not None:
+
+    @app.route(route="mfa/batch/stream", methods=["POST"])
+    async def mfa_batch_stream_endpoint(req: Request) -> StreamingResponse:
+        """Streaming-Variante von /mfa/batch: jedes Item, sobald es fertig ist.
+
+        Request Body:
+            { "prompts": ["...", "..."] }
+
+        Events (je "data: {...}"):
+            { "index": 0, "output_text": "...", ... } | { "index": 1, "error": "..." }
+            { "done": true, "count": 2 }
+        """
+
+        correlation_id = req.headers.get("x-correlation-id") or str(uuid.uuid4())
+        headers = {"x-correlation-id": correlation_id, "Cache-Control": "no-cache"}
+
+        try:
+            body = await req.json()
+        except ValueError:
+            body = None
+
+        prompts, error = _batch_prompts(body)
+        if error:
+            return StreamingResponse(
+                iter([_sse({"error": error, "done": True})]),
+                status_code=400,
+                media_type="text/event-stream",
+                headers=headers,
+            )
+
+        from mfa_workflow import iter_mfa_batch, public_routing
+        from tracing import start_trace
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            try:
+                with start_trace(correlation_id, name="mfa.batch"):
+                    async for indices, outcome in iter_mfa_batch(prompts):
+                        for index in indices:
+                            queue.put_nowait(_batch_item(index, outcome, public_routing))
+            except Exception as e:
+                logging.exception("MFA batch stream failed (correlation_id=%s)", correlation_id)
+                queue.put_nowait({"error": str(e), "done": True})
+            finally:
+                queue.put_nowait(None)
+
+        async def events():
+            producer = asyncio.ensure_future(produce())
+            try:
+                while (item := await queue.get()) is not None:
+                    yield _sse(item)
+                    if item.get("done"):
+                        return
+                yield _sse({"done": True, "count": len(prompts)})
+            finally:
+                producer.cancel()  # Client weg → laufende Agents abbrechen
+
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+
+
+async def _prepend(first: dict, rest):
+    yield first
+    async for item in rest:
+        yield item
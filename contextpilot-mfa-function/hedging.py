@@ -0,0 +1,190 @@
+"""End-to-End-Deadline und Hedging für Agent-Aufrufe.
+
+Foundry-Latenzen haben einen langen Tail: ein einzelner langsamer agent.run
+hält sonst die ganze Antwort bis zum 200s-Timeout des Proxys auf.
+
+Deadline: jeder Request trägt ein Zeitbudget (Header x-mfa-deadline-ms bzw.
+"deadline_ms" im Body, sonst MFA_DEFAULT_DEADLINE_SECONDS). Es liegt in einer
+ContextVar (wie der Trace); jeder Agent-Aufruf bekommt einen Anteil des
+verbleibenden Budgets als Timeout (budget(share)).
+
+Hedging: dauert ein Aufruf länger als das beobachtete p95 dieses Agents,
+geht ein zweiter Aufruf raus (gleiches oder alternatives Deployment). Das
+erste erfolgreiche Ergebnis gewinnt, der andere Aufruf wird abgebrochen.
+Hedges sind budgetiert (max_hedge_ratio der letzten Aufrufe), weil jeder
+Hedge Tokens gegen das TPM-Limit kostet.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import math
+from collections import deque
+from typing import Any, Awaitable, Callable, Iterator
+
+# Absoluter Zeitpunkt (loop.time()) des Request-Endes; None = keine Deadline
+_deadline: contextvars.ContextVar[float | None] = contextvars.ContextVar("mfa_deadline", default=None)
+
+
+@contextlib.contextmanager
+def deadline_scope(seconds: float | None) -> Iterator[None]:
+    """Setzt die Deadline für alle Agent-Aufrufe im Block (von Tasks geerbt)."""
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    token = _deadline.set(asyncio.get_running_loop().time() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> float | None:
+    """Verbleibende Sekunden bis zur Deadline (None ohne Deadline)."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - asyncio.get_running_loop().time(), 0.0)
+
+
+def budget(share: float = 1.0) -> float | None:
+    """Timeout für einen Aufruf: share × verbleibendes Budget (Rest bleibt für Folge-Phasen)."""
+    left = remaining()
+    return None if left is None else left * min(max(share, 0.0), 1.0)
+
+
+class HedgePolicy:
+    """p95 pro Agent (gleitendes Fenster) plus Budget für Hedge-Aufrufe."""
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_hedge_ratio: float = 0.1,
+        alternate_deployment: str | None = None,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_hedge_ratio = max_hedge_ratio
+        self.alternate_deployment = alternate_deployment
+        self._latencies: dict[str, deque[float]] = {}
+        self._recent: deque[bool] = deque(maxlen=window)
+        self.stats: dict[str, Any] = {
+            "calls": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "primary_wins": 0,
+            "skipped_budget": 0,
+            "agents": {},
+        }
+
+    def record(self, agent: str, seconds: float) -> None:
+        self._latencies.setdefault(agent, deque(maxlen=self.window)).append(seconds)
+
+    def threshold(self, agent: str) -> float | None:
+        """Beobachtetes Perzentil (Sekunden); None, solange zu wenige Samples vorliegen."""
+        samples = self._latencies.get(agent)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(math.ceil(self.percentile * len(ordered)) - 1, len(ordered) - 1)]
+
+    def _budget_left(self) -> bool:
+        return not self._recent or sum(self._recent) < self.max_hedge_ratio * len(self._recent)
+
+    def _agent_stats(self, agent: str) -> dict[str, int]:
+        return self.stats["agents"].setdefault(agent, {"calls": 0, "hedged": 0, "hedge_wins": 0})
+
+    async def call(
+        self,
+        agent: str,
+        attempt: Callable[[str | None], Awaitable[str]],
+        timeout: float | None,
+    ) -> str:
+        """Führt attempt(deployment) aus; nach dem p95 ggf. ein zweites Mal (attempt(alternate)).
+
+        timeout gilt für den gesamten Aufruf inkl. Hedge (asyncio.TimeoutError).
+
+        Latenz-Samples: jeder Versuch ab seinem eigenen Start – auch fehlgeschlagene
+        und verlorene (abgebrochen nach der bisherigen Dauer, also mindestens so
+        lange) sowie abgelaufene (mit dem Budget). Nur Gewinner zu zählen, ließe
+        das p95 sinken, damit früher hedgen und noch mehr Doppelaufrufe erzeugen.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = None if timeout is None else started + timeout
+        self.stats["calls"] += 1
+        agent_stats = self._agent_stats(agent)
+        agent_stats["calls"] += 1
+        primary = asyncio.ensure_future(attempt(None))
+        tasks = {primary}
+        starts = {primary: started}
+        hedged = False
+        try:
+            delay = self.threshold(agent)
+            if delay is not None and (deadline is None or started + delay < deadline):
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+                if not done:
+                    if self._budget_left():
+                        hedged = True
+                        self.stats["hedged"] += 1
+                        agent_stats["hedged"] += 1
+                        hedge = asyncio.ensure_future(attempt(self.alternate_deployment))
+                        tasks.add(hedge)
+                        starts[hedge] = loop.time()
+                    else:
+                        self.stats["skipped_budget"] += 1
+            self._recent.append(hedged)
+
+            pending = set(tasks)
+            error: BaseException | None = None
+            while pending:
+                left = None if deadline is None else max(deadline - loop.time(), 0.0)
+                done, pending = await asyncio.wait(pending, timeout=left, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    for task in pending:
+                        self.record(agent, deadline - starts[task])  # type: ignore[operator]
+                    raise asyncio.TimeoutError()
+                now = loop.time()
+                for task in done:
+                    self.record(agent, now - starts[task])
+                for task in done:
+                    if task.exception() is not None:
+                        error = error or task.exception()
+                        continue
+                    for loser in pending:
+                        self.record(agent, now - starts[loser])
+                    if hedged:
+                        if task is primary:
+                            self.stats["primary_wins"] += 1
+                        else:
+                            self.stats["hedge_wins"] += 1
+                            agent_stats["hedge_wins"] += 1
+                    return task.result()
+            raise error  # type: ignore[misc]  # alle Versuche fehlgeschlagen
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+                    task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    def snapshot(self) -> dict[str, Any]:
+        hedged = self.stats["hedged"]
+        calls = self.stats["calls"]
+        return {
+            **self.stats,
+            "hedge_rate": round(hedged / calls, 3) if calls else 0.0,
+            "win_rate": round(self.stats["hedge_wins"] / hedged, 3) if hedged else 0.0,
+            "percentile": self.percentile,
+            "max_hedge_ratio": self.max_hedge_ratio,
+            "alternate_deployment": self.alternate_deployment,
+            "thresholds_ms": {
+                agent: round(threshold * 1000, 1)
+                for agent in self._latencies
+                if (threshold := self.threshold(agent)) is not None
+            },
+        }
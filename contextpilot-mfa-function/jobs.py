@@ -0,0 +1,245 @@
+"""Asynchroner Job-Modus für lange MFA-Läufe (Submit, Poll, Cancel).
+
+Statt bis zu 200s auf einem /mfa-Request zu warten (Verbindung + Worker
+blockiert, nahe am Consumption-HTTP-Timeout), legt der Client einen Job an
+und fragt Status und Teilergebnis ab:
+
+    POST   /mfa/jobs            → 202 {"job_id": ..., "status": "queued"}
+    GET    /mfa/jobs/{job_id}   → Status, Routing, Agent-Fortschritt, Teil-/Endergebnis
+    DELETE /mfa/jobs/{job_id}   → bricht noch laufende Agents ab
+
+Der Job-Zustand ist ein JSON-serialisierbares dict in einem JobStore
+(async create/get/update/delete). Standard ist InMemoryJobStore (begrenzt,
+abgeschlossene Jobs verfallen nach TTL); ein Store auf Basis eines lokalen
+Storage-Queue-/Table-Emulators (Azurite) kann dieselbe Schnittstelle
+umsetzen. Abbrüche laufen über das Feld "cancel_requested", damit auch ein
+Worker ohne Zugriff auf den asyncio-Task den Abbruch bemerkt.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Protocol
+
+from hedging import deadline_scope
+from tracing import start_trace
+
+logger = logging.getLogger(__name__)
+
+FINAL_STATES = ("succeeded", "failed", "cancelled")
+
+
+class JobStoreFull(Exception):
+    """Keine Kapazität für neue Jobs (alle Plätze durch laufende Jobs belegt)."""
+
+
+class JobStore(Protocol):
+    """Schnittstelle für Job-Speicher (In-Process, Storage-Queue-Emulator, ...)."""
+
+    async def create(self, job: dict[str, Any]) -> None: ...
+
+    async def get(self, job_id: str) -> dict[str, Any] | None: ...
+
+    async def update(self, job_id: str, fields: dict[str, Any]) -> dict[str, Any] | None: ...
+
+    async def delete(self, job_id: str) -> None: ...
+
+
+class InMemoryJobStore:
+    """Jobs im Worker-Prozess; abgeschlossene Jobs verfallen nach ttl_seconds.
+
+    Ist der Store voll, werden die ältesten abgeschlossenen Jobs verdrängt;
+    laufende Jobs werden nie verdrängt (dann JobStoreFull).
+    """
+
+    def __init__(self, max_jobs: int = 200, ttl_seconds: float = 900.0):
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self.evictions = 0
+        self._jobs: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def _expired(self, job: dict[str, Any]) -> bool:
+        return job["status"] in FINAL_STATES and job["updated_at"] + self.ttl_seconds <= time.time()
+
+    def _purge(self) -> None:
+        for job_id in [job_id for job_id, job in self._jobs.items() if self._expired(job)]:
+            del self._jobs[job_id]
+
+    async def create(self, job: dict[str, Any]) -> None:
+        self._purge()
+        while len(self._jobs) >= self.max_jobs:
+            finished = next((job_id for job_id, j in self._jobs.items() if j["status"] in FINAL_STATES), None)
+            if finished is None:
+                raise JobStoreFull(f"{len(self._jobs)} MFA jobs still running")
+            del self._jobs[finished]
+            self.evictions += 1
+        self._jobs[job["job_id"]] = job
+
+    async def get(self, job_id: str) -> dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is None or self._expired(job):
+            self._jobs.pop(job_id, None)
+            return None
+        return dict(job)
+
+    async def update(self, job_id: str, fields: dict[str, Any]) -> dict[str, Any] | None:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        return dict(job)
+
+    async def delete(self, job_id: str) -> None:
+        self._jobs.pop(job_id, None)
+
+    def snapshot(self) -> dict[str, Any]:
+        self._purge()
+        by_status: dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job["status"]] = by_status.get(job["status"], 0) + 1
+        return {
+            "jobs": len(self._jobs),
+            "max_jobs": self.max_jobs,
+            "ttl_seconds": self.ttl_seconds,
+            "evictions": self.evictions,
+            "by_status": by_status,
+        }
+
+
+class JobManager:
+    """Startet Workflow-Läufe als Hintergrund-Tasks und spiegelt Events in den Store.
+
+    Args:
+        store: Job-Speicher
+        workflow: prompt → Event-Iterator (z.B. iter_mfa_workflow mit stream_tokens=True)
+        public_routing: Filter für Routing-Felder, die an Clients gehen
+        flush_seconds: Mindestabstand, in dem Token-Deltas in den Store geschrieben werden
+            (Routing-/Agent-Events und das Ende werden immer sofort geschrieben)
+        deadline_seconds: End-to-End-Budget pro Job (länger als bei /mfa, da kein
+            HTTP-Timeout wartet); None/0 = keine Deadline
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        workflow: Callable[[str], AsyncIterator[dict[str, Any]]],
+        public_routing: Callable[[dict[str, Any]], dict[str, Any]],
+        flush_seconds: float = 0.5,
+        deadline_seconds: float | None = None,
+    ):
+        self.store = store
+        self._workflow = workflow
+        self._public_routing = public_routing
+        self.flush_seconds = flush_seconds
+        self.deadline_seconds = deadline_seconds
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+        self.stats = {"submitted": 0, "succeeded": 0, "failed": 0, "cancelled": 0}
+
+    async def submit(self, prompt: str, correlation_id: str, timings: bool = False) -> dict[str, Any]:
+        """Legt einen Job an und startet ihn im Hintergrund.
+
+        Raises:
+            JobStoreFull: keine Kapazität für weitere Jobs
+        """
+        now = time.time()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "status": "queued",
+            "correlation_id": correlation_id,
+            "prompt": prompt,
+            "created_at": now,
+            "updated_at": now,
+            "routing": None,
+            "agents": {},
+            "partial": "",
+            "result": None,
+            "error": None,
+            "cancel_requested": False,
+        }
+        await self.store.create(job)
+        self.stats["submitted"] += 1
+        task = asyncio.ensure_future(self._run(job["job_id"], prompt, correlation_id, timings))
+        self._tasks[job["job_id"]] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job["job_id"], None))
+        return job
+
+    async def cancel(self, job_id: str) -> dict[str, Any] | None:
+        """Bricht einen Job ab (no-op für bereits abgeschlossene Jobs)."""
+        job = await self.store.get(job_id)
+        if job is None or job["status"] in FINAL_STATES:
+            return job
+        task = self._tasks.get(job_id)
+        if task is None:
+            # Läuft in einem anderen Worker: dort über cancel_requested bemerkt
+            return await self.store.update(job_id, {"cancel_requested": True})
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return await self.store.get(job_id)
+
+    async def _run(self, job_id: str, prompt: str, correlation_id: str, timings: bool) -> None:
+        from admission import AdmissionRejected
+
+        await self.store.update(job_id, {"status": "running"})
+        agents: dict[str, str] = {}
+        last_flush = 0.0
+        try:
+            with start_trace(correlation_id, name="mfa.job") as trace, deadline_scope(self.deadline_seconds):
+                async for event in self._workflow(prompt):
+                    if event.get("done"):
+                        result = {
+                            "output_text": event["response"],
+                            "workflow": "mfa",
+                            "agents_used": event["agents_used"],
+                            "routing": self._public_routing(event["routing"]),
+                        }
+                        if timings:
+                            result["timings"] = trace.timings()
+                        await self.store.update(job_id, {
+                            "status": "succeeded",
+                            "partial": event["response"],
+                            "result": result,
+                        })
+                        self.stats["succeeded"] += 1
+                        return
+                    fields: dict[str, Any] = {}
+                    if event.get("event") == "routing":
+                        fields["routing"] = event["routing"]
+                    elif event.get("event") == "agent":
+                        agents[event["agent"]] = event["status"]
+                        fields["agents"] = dict(agents)
+                    elif "delta" in event:
+                        if time.monotonic() - last_flush < self.flush_seconds:
+                            continue
+                        fields["partial"] = event["partial"]
+                    last_flush = time.monotonic()
+                    job = await self.store.update(job_id, fields)
+                    if job is None or job.get("cancel_requested"):
+                        raise asyncio.CancelledError()
+            raise RuntimeError("MFA workflow ended without a result")
+        except asyncio.CancelledError:
+            await self.store.update(job_id, {"status": "cancelled", "agents": agents})
+            self.stats["cancelled"] += 1
+            raise
+        except AdmissionRejected as e:
+            await self.store.update(job_id, {"status": "failed", "error": e.reason, "retry_after": e.retry_after})
+            self.stats["failed"] += 1
+        except Exception as e:
+            logger.exception("MFA job %s failed (correlation_id=%s)", job_id, correlation_id)
+            await self.store.update(job_id, {"status": "failed", "error": str(e)})
+            self.stats["failed"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        store_stats = self.store.snapshot() if hasattr(self.store, "snapshot") else {}
+        return {**self.stats, "running": len(self._tasks), "store": store_stats}
+
+
+def public_job(job: dict[str, Any]) -> dict[str, Any]:
+    """Job-Felder, die an Clients gehen (ohne Prompt und interne Flags)."""
+    return {k: v for k, v in job.items() if k not in ("prompt", "cancel_requested")}
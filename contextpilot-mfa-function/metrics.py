@@ -0,0 +1,247 @@
+"""Prometheus-Metriken (Text-Format 0.0.4) für den MFA-Workflow.
+
+healthz sagt nur "lebt"; für Sizing und Tuning fehlen Last, Latenz und
+Fehler. Die Metriken hier sind bewusst minimal (kein prometheus_client):
+
+- Counter/Gauge/Histogram mit festen Label-Namen; jede Label-Kombination
+  ist eine Serie (dict: Label-Tupel → Wert bzw. Bucket-Zähler).
+- Ohne Locks: alle Aktualisierungen laufen auf dem Event-Loop des Workers
+  (Workflow und /api/metrics sind async), ein observe() kostet ein bisect
+  und drei Additionen.
+- Sättigungswerte (Admission-Queue, offene Breaker, ...) werden erst beim
+  Rendern über Callbacks gelesen – kein Aufwand pro Request.
+"""
+
+from __future__ import annotations
+
+import abc
+import bisect
+import math
+from typing import Callable, Iterable
+
+# Sekunden; deckt Fast-Path (ms) bis Proxy-Timeout (200s) ab
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 90.0, 120.0, 190.0)
+
+Labels = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Labels, values: Labels, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, label_names: Labels = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+
+    def _header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    @abc.abstractmethod
+    def render(self) -> list[str]:
+        """Zeilen im Text-Format (HELP, TYPE, Samples)."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Labels = ()):
+        super().__init__(name, help_text, label_names)
+        self._values: dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in list(self._values.items())
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Labels = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Pro Serie: Zähler je Bucket (nicht kumulativ, letzter = +Inf), dann Summe
+        self._series: dict[Labels, list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series.setdefault(labels, [0.0] * (len(self.buckets) + 2))
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def render(self) -> list[str]:
+        lines = self._header()
+        for labels, series in list(self._series.items()):
+            cumulative = 0.0
+            bounds = [*self.buckets, math.inf]
+            for bound, hits in zip(bounds, series[:-1]):
+                cumulative += hits
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {_format_value(cumulative)}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{label_text} {_format_value(cumulative)}")
+        return lines
+
+
+class _CallbackGauge(_Metric):
+    """Gauge, deren Werte erst beim Rendern gelesen werden (Label-Tupel → Wert)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, label_names: Labels, collect: Callable[[], dict[Labels, float]]):
+        super().__init__(name, help_text, label_names)
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        return self._header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+            for labels, value in self.collect().items()
+        ]
+
+
+class MetricsRegistry:
+    """Sammelt Metriken in Registrierungs-Reihenfolge und rendert sie als Text."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def _add(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Labels = ()) -> Counter:
+        return self._add(Counter(name, help_text, label_names))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, label_names: Labels = ()) -> Gauge:
+        return self._add(Gauge(name, help_text, label_names))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Labels = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._add(Histogram(name, help_text, label_names, buckets))  # type: ignore[return-value]
+
+    def gauge_callback(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], dict[Labels, float]],
+        label_names: Labels = (),
+    ) -> None:
+        self._add(_CallbackGauge(name, help_text, label_names, collect))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as e:  # ein defekter Callback soll den Scrape nicht verhindern
+                lines.append(f"# {metric.name} unavailable: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
+
+
+class MfaMetrics:
+    """Die Metriken des MFA-Workflows (Requests, Agents, Tokens)."""
+
+    def __init__(self, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.registry = MetricsRegistry()
+        registry = self.registry
+        self.requests = registry.counter(
+            "mfa_requests_total", "MFA workflow requests by route type and outcome", ("route", "status")
+        )
+        self.request_seconds = registry.histogram(
+            "mfa_request_duration_seconds", "End-to-end MFA workflow latency", ("route",), buckets
+        )
+        self.requests_in_flight = registry.gauge("mfa_requests_in_flight", "MFA workflow requests currently running")
+        self.cache_hits = registry.counter(
+            "mfa_response_cache_hits_total", "Requests answered from the response cache", ("route",)
+        )
+        self.coalesced = registry.counter(
+            "mfa_requests_coalesced_total", "Requests that shared an identical in-flight workflow", ("route",)
+        )
+        self.agent_calls = registry.counter(
+            "mfa_agent_calls_total", "Foundry agent calls by agent and outcome", ("agent", "status")
+        )
+        self.agent_seconds = registry.histogram(
+            "mfa_agent_call_duration_seconds", "Latency of a single agent.run / run_stream", ("agent",), buckets
+        )
+        self.agent_in_flight = registry.gauge(
+            "mfa_agent_calls_in_flight", "Foundry agent calls currently running", ("agent",)
+        )
+        self.tokens = registry.counter(
+            "mfa_agent_tokens_total",
+            "Agent token usage (reported by the service, otherwise estimated at ~4 chars/token)",
+            ("agent", "kind"),
+        )
+
+    def request_finished(
+        self,
+        route: str,
+        status: str,
+        seconds: float | None,
+        cached: bool = False,
+        coalesced: bool = False,
+    ) -> None:
+        self.requests.inc(route, status)
+        if seconds is not None:
+            self.request_seconds.observe(seconds, route)
+        if cached:
+            self.cache_hits.inc(route)
+        if coalesced:
+            self.coalesced.inc(route)
+
+    def agent_finished(self, agent: str, status: str, seconds: float, prompt_tokens: int, completion_tokens: int) -> None:
+        """status: "ok" | "error" | "cancelled" (verlorener Hedge, Deadline, Client weg)."""
+        self.agent_calls.inc(agent, status)
+        self.agent_seconds.observe(seconds, agent)
+        self.tokens.inc(agent, "prompt", amount=prompt_tokens)
+        if completion_tokens:
+            self.tokens.inc(agent, "completion", amount=completion_tokens)
+
+    def render(self) -> str:
+        return self.registry.render()
@@ -1,13 +1,36 @@
-"""CONTEXTPILOT MFA Workflow v2.5 (MAF, Python)
+"""CONTEXTPILOT MFA Workflow v2.7 (MAF, Python)
 
-Aktueller Stand: Sequenzielle Agent-Orchestrierung mit Triage-Routing
-Endziel: Parallele Ausführung via MAF WorkflowBuilder (Fan-Out/Fan-In)
+Aktueller Stand: Triage-Routing, danach Fan-Out/Fan-In der Agents (asyncio)
 
 Pattern:
 - Triage entscheidet: direct, web, context, oder Kombinationen
 - "direct": AURAContextPilotQuick antwortet (schnelle, einfache Fragen)
-- Synthesizer NUR wenn BEIDE Agents (web + context) genutzt wurden
-- Einzelner Agent: Antwort direkt zurückgeben
+- Web + Context laufen parallel, jeder Branch mit eigenem Timeout
+- Synthesizer NUR wenn BEIDE Agents (web + context) erfolgreich waren
+- Einzelner Agent (oder ein Branch fehlgeschlagen): Antwort direkt zurückgeben
+- iter_mfa_workflow liefert Events (Routing, Agent-Fortschritt, Tokens) für /mfa/stream
+- Response-Cache (normalisierter Prompt + Route) vor dem gesamten Ablauf
+- Fast-Path-Router klassifiziert eindeutige Prompts lokal (ohne Triage-Aufruf)
+- Optional spekulativ: wahrscheinliche Branches starten parallel zur Triage
+- Admission Control: Token-Bucket (TPM) mit Priorität direct > Einzel-Agent > Synthese
+- Single-Flight: gleichzeitige identische Prompts teilen sich einen Workflow
+- Job-Modus: lange Läufe als Hintergrund-Job (Submit/Poll/Cancel, siehe jobs.py)
+- Batch: mehrere Prompts mit gemeinsamer Triage und geteiltem Concurrency-Limit
+- Synthese-Prompt: Antworten dedupliziert und auf ein Token-Budget gekürzt (compaction.py)
+- Eingangs-Prompt: Transkript-Kontext bereinigt und gekappt (prompt_condenser.py);
+  Triage bekommt eine Kurzfassung, die Agents den verdichteten Kontext
+- Sessions (optional): Folgefragen bekommen den Verlauf, Synthese frühere Ergebnisse
+- Agents nach der Triage als deklarativer Graph (agent_graph.py, MFA_AGENT_GRAPH):
+  bereite Knoten parallel (begrenzt), Timeout pro Knoten, Fan-In-Bedingungen
+- End-to-End-Deadline pro Request; Agent-Aufrufe nach p95 gehedged (hedging.py)
+- Circuit Breaker pro Agent: offene Breaker degradieren das Routing sofort
+  (ohne Triage, Quick → Context, nur Context-Agent, Synthese überspringen)
+- Optional: Ähnlichkeits-Cache (Embeddings) vor dem Context-Agent (semantic_cache.py)
+- Prometheus-Metriken: Requests pro Route, Latenzen (Agent, End-to-End),
+  In-Flight, Token-Verbrauch, Sättigung (metrics.py, /api/metrics)
+- Optional: anonymisierter Traffic-Mitschnitt von /api/mfa für Replays (traffic_capture.py)
+- Optional: Prefetch aus dem laufenden Transkript – wahrscheinliche Markierungen
+  werden mit niedriger Priorität und festem Token-Budget vorab beantwortet (prefetch.py)
 
 Agents:
 - AURATriage: Routing-Entscheidung
@@ -17,12 +40,33 @@ Agents:
 - AURAContextPilotResponseSynthesizer: Zusammenführung bei Mehrfach-Agents
 """
 
+import asyncio
+import contextvars
+import copy
 import json
+import logging
 import os
-from typing import Any
+import time
+from typing import Any, AsyncIterator
 
-from agent_framework.azure import AzureAIClient
-from azure.identity.aio import DefaultAzureCredential
+from admission import AdmissionRejected, TokenBucketScheduler, estimate_tokens
+from agent_graph import AgentGraph, GraphNode
+from agent_registry import AgentRegistry
+from circuit_breaker import BreakerRegistry
+from compaction import SynthesisCompactor
+from env import env_flag
+from fast_router import FastRouter
+from hedging import HedgePolicy, budget
+from jobs import InMemoryJobStore, JobManager
+from metrics import MfaMetrics
+from prefetch import TranscriptPrefetcher
+from prompt_condenser import PromptCondenser
+from response_cache import InMemoryBackend, ResponseCache, normalize_prompt, route_of
+from session_store import SessionStore
+from singleflight import SingleFlight
+from tracing import span
+from speculation import SpeculationPolicy
+from traffic_capture import TrafficCapture
 
 AZURE_AI_PROJECT_ENDPOINT = os.environ["AZURE_AI_PROJECT_ENDPOINT"]
 AZURE_AI_MODEL_DEPLOYMENT_NAME = os.environ["AZURE_AI_MODEL_DEPLOYMENT_NAME"]
@@ -34,6 +78,329 @@ AURA_WEB_AGENT_NAME = os.environ["AURA_WEB_AGENT_NAME"]
 AURA_CONTEXT_AGENT_NAME = os.environ["AURA_CONTEXT_AGENT_NAME"]
 AURA_SYNTHESIZER_AGENT_NAME = os.environ["AURA_SYNTHESIZER_AGENT_NAME"]
 
+# Timeout pro Fan-Out-Branch (web/context). Muss unter MFA_PROXY_TIMEOUT_MS (200s) liegen.
+AURA_AGENT_TIMEOUT_SECONDS = float(os.environ.get("AURA_AGENT_TIMEOUT_SECONDS", "90"))
+
+# Agent-Handles bleiben pro Worker warm; nach TTL neu auflösen (neue Agent-Versionen)
+AURA_AGENT_REGISTRY_TTL_SECONDS = float(os.environ.get("AURA_AGENT_REGISTRY_TTL_SECONDS", "900"))
+
+# Response-Cache: TTL pro Route (0 = Route nicht cachen)
+MFA_CACHE_ENABLED = env_flag("MFA_CACHE_ENABLED", True)
+MFA_CACHE_MAX_ENTRIES = int(os.environ.get("MFA_CACHE_MAX_ENTRIES", "512"))
+MFA_CACHE_TTL_SECONDS = {
+    "direct": float(os.environ.get("MFA_CACHE_TTL_DIRECT_SECONDS", "86400")),
+    "context": float(os.environ.get("MFA_CACHE_TTL_CONTEXT_SECONDS", "21600")),
+    "web": float(os.environ.get("MFA_CACHE_TTL_WEB_SECONDS", "300")),
+    "synthesis": float(os.environ.get("MFA_CACHE_TTL_SYNTHESIS_SECONDS", "300")),
+}
+
+# Fast-Path-Router: eindeutige Prompts ohne AURATriage-Aufruf routen
+MFA_FAST_ROUTER_ENABLED = env_flag("MFA_FAST_ROUTER_ENABLED", True)
+MFA_FAST_ROUTER_RULES = os.environ.get("MFA_FAST_ROUTER_RULES") or None
+MFA_FAST_ROUTER_THRESHOLD = float(os.environ.get("MFA_FAST_ROUTER_THRESHOLD", "0.6"))
+MFA_FAST_ROUTER_INTERNAL_TERMS = [
+    term.strip() for term in os.environ.get("MFA_FAST_ROUTER_INTERNAL_TERMS", "").split(",") if term.strip()
+]
+
+# Spekulative Ausführung (opt-in): Budget für verschwendete Aufrufe pro Deployment
+MFA_SPECULATIVE_ENABLED = env_flag("MFA_SPECULATIVE_ENABLED", False)
+MFA_SPECULATIVE_DEFAULT_BRANCHES = tuple(
+    branch.strip() for branch in os.environ.get("MFA_SPECULATIVE_DEFAULT_BRANCHES", "context").split(",") if branch.strip()
+)
+MFA_SPECULATIVE_MIN_PROBABILITY = float(os.environ.get("MFA_SPECULATIVE_MIN_PROBABILITY", "0.6"))
+MFA_SPECULATIVE_MAX_WASTED_PER_MINUTE = int(os.environ.get("MFA_SPECULATIVE_MAX_WASTED_PER_MINUTE", "5"))
+
+# Admission Control: Budget des Foundry-Deployments (0 = aus)
+MFA_TPM_LIMIT = int(os.environ.get("MFA_TPM_LIMIT", "50000"))
+MFA_TOKENS_PER_AGENT_CALL = int(os.environ.get("MFA_TOKENS_PER_AGENT_CALL", "1500"))
+MFA_ADMISSION_MAX_QUEUE_SECONDS = float(os.environ.get("MFA_ADMISSION_MAX_QUEUE_SECONDS", "20"))
+MFA_ADMISSION_MAX_QUEUE_LENGTH = int(os.environ.get("MFA_ADMISSION_MAX_QUEUE_LENGTH", "50"))
+
+# Single-Flight: identische gleichzeitige Prompts nur einmal ausführen
+MFA_COALESCE_ENABLED = env_flag("MFA_COALESCE_ENABLED", True)
+
+# Job-Modus: begrenzter In-Memory-Store; abgeschlossene Jobs verfallen nach TTL;
+# Deadline pro Job (kein HTTP-Timeout, daher länger als MFA_DEFAULT_DEADLINE_SECONDS)
+MFA_JOB_MAX_JOBS = int(os.environ.get("MFA_JOB_MAX_JOBS", "200"))
+MFA_JOB_TTL_SECONDS = float(os.environ.get("MFA_JOB_TTL_SECONDS", "900"))
+MFA_JOB_PARTIAL_FLUSH_SECONDS = float(os.environ.get("MFA_JOB_PARTIAL_FLUSH_SECONDS", "0.5"))
+MFA_JOB_DEADLINE_SECONDS = float(os.environ.get("MFA_JOB_DEADLINE_SECONDS", "600"))
+
+# Batch: max. Prompts pro Request, max. gleichzeitige Agent-Aufrufe pro Batch
+MFA_BATCH_MAX_PROMPTS = int(os.environ.get("MFA_BATCH_MAX_PROMPTS", "20"))
+MFA_BATCH_CONCURRENCY = int(os.environ.get("MFA_BATCH_CONCURRENCY", "4"))
+
+# Synthese-Prompt: Token-Budget pro Agent-Antwort (0 = nur deduplizieren, nicht kürzen)
+MFA_SYNTHESIS_COMPACTION_ENABLED = env_flag("MFA_SYNTHESIS_COMPACTION_ENABLED", True)
+MFA_SYNTHESIS_TOKEN_BUDGET = int(os.environ.get("MFA_SYNTHESIS_TOKEN_BUDGET", "1500"))
+
+# Eingangs-Prompt: Transkript-Kontext verdichten (Budget für Agents bzw. Triage, 0 = nur bereinigen);
+# Prompts unter MIN_TOKENS bleiben unverändert
+MFA_CONDENSER_ENABLED = env_flag("MFA_CONDENSER_ENABLED", True)
+MFA_CONDENSER_TOKEN_BUDGET = int(os.environ.get("MFA_CONDENSER_TOKEN_BUDGET", "1200"))
+MFA_CONDENSER_TRIAGE_TOKENS = int(os.environ.get("MFA_CONDENSER_TRIAGE_TOKENS", "250"))
+MFA_CONDENSER_MIN_TOKENS = int(os.environ.get("MFA_CONDENSER_MIN_TOKENS", "300"))
+
+# Sessions für Folgefragen: Eviction nach Inaktivität und geschätztem Speicher
+MFA_SESSION_ENABLED = env_flag("MFA_SESSION_ENABLED", True)
+MFA_SESSION_MAX_SESSIONS = int(os.environ.get("MFA_SESSION_MAX_SESSIONS", "500"))
+MFA_SESSION_MAX_TURNS = int(os.environ.get("MFA_SESSION_MAX_TURNS", "10"))
+MFA_SESSION_TTL_SECONDS = float(os.environ.get("MFA_SESSION_TTL_SECONDS", "7200"))
+MFA_SESSION_MAX_BYTES = int(os.environ.get("MFA_SESSION_MAX_BYTES", str(32 * 1024 * 1024)))
+MFA_SESSION_CONTEXT_TOKENS = int(os.environ.get("MFA_SESSION_CONTEXT_TOKENS", "800"))
+
+# Agent-Graph: JSON-Datei mit Knoten/Kanten (Default: web/context → Synthesizer)
+MFA_AGENT_GRAPH = os.environ.get("MFA_AGENT_GRAPH") or None
+MFA_GRAPH_MAX_PARALLEL = int(os.environ.get("MFA_GRAPH_MAX_PARALLEL", "4"))
+
+# Deadline: Default-Budget pro Request (unter dem 200s-Timeout des Proxys),
+# Anteil des Restbudgets für Triage bzw. Agents, deren Ausgabe weiterverarbeitet wird
+MFA_DEFAULT_DEADLINE_SECONDS = float(os.environ.get("MFA_DEFAULT_DEADLINE_SECONDS", "190"))
+MFA_DEADLINE_TRIAGE_SHARE = float(os.environ.get("MFA_DEADLINE_TRIAGE_SHARE", "0.25"))
+MFA_DEADLINE_BRANCH_SHARE = float(os.environ.get("MFA_DEADLINE_BRANCH_SHARE", "0.6"))
+
+# Hedging: zweiter Aufruf nach dem p95 des Agents (optional auf anderem Deployment)
+MFA_HEDGE_ENABLED = env_flag("MFA_HEDGE_ENABLED", False)
+MFA_HEDGE_PERCENTILE = float(os.environ.get("MFA_HEDGE_PERCENTILE", "0.95"))
+MFA_HEDGE_MIN_SAMPLES = int(os.environ.get("MFA_HEDGE_MIN_SAMPLES", "20"))
+MFA_HEDGE_MAX_RATIO = float(os.environ.get("MFA_HEDGE_MAX_RATIO", "0.1"))
+MFA_HEDGE_DEPLOYMENT = os.environ.get("MFA_HEDGE_DEPLOYMENT") or None
+
+# Circuit Breaker pro Agent (Fehlerrate bzw. Anteil langsamer Aufrufe im Zeitfenster)
+MFA_BREAKER_ENABLED = env_flag("MFA_BREAKER_ENABLED", True)
+MFA_BREAKER_FAILURE_RATE = float(os.environ.get("MFA_BREAKER_FAILURE_RATE", "0.5"))
+MFA_BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("MFA_BREAKER_SLOW_CALL_SECONDS", "60"))
+MFA_BREAKER_SLOW_CALL_RATE = float(os.environ.get("MFA_BREAKER_SLOW_CALL_RATE", "0.5"))
+MFA_BREAKER_MIN_CALLS = int(os.environ.get("MFA_BREAKER_MIN_CALLS", "5"))
+MFA_BREAKER_WINDOW_SECONDS = float(os.environ.get("MFA_BREAKER_WINDOW_SECONDS", "60"))
+MFA_BREAKER_COOLDOWN_SECONDS = float(os.environ.get("MFA_BREAKER_COOLDOWN_SECONDS", "30"))
+
+# Prometheus-Metriken (/api/metrics); billig genug, um immer an zu bleiben
+MFA_METRICS_ENABLED = env_flag("MFA_METRICS_ENABLED", True)
+
+# Traffic-Mitschnitt (opt-in): JSONL-Datei, Salt für Prompt-Hashes, Sampling-Anteil
+MFA_CAPTURE_PATH = os.environ.get("MFA_CAPTURE_PATH") or None
+MFA_CAPTURE_SALT = os.environ.get("MFA_CAPTURE_SALT", "")
+MFA_CAPTURE_SAMPLE_RATE = float(os.environ.get("MFA_CAPTURE_SAMPLE_RATE", "1.0"))
+
+# Ähnlichkeits-Cache für Context-Antworten (opt-in; PATH leer = nur im Speicher).
+# Braucht MFA_SEMANTIC_EMBEDDER ("modul:funktion", "hashing" nur für Tests), sonst bleibt er aus
+MFA_SEMANTIC_CACHE_ENABLED = env_flag("MFA_SEMANTIC_CACHE_ENABLED", False)
+MFA_SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("MFA_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+MFA_SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("MFA_SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+MFA_SEMANTIC_CACHE_TTL_SECONDS = float(os.environ.get("MFA_SEMANTIC_CACHE_TTL_SECONDS", "86400"))
+MFA_SEMANTIC_CACHE_PATH = os.environ.get("MFA_SEMANTIC_CACHE_PATH") or None
+MFA_SEMANTIC_EMBEDDER = os.environ.get("MFA_SEMANTIC_EMBEDDER") or None
+MFA_SEMANTIC_EMBEDDING_DIM = int(os.environ.get("MFA_SEMANTIC_EMBEDDING_DIM", "384"))
+
+# Prefetch aus dem Transkript (opt-in): Token-Budget pro Fenster, Kandidaten-Auswahl,
+# max. gleichzeitige Prefetches; Treffer zählen nur innerhalb TTL_SECONDS
+MFA_PREFETCH_ENABLED = env_flag("MFA_PREFETCH_ENABLED", False)
+MFA_PREFETCH_TOKEN_BUDGET = int(os.environ.get("MFA_PREFETCH_TOKEN_BUDGET", "20000"))
+MFA_PREFETCH_BUDGET_WINDOW_SECONDS = float(os.environ.get("MFA_PREFETCH_BUDGET_WINDOW_SECONDS", "3600"))
+MFA_PREFETCH_COMPLETION_TOKENS = int(os.environ.get("MFA_PREFETCH_COMPLETION_TOKENS", "400"))
+MFA_PREFETCH_WINDOW_SEGMENTS = int(os.environ.get("MFA_PREFETCH_WINDOW_SEGMENTS", "40"))
+MFA_PREFETCH_MIN_MENTIONS = int(os.environ.get("MFA_PREFETCH_MIN_MENTIONS", "2"))
+MFA_PREFETCH_MAX_PER_INGEST = int(os.environ.get("MFA_PREFETCH_MAX_PER_INGEST", "3"))
+MFA_PREFETCH_CONCURRENCY = int(os.environ.get("MFA_PREFETCH_CONCURRENCY", "1"))
+MFA_PREFETCH_TTL_SECONDS = float(os.environ.get("MFA_PREFETCH_TTL_SECONDS", "3600"))
+
+logger = logging.getLogger(__name__)
+
+# Gemeinsames Limit für Agent-Aufrufe (gesetzt pro Batch, von Tasks geerbt)
+_agent_slots: contextvars.ContextVar[asyncio.Semaphore | None] = contextvars.ContextVar(
+    "mfa_agent_slots", default=None
+)
+
+agent_registry = AgentRegistry(
+    project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
+    model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
+    ttl_seconds=AURA_AGENT_REGISTRY_TTL_SECONDS,
+)
+
+response_cache: ResponseCache | None = (
+    ResponseCache(InMemoryBackend(MFA_CACHE_MAX_ENTRIES), MFA_CACHE_TTL_SECONDS)
+    if MFA_CACHE_ENABLED
+    else None
+)
+
+fast_router: FastRouter | None = (
+    FastRouter.from_config(MFA_FAST_ROUTER_RULES, MFA_FAST_ROUTER_INTERNAL_TERMS, MFA_FAST_ROUTER_THRESHOLD)
+    if MFA_FAST_ROUTER_ENABLED
+    else None
+)
+
+speculation: SpeculationPolicy | None = (
+    SpeculationPolicy(
+        deployment=AZURE_AI_MODEL_DEPLOYMENT_NAME,
+        default_branches=MFA_SPECULATIVE_DEFAULT_BRANCHES,
+        min_probability=MFA_SPECULATIVE_MIN_PROBABILITY,
+        max_wasted_per_minute=MFA_SPECULATIVE_MAX_WASTED_PER_MINUTE,
+    )
+    if MFA_SPECULATIVE_ENABLED
+    else None
+)
+
+scheduler: TokenBucketScheduler | None = (
+    TokenBucketScheduler(
+        tokens_per_minute=MFA_TPM_LIMIT,
+        tokens_per_call=MFA_TOKENS_PER_AGENT_CALL,
+        max_queue_seconds=MFA_ADMISSION_MAX_QUEUE_SECONDS,
+        max_queue_length=MFA_ADMISSION_MAX_QUEUE_LENGTH,
+    )
+    if MFA_TPM_LIMIT > 0
+    else None
+)
+
+inflight: SingleFlight[dict[str, Any]] | None = SingleFlight() if MFA_COALESCE_ENABLED else None
+
+compactor: SynthesisCompactor | None = (
+    SynthesisCompactor(token_budget=MFA_SYNTHESIS_TOKEN_BUDGET) if MFA_SYNTHESIS_COMPACTION_ENABLED else None
+)
+
+condenser: PromptCondenser | None = (
+    PromptCondenser(
+        token_budget=MFA_CONDENSER_TOKEN_BUDGET,
+        triage_tokens=MFA_CONDENSER_TRIAGE_TOKENS,
+        min_tokens=MFA_CONDENSER_MIN_TOKENS,
+    )
+    if MFA_CONDENSER_ENABLED
+    else None
+)
+
+sessions: SessionStore | None = (
+    SessionStore(
+        max_sessions=MFA_SESSION_MAX_SESSIONS,
+        max_turns=MFA_SESSION_MAX_TURNS,
+        ttl_seconds=MFA_SESSION_TTL_SECONDS,
+        max_bytes=MFA_SESSION_MAX_BYTES,
+        context_tokens=MFA_SESSION_CONTEXT_TOKENS,
+    )
+    if MFA_SESSION_ENABLED
+    else None
+)
+
+hedger: HedgePolicy | None = (
+    HedgePolicy(
+        percentile=MFA_HEDGE_PERCENTILE,
+        min_samples=MFA_HEDGE_MIN_SAMPLES,
+        max_hedge_ratio=MFA_HEDGE_MAX_RATIO,
+        alternate_deployment=MFA_HEDGE_DEPLOYMENT,
+    )
+    if MFA_HEDGE_ENABLED
+    else None
+)
+
+breakers: BreakerRegistry | None = (
+    BreakerRegistry(
+        failure_rate=MFA_BREAKER_FAILURE_RATE,
+        slow_call_seconds=MFA_BREAKER_SLOW_CALL_SECONDS,
+        slow_call_rate=MFA_BREAKER_SLOW_CALL_RATE,
+        min_calls=MFA_BREAKER_MIN_CALLS,
+        window_seconds=MFA_BREAKER_WINDOW_SECONDS,
+        cooldown_seconds=MFA_BREAKER_COOLDOWN_SECONDS,
+    )
+    if MFA_BREAKER_ENABLED
+    else None
+)
+
+if MFA_SEMANTIC_CACHE_ENABLED and not MFA_SEMANTIC_EMBEDDER:
+    logger.warning("MFA_SEMANTIC_CACHE_ENABLED without MFA_SEMANTIC_EMBEDDER - semantic cache disabled")
+    MFA_SEMANTIC_CACHE_ENABLED = False
+
+if MFA_SEMANTIC_CACHE_ENABLED:
+    # NumPy nur laden, wenn der Cache aktiv ist (Cold Start)
+    from semantic_cache import SemanticCache, load_embedder
+
+semantic_cache: "SemanticCache | None" = (
+    SemanticCache(
+        load_embedder(MFA_SEMANTIC_EMBEDDER, MFA_SEMANTIC_EMBEDDING_DIM),
+        dim=MFA_SEMANTIC_EMBEDDING_DIM,
+        capacity=MFA_SEMANTIC_CACHE_MAX_ENTRIES,
+        threshold=MFA_SEMANTIC_CACHE_THRESHOLD,
+        ttl_seconds=MFA_SEMANTIC_CACHE_TTL_SECONDS,
+        path=MFA_SEMANTIC_CACHE_PATH,
+    )
+    if MFA_SEMANTIC_CACHE_ENABLED
+    else None
+)
+
+metrics: MfaMetrics | None = MfaMetrics() if MFA_METRICS_ENABLED else None
+
+# Prefetch schreibt in den Response-Cache – ohne Cache nutzlos
+prefetcher: TranscriptPrefetcher | None = (
+    TranscriptPrefetcher(
+        token_budget=MFA_PREFETCH_TOKEN_BUDGET,
+        budget_window_seconds=MFA_PREFETCH_BUDGET_WINDOW_SECONDS,
+        completion_tokens=MFA_PREFETCH_COMPLETION_TOKENS,
+        window_segments=MFA_PREFETCH_WINDOW_SEGMENTS,
+        min_mentions=MFA_PREFETCH_MIN_MENTIONS,
+        max_per_ingest=MFA_PREFETCH_MAX_PER_INGEST,
+        ttl_seconds=MFA_PREFETCH_TTL_SECONDS,
+    )
+    if MFA_PREFETCH_ENABLED and response_cache is not None
+    else None
+)
+_prefetch_slots = asyncio.Semaphore(MFA_PREFETCH_CONCURRENCY)
+_prefetch_tasks: set[asyncio.Task[None]] = set()
+
+capture: TrafficCapture | None = (
+    TrafficCapture(MFA_CAPTURE_PATH, salt=MFA_CAPTURE_SALT, sample_rate=MFA_CAPTURE_SAMPLE_RATE)
+    if MFA_CAPTURE_PATH
+    else None
+)
+
+agent_graph = AgentGraph.from_config(MFA_AGENT_GRAPH, AURA_AGENT_TIMEOUT_SECONDS, MFA_GRAPH_MAX_PARALLEL)
+
+if metrics is not None:
+    # Sättigung: erst beim Scrape gelesen
+    if scheduler is not None:
+        metrics.registry.gauge_callback(
+            "mfa_admission_queue_length",
+            "Requests waiting for TPM budget",
+            lambda: {(): scheduler.snapshot()["queue_length"]},
+        )
+        metrics.registry.gauge_callback(
+            "mfa_admission_tokens_available",
+            "Tokens left in the admission bucket",
+            lambda: {(): scheduler.snapshot()["tokens_available"]},
+        )
+    if inflight is not None:
+        metrics.registry.gauge_callback(
+            "mfa_singleflight_in_flight",
+            "Distinct prompts currently executing (coalescing leaders)",
+            lambda: {(): inflight.snapshot()["in_flight"]},
+        )
+    if prefetcher is not None:
+        metrics.registry.gauge_callback(
+            "mfa_prefetch_tokens",
+            "Prefetch tokens: spent, later served (hit) and wasted (expired unused or failed)",
+            lambda: {
+                (kind,): prefetcher.stats[f"tokens_{kind}"] for kind in ("spent", "hit", "wasted")
+            },
+            ("kind",),
+        )
+        metrics.registry.gauge_callback(
+            "mfa_prefetch_hit_ratio",
+            "Completed prefetches later served to an /mfa request",
+            lambda: {(): prefetcher.snapshot()["hit_rate"]},
+        )
+    if breakers is not None:
+        metrics.registry.gauge_callback(
+            "mfa_circuit_open",
+            "1 while the agent's circuit breaker rejects calls",
+            lambda: {(agent,): int(state["state"] == "open") for agent, state in breakers.snapshot().items()},
+            ("agent",),
+        )
+
+job_manager = JobManager(
+    InMemoryJobStore(max_jobs=MFA_JOB_MAX_JOBS, ttl_seconds=MFA_JOB_TTL_SECONDS),
+    workflow=lambda prompt: iter_mfa_workflow(prompt, stream_tokens=True),
+    public_routing=lambda routing: public_routing(routing),
+    flush_seconds=MFA_JOB_PARTIAL_FLUSH_SECONDS,
+    deadline_seconds=MFA_JOB_DEADLINE_SECONDS,
+)
+
 
 def parse_triage_response(triage_text: str) -> dict[str, Any]:
     """Parse Triage JSON response mit Fallback auf neues Format."""
@@ -74,147 +441,914 @@ def parse_triage_response(triage_text: str) -> dict[str, Any]:
         }
 
 
-async def run_mfa_workflow(prompt: str) -> dict[str, Any]:
-    """Führt den MFA-Workflow aus (aktuell sequenziell, Endziel: parallel).
+async def _run_agent(agent_name: str, prompt: str, share: float = 1.0) -> str:
+    """Ruft einen Foundry-Agent über die prozessweite Registry auf und liefert den Text.
+
+    Mit Deadline bekommt der Aufruf share × Restbudget als Timeout; mit Hedging
+    geht nach dem p95 des Agents ein zweiter Aufruf raus (erstes Ergebnis gewinnt).
+    Ist der Breaker des Agents offen, schlägt der Aufruf sofort mit CircuitOpen fehl.
+    """
+    if breakers is None:
+        return await _deadline_call(agent_name, prompt, share)
+    breakers.check(agent_name)
+    started = time.perf_counter()
+    try:
+        text = await _deadline_call(agent_name, prompt, share)
+    except Exception as e:
+        breakers.record(agent_name, False, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+        raise
+    breakers.record(agent_name, True, time.perf_counter() - started)
+    return text
+
+
+async def _deadline_call(agent_name: str, prompt: str, share: float) -> str:
+    timeout = budget(share)
+    try:
+        if hedger is None:
+            return await asyncio.wait_for(_slotted_call(agent_name, prompt), timeout)
+        return await hedger.call(
+            agent_name, lambda deployment: _slotted_call(agent_name, prompt, deployment), timeout
+        )
+    except asyncio.TimeoutError:
+        if timeout is None:
+            raise
+        raise asyncio.TimeoutError(f"deadline budget of {timeout:.1f}s exceeded ({agent_name})") from None
+
+
+async def _slotted_call(agent_name: str, prompt: str, deployment: str | None = None) -> str:
+    slots = _agent_slots.get()
+    if slots is not None:
+        async with slots:
+            return await _call_agent(agent_name, prompt, deployment)
+    return await _call_agent(agent_name, prompt, deployment)
+
+
+async def _call_agent(agent_name: str, prompt: str, deployment: str | None = None) -> str:
+    async with agent_registry.lease(agent_name, deployment) as agent:
+        attributes = {"deployment": deployment} if deployment else {}
+        with span("agent.run", agent=agent_name, prompt_chars=len(prompt), **attributes):
+            if metrics is None:
+                return (await agent.run(prompt)).text
+            metrics.agent_in_flight.inc(agent_name)
+            started = time.perf_counter()
+            result, status = None, "error"
+            try:
+                result = await agent.run(prompt)
+                status = "ok"
+                return result.text
+            except asyncio.CancelledError:
+                status = "cancelled"  # z.B. verlorener Hedge oder Deadline
+                raise
+            finally:
+                metrics.agent_in_flight.dec(agent_name)
+                _record_agent_call(agent_name, status, time.perf_counter() - started, prompt, result)
+
+
+async def _stream_agent(agent_name: str, prompt: str) -> AsyncIterator[str]:
+    """Wie _run_agent, liefert die Antwort aber Token für Token (agent.run_stream)."""
+    slots = _agent_slots.get()
+    if slots is not None:
+        await slots.acquire()
+    if metrics is not None:
+        metrics.agent_in_flight.inc(agent_name)
+    started = time.perf_counter()
+    text, status = "", "error"
+    try:
+        async with agent_registry.lease(agent_name) as agent:
+            with span("agent.stream", agent=agent_name, prompt_chars=len(prompt)):
+                async for update in agent.run_stream(prompt):
+                    if update.text:
+                        text += update.text
+                        yield update.text
+        status = "ok"
+    except (asyncio.CancelledError, GeneratorExit):
+        status = "cancelled"
+        raise
+    finally:
+        if slots is not None:
+            slots.release()
+        if metrics is not None:
+            metrics.agent_in_flight.dec(agent_name)
+            _record_agent_call(agent_name, status, time.perf_counter() - started, prompt, text)
+
+
+def _record_agent_call(agent_name: str, status: str, seconds: float, prompt: str, result: Any) -> None:
+    """Latenz und Tokens eines Aufrufs (Usage des Dienstes, sonst geschätzt)."""
+    usage = getattr(result, "usage_details", None)
+    text = result if isinstance(result, str) else getattr(result, "text", None) or ""
+    prompt_tokens = getattr(usage, "input_token_count", None) or estimate_tokens(prompt)
+    completion_tokens = getattr(usage, "output_token_count", None) or (estimate_tokens(text) if text else 0)
+    metrics.agent_finished(agent_name, status, seconds, prompt_tokens, completion_tokens)
+
+
+async def invalidate_agents(agent_name: str | None = None) -> int:
+    """Verwirft gecachte Agent-Handles (alle, falls kein Name angegeben)."""
+    return await agent_registry.invalidate(agent_name)
+
+
+async def warm_agents() -> dict[str, dict[str, Any]]:
+    """Löst Credential und alle Agents vorab auf (Warm-up nach Cold Start)."""
+    names = [AURA_TRIAGE_AGENT_NAME, AURA_QUICK_AGENT_NAME]
+    names += [node.agent for node in agent_graph.nodes.values() if node.agent not in names]
+    return await agent_registry.warm(names)
+
+
+def prefetch_transcript(stream_id: str, segments: list[str]) -> dict[str, Any]:
+    """Nimmt Transkript-Segmente an und startet Prefetches im Hintergrund.
+
+    Kehrt sofort zurück; die Prefetches laufen mit niedrigster Admission-
+    Priorität und nur, solange das Prefetch-Budget reicht.
+    """
+    candidates = prefetcher.ingest(stream_id, segments)
+    scheduled = []
+    for candidate in candidates:
+        reservation = prefetcher.reserve(candidate)
+        if reservation is None:
+            continue
+        task = asyncio.create_task(_prefetch(candidate, reservation))
+        _prefetch_tasks.add(task)
+        task.add_done_callback(_prefetch_tasks.discard)
+        scheduled.append({"term": candidate["term"], "agent": candidate["kind"], "mentions": candidate["mentions"]})
+    return {"candidates": len(candidates), "scheduled": scheduled, "tokens_remaining": prefetcher.remaining()}
+
+
+async def _prefetch(candidate: dict[str, Any], reservation: list[float]) -> None:
+    """Ein Prefetch: Context- bzw. Quick-Agent direkt (ohne Triage), Ergebnis in die Caches."""
+    prompt = candidate["prompt"]
+    if candidate["kind"] == "context":
+        agent_name = AURA_CONTEXT_AGENT_NAME
+        routing = {"direct": False, "web": False, "context": True}
+    else:
+        agent_name = AURA_QUICK_AGENT_NAME
+        routing = {"direct": True, "web": False, "context": False}
+    routing.update(reasoning="Transcript prefetch", direct_response=None, prefetched=True)
+    route = route_of(routing)
+    
+    async with _prefetch_slots:
+        # Schon im Cache (z.B. echte Anfrage war schneller) → nichts zu tun; ohne Hit-Statistik
+        if await response_cache.backend.get(response_cache.key(prompt, route)) is not None:
+            prefetcher.released(candidate, reservation, "cached")
+            return
+        # Niedrige Priorität: nur bei leerer Admission-Queue und geschlossenem Breaker
+        busy = breakers is not None and breakers.is_open(agent_name)
+        if scheduler is not None and not busy:
+            busy = scheduler.snapshot()["queue_length"] > 0
+        if busy:
+            prefetcher.released(candidate, reservation, "busy")
+            return
+        charged = 0
+        if scheduler is not None:
+            try:
+                charged = await scheduler.admit(candidate["estimate"], "prefetch")
+            except AdmissionRejected:
+                prefetcher.released(candidate, reservation, "busy")
+                return
+        spent = 0
+        try:
+            response = await _run_agent(agent_name, prompt)
+            spent = estimate_tokens(prompt) + estimate_tokens(response)
+            await response_cache.store(prompt, {
+                "response": response,
+                "agents_used": [agent_name],
+                "routing": public_routing(routing),
+            })
+            if semantic_cache is not None and candidate["kind"] == "context":
+                await semantic_cache.store(prompt, response)
+        except Exception as e:
+            # Der Prompt ist beim Fehler in der Regel schon verarbeitet
+            spent = spent or estimate_tokens(prompt)
+            prefetcher.released(candidate, reservation, "failed", spent)
+            logger.info("Prefetch for '%s' failed: %s", candidate["term"], e)
+            return
+        finally:
+            if scheduler is not None:
+                scheduler.settle(charged, spent)
+        prefetcher.completed(candidate, reservation, spent)
+
+
+async def run_mfa_workflow(prompt: str, session_id: str | None = None) -> dict[str, Any]:
+    """Führt den MFA-Workflow aus (Triage, dann paralleler Fan-Out).
     
     Ablauf:
     1. Triage entscheidet Routing (direct/web/context)
     2. Bei "direct": Sofortige Antwort ohne weitere Agents
-    3. Bei einem Agent: Nur diesen aufrufen, Antwort direkt zurückgeben
-    4. Bei beiden Agents: Sequenziell aufrufen (TODO: parallel), dann Synthesizer
+    3. Agent-Graph: Web- und Context-Agent laufen parallel (je eigenes Timeout)
+    4. Beide erfolgreich → Synthesizer; nur einer erfolgreich → dessen Antwort
+       (Teilergebnis, markiert in routing["partial"] / routing["failed"])
     
     Returns:
         dict mit:
         - "response": Die finale Antwort
-        - "agents_used": Liste der verwendeten Agents
-        - "routing": Das Routing-Objekt von Triage
+        - "agents_used": Liste der erfolgreich verwendeten Agents
+        - "routing": Das Routing-Objekt von Triage (ggf. mit "partial"/"failed")
+    
+    Läuft bereits ein Workflow für denselben normalisierten Prompt, wird dessen
+    Ergebnis geteilt (routing["coalesced"] = True). Requests mit session_id
+    laufen immer einzeln (die Antwort hängt vom Session-Verlauf ab).
+    Metriken zählen jeden Aufrufer (auch Follower), nicht den geteilten Lauf.
+    """
+    if inflight is None or (session_id and sessions is not None):
+        return await _collect(iter_mfa_workflow(prompt, session_id=session_id))
+    return await _collect(_observed(_iter_coalesced(prompt)))
+
+
+async def _iter_coalesced(prompt: str) -> AsyncIterator[dict[str, Any]]:
+    """Wartet auf den geteilten Lauf und liefert ihn als eigenes done-Event."""
+    with span("singleflight") as wait_span:
+        result, coalesced = await inflight.do(
+            normalize_prompt(prompt), lambda: _collect(_iter_request(prompt, False, None))
+        )
+        if wait_span is not None:
+            wait_span.attributes["coalesced"] = coalesced
+    # Jeder Aufrufer bekommt eine eigene Kopie (Ergebnis wird geteilt)
+    result = copy.deepcopy(result)
+    if coalesced:
+        result["routing"]["coalesced"] = True
+    yield _done(result["response"], result["agents_used"], result["routing"])
+
+
+async def _collect(events: AsyncIterator[dict[str, Any]]) -> dict[str, Any]:
+    """Ergebnis des done-Events; der Generator läuft dabei bis zum Ende (Metriken im finally)."""
+    result = None
+    async for event in events:
+        if event.get("done"):
+            result = {
+                "response": event["response"],
+                "agents_used": event["agents_used"],
+                "routing": event["routing"],
+            }
+    if result is None:
+        raise RuntimeError("MFA workflow ended without a result")
+    return result
+
+
+async def run_mfa_batch(prompts: list[str]) -> list[dict[str, Any]]:
+    """Wie iter_mfa_batch, liefert die Ergebnisse aber in Eingabe-Reihenfolge."""
+    results: list[dict[str, Any]] = [{} for _ in prompts]
+    async for indices, outcome in iter_mfa_batch(prompts):
+        for index in indices:
+            results[index] = outcome
+    return results
+
+
+async def iter_mfa_batch(prompts: list[str]) -> AsyncIterator[tuple[list[int], dict[str, Any]]]:
+    """Führt mehrere Prompts als Batch aus; Ergebnisse in Fertigstellungs-Reihenfolge.
+    
+    - Identische Prompts (normalisiert) laufen nur einmal; Duplikate bekommen
+      dasselbe Ergebnis mit routing["coalesced"] = True
+    - Cache-Treffer und Fast-Path-Prompts brauchen keine Triage; alle übrigen
+      werden in EINEM AURATriage-Aufruf geroutet (Fallback: Einzel-Triage)
+    - Alle Agent-Aufrufe des Batches teilen sich MFA_BATCH_CONCURRENCY Slots
+    
+    Yields:
+        (indices, outcome): Positionen im Eingabe-Array und entweder
+        {"response", "agents_used", "routing"} oder {"error": ..., ["retry_after": ...]}
+    """
+    groups: dict[str, list[int]] = {}
+    for index, prompt in enumerate(prompts):
+        groups.setdefault(normalize_prompt(prompt), []).append(index)
+    unique = {key: prompts[indices[0]] for key, indices in groups.items()}
+    
+    routings: dict[str, dict[str, Any] | None] = {}
+    for key, prompt in unique.items():
+        if response_cache is not None:
+            cached = await response_cache.lookup(prompt)
+            if cached is not None:
+                routing = {**cached["routing"], "cached": True}
+                if routing.get("prefetched") and prefetcher is not None:
+                    prefetcher.record_hit(prompt)
+                for yielded in _batch_fan_in(groups[key], cached["response"], list(cached["agents_used"]), routing):
+                    yield yielded
+                continue
+        routings[key] = fast_router.classify(prompt) if fast_router is not None else None
+    
+    slots = asyncio.Semaphore(MFA_BATCH_CONCURRENCY)
+    pending = [key for key, routing in routings.items() if routing is None]
+    if len(pending) > 1:
+        with span("triage.batch", prompts=len(pending)):
+            batch_routings = await asyncio.ensure_future(
+                _with_slots(slots, _batch_triage([_triage_view(unique[key]) for key in pending]))
+            )
+        routings.update(zip(pending, batch_routings))
+    
+    tasks = [
+        asyncio.ensure_future(_with_slots(slots, _run_batch_item(key, unique[key], routing)))
+        for key, routing in routings.items()
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            key, outcome = await next_done
+            if "error" in outcome:
+                yield groups[key], outcome
+            else:
+                for yielded in _batch_fan_in(groups[key], **outcome):
+                    yield yielded
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _with_slots(slots: asyncio.Semaphore, awaitable: Any) -> Any:
+    """Läuft als eigener Task: das Limit gilt nur für dessen Agent-Aufrufe."""
+    _agent_slots.set(slots)
+    return await awaitable
+
+
+def _batch_fan_in(
+    indices: list[int],
+    response: str,
+    agents_used: list[str],
+    routing: dict[str, Any],
+) -> list[tuple[list[int], dict[str, Any]]]:
+    """Ergebnis eines deduplizierten Prompts auf alle seine Positionen verteilen."""
+    first, duplicates = indices[:1], indices[1:]
+    fanned = [(first, {"response": response, "agents_used": agents_used, "routing": routing})]
+    if duplicates:
+        fanned.append((duplicates, {
+            "response": response,
+            "agents_used": agents_used,
+            "routing": {**routing, "coalesced": True},
+        }))
+    return fanned
+
+
+async def _run_batch_item(
+    key: str,
+    prompt: str,
+    routing: dict[str, Any] | None,
+) -> tuple[str, dict[str, Any]]:
+    try:
+        async for event in _observed(_iter_uncached(prompt, False, routing)):
+            if event.get("done"):
+                return key, {
+                    "response": event["response"],
+                    "agents_used": event["agents_used"],
+                    "routing": event["routing"],
+                }
+        raise RuntimeError("MFA workflow ended without a result")
+    except AdmissionRejected as e:
+        return key, {"error": e.reason, "retry_after": e.retry_after}
+    except Exception as e:
+        logger.warning("MFA batch item failed: %s", e)
+        return key, {"error": str(e)}
+
+
+def _triage_view(prompt: str) -> str:
+    """Kurzfassung für die Batch-Triage (gezählt wird erst beim eigentlichen Lauf)."""
+    if condenser is None:
+        return prompt
+    return condenser.condense(prompt, record=False)[1]
+
+
+async def _batch_triage(prompts: list[str]) -> list[dict[str, Any] | None]:
+    """Routet mehrere Prompts mit einem AURATriage-Aufruf.
+    
+    Nicht zuordenbare Einträge (oder eine unbrauchbare Antwort) liefern None –
+    diese Prompts laufen dann mit eigener Triage.
+    """
+    try:
+        text = await _run_agent(AURA_TRIAGE_AGENT_NAME, _build_batch_triage_prompt(prompts))
+        items = json.loads(_strip_code_fence(text))
+    except Exception as e:
+        logger.warning("Batch triage failed, falling back to per-prompt triage: %s", e)
+        return [None] * len(prompts)
+    if not isinstance(items, list) or len(items) != len(prompts):
+        logger.warning("Batch triage returned %s for %d prompts, falling back", type(items).__name__, len(prompts))
+        return [None] * len(prompts)
+    routings: list[dict[str, Any] | None] = []
+    for item in items:
+        if isinstance(item, dict) and isinstance(item.get("routing"), dict):
+            routings.append({**parse_triage_response(json.dumps(item)), "batch_triage": True})
+        else:
+            routings.append(None)
+    return routings
+
+
+def _strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        text = text.rsplit("```", 1)[0]
+    return text
+
+
+def _build_batch_triage_prompt(prompts: list[str]) -> str:
+    """Ein Triage-Prompt für mehrere Fragen (Antwort: JSON-Array in derselben Reihenfolge)."""
+    questions = "\n".join(f"{i}. {prompt}" for i, prompt in enumerate(prompts, 1))
+    return f"""Route each of the following {len(prompts)} questions independently.
+
+Respond ONLY with a JSON array of exactly {len(prompts)} objects, in the same order, each:
+{{"routing": {{"direct": bool, "web": bool, "context": bool}}, "reasoning": "..."}}
+
+QUESTIONS:
+{questions}
+"""
+
+
+async def iter_mfa_workflow(
+    prompt: str,
+    stream_tokens: bool = False,
+    session_id: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Führt den MFA-Workflow aus und liefert dabei Fortschritts-Events.
+    
+    Liegt ein gültiges Ergebnis im Response-Cache, wird es ohne Agent-Aufruf
+    geliefert (routing["cached"] = True); vollständige Ergebnisse werden
+    anschließend gecacht. Alle anderen Requests laufen durch die Admission
+    Control (kann warten oder admission.AdmissionRejected werfen).
+    
+    Events (Schema kompatibel zum SSE-Format des Proxys):
+        {"event": "routing", "routing": {...}}             sobald Triage fertig ist
+        {"event": "agent", "agent": "...", "status": "started" | "completed" | "failed"
+                                                    | "speculative" | "cancelled"}
+        {"delta": "...", "partial": "..."}                 nur mit stream_tokens=True
+        {"done": True, "response": "...", "agents_used": [...], "routing": {...}}
+    
+    Args:
+        prompt: Die Benutzerfrage
+        stream_tokens: Finale Antwort (Quick/Einzel-Agent/Synthesizer) Token für
+            Token als "delta"-Events liefern statt nur im "done"-Event
+        session_id: Optional; hat die Session bereits Turns, ist prompt eine
+            Folgefrage (Verlauf für Triage/Agents, kein Response-Cache,
+            routing["follow_up"] = True). Jeder Turn wird in der Session gespeichert.
+    """
+    async for event in _observed(_iter_request(prompt, stream_tokens, session_id)):
+        yield event
+
+
+async def _observed(events: AsyncIterator[dict[str, Any]]) -> AsyncIterator[dict[str, Any]]:
+    """Zählt einen Request (Route, Ausgang, Latenz, In-Flight) für /api/metrics."""
+    if metrics is None:
+        async for event in events:
+            yield event
+        return
+    metrics.requests_in_flight.inc()
+    started = time.perf_counter()
+    route, status, cached, coalesced = "unknown", "error", False, False
+    try:
+        async for event in events:
+            if event.get("event") == "routing" or event.get("done"):
+                route = route_of(event["routing"])
+            if event.get("done"):
+                cached = bool(event["routing"].get("cached"))
+                coalesced = bool(event["routing"].get("coalesced"))
+                status = "partial" if event["routing"].get("partial") else "ok"
+            yield event
+    except AdmissionRejected:
+        status = "rejected"
+        raise
+    except (asyncio.CancelledError, GeneratorExit):
+        if status == "error":
+            status = "cancelled"
+        raise
+    finally:
+        metrics.requests_in_flight.dec()
+        metrics.request_finished(route, status, time.perf_counter() - started, cached, coalesced)
+
+
+async def _iter_request(
+    prompt: str,
+    stream_tokens: bool,
+    session_id: str | None,
+) -> AsyncIterator[dict[str, Any]]:
+    if not session_id or sessions is None:
+        async for event in _iter_stateless(prompt, stream_tokens):
+            yield event
+        return
+    
+    turns = sessions.turns(session_id)
+    if turns:
+        with span("session.context", turns=len(turns)):
+            contextual_prompt = sessions.contextualize(prompt, turns)
+        events = _iter_uncached(contextual_prompt, stream_tokens, earlier_outputs=turns[-1]["outputs"], cacheable=False)
+    else:
+        events = _iter_stateless(prompt, stream_tokens)
+    async for event in events:
+        if event.get("done"):
+            if turns:
+                event["routing"]["follow_up"] = True
+            sessions.append(
+                session_id,
+                prompt,
+                event["response"],
+                public_routing(event["routing"]),
+                event.get("outputs", {}),
+            )
+        yield event
+
+
+async def _iter_stateless(prompt: str, stream_tokens: bool) -> AsyncIterator[dict[str, Any]]:
+    """Cache-Lookup, sonst Admission → Workflow → Cache-Store."""
+    if response_cache is not None:
+        with span("cache.lookup") as lookup_span:
+            cached = await response_cache.lookup(prompt)
+            if lookup_span is not None:
+                lookup_span.attributes["hit"] = cached is not None
+        if cached is not None:
+            routing = {**cached["routing"], "cached": True}
+            if routing.get("prefetched") and prefetcher is not None:
+                prefetcher.record_hit(prompt)
+            yield {"event": "routing", "routing": public_routing(routing)}
+            if stream_tokens:
+                yield {"delta": cached["response"], "partial": cached["response"]}
+            yield _done(cached["response"], list(cached["agents_used"]), routing)
+            return
+    async for event in _iter_uncached(prompt, stream_tokens):
+        yield event
+
+
+async def _iter_uncached(
+    prompt: str,
+    stream_tokens: bool,
+    routing: dict[str, Any] | None = None,
+    earlier_outputs: dict[str, str] | None = None,
+    cacheable: bool = True,
+) -> AsyncIterator[dict[str, Any]]:
+    """Admission Control → Workflow → Cache-Store (nach erfolglosem Cache-Lookup).
+    
+    Mit routing (z.B. aus der Batch-Triage) entfällt die Triage-Phase;
+    earlier_outputs (Session) gehen als frühere Ergebnisse an den Synthesizer.
+    Der Prompt wird vorher verdichtet (condenser); Cache-Schlüssel bleibt der
+    Original-Prompt.
+    """
+    agent_prompt, triage_prompt, condensed = prompt, prompt, None
+    if condenser is not None:
+        with span("prompt.condense") as condense_span:
+            agent_prompt, triage_prompt, condensed = condenser.condense(prompt)
+            if condense_span is not None:
+                condense_span.attributes.update(condensed)
+    
+    charged = 0
+    if scheduler is not None:
+        # Route vorhersagen (Fast-Path ohne Zähler), sonst Durchschnittskosten
+        predicted = routing
+        if predicted is None and fast_router is not None:
+            predicted = fast_router.explain(triage_prompt)
+        route = route_of(predicted) if predicted is not None else None
+        with span("admission", route=route or "unknown"):
+            charged = await scheduler.admit(scheduler.estimate(agent_prompt, route), route)
+    actual = charged
+    
+    try:
+        events = _iter_workflow(agent_prompt, stream_tokens, routing, earlier_outputs, cacheable, triage_prompt)
+        async for event in events:
+            if event.get("done"):
+                if scheduler is not None:
+                    actual = scheduler.actual(agent_prompt, event["agents_used"], event["response"])
+                if response_cache is not None and cacheable:
+                    await response_cache.store(prompt, {
+                        "response": event["response"],
+                        "agents_used": event["agents_used"],
+                        "routing": public_routing(event["routing"]),
+                    })
+                event["routing"]["condensed"] = condensed
+            yield event
+    finally:
+        if scheduler is not None:
+            scheduler.settle(charged, actual)
+
+
+async def _iter_workflow(
+    prompt: str,
+    stream_tokens: bool,
+    routing: dict[str, Any] | None = None,
+    earlier_outputs: dict[str, str] | None = None,
+    cacheable: bool = True,
+    triage_prompt: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Der eigentliche Ablauf Triage → Agents → Synthesizer (ohne Response-Cache).
+    
+    Spekulativ gestartete, nicht übernommene Branches werden am Ende (auch bei
+    Fehler oder Client-Abbruch) abgebrochen und als verschwendet gezählt.
+    """
+    speculative: dict[str, asyncio.Task[str]] = {}
+    try:
+        phases = _iter_phases(prompt, stream_tokens, speculative, routing, earlier_outputs, cacheable, triage_prompt)
+        async for event in phases:
+            yield event
+    finally:
+        for name, task in speculative.items():
+            task.cancel()
+            if task.done() and not task.cancelled():
+                task.exception()  # als abgerufen markieren (kein "never retrieved"-Log)
+            if speculation is not None:
+                speculation.record_wasted(name)
+
+
+async def _iter_phases(
+    prompt: str,
+    stream_tokens: bool,
+    speculative: dict[str, asyncio.Task[str]],
+    routing: dict[str, Any] | None = None,
+    earlier_outputs: dict[str, str] | None = None,
+    cacheable: bool = True,
+    triage_prompt: str | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Phasen 1–4; übernommene Spekulationen werden aus speculative entfernt.
+    
+    Ist routing bereits bekannt (Batch-Triage), entfällt Phase 1. Ohne
+    cacheable (Session-Folgefragen) bleibt der Ähnlichkeits-Cache außen vor.
+    triage_prompt: Kurzfassung für Fast-Path und Triage (sonst prompt).
     """
     
     agents_used: list[str] = []
+    triage_prompt = triage_prompt or prompt
     
-    async with DefaultAzureCredential() as credential:
-        
-        # === PHASE 1: TRIAGE ===
+    # === PHASE 1: TRIAGE (lokaler Fast-Path, sonst AURATriage) ===
+    if routing is not None:
+        if routing.get("batch_triage"):
+            agents_used.append("AURATriage")
+    elif fast_router is not None:
+        with span("triage.fast_path") as fast_span:
+            routing = fast_router.classify(triage_prompt)
+            if fast_span is not None:
+                fast_span.attributes["hit"] = routing is not None
+    if routing is None and breakers is not None and breakers.is_open(AURA_TRIAGE_AGENT_NAME):
+        # Triage nicht verfügbar → alle Branches; Graph und Breaker entscheiden den Rest
+        routing = {
+            "direct": False,
+            "web": True,
+            "context": True,
+            "reasoning": "Triage circuit open (degraded routing)",
+            "direct_response": None,
+            "degraded": ["AURATriage"],
+        }
+    if routing is None:
+        # Spekulativ: wahrscheinliche Branches laufen bereits während der Triage
+        if speculation is not None:
+            for name in speculation.predict():
+                node = agent_graph.nodes.get(name)
+                if node is None or (breakers is not None and breakers.is_open(node.agent)):
+                    continue
+                speculative[name] = asyncio.create_task(
+                    _run_agent(node.agent, prompt, share=MFA_DEADLINE_BRANCH_SHARE)
+                )
+                speculation.record_started(name)
+                yield _agent_event(node.label, "speculative")
         agents_used.append("AURATriage")
-        async with AzureAIClient(
-            credential=credential,
-            project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
-            model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-            agent_name=AURA_TRIAGE_AGENT_NAME,
-            use_latest_version=True,
-        ).create_agent() as triage_agent:
-            triage_result = await triage_agent.run(prompt)
-            routing = parse_triage_response(triage_result.text)
-        
-        # === PHASE 2: DIRECT/QUICK RESPONSE (schnellste Option) ===
-        if routing["direct"]:
-            # Triage hat direkt geantwortet (kein JSON) - nutze diese Antwort
-            if routing.get("direct_response"):
-                return {
-                    "response": routing["direct_response"],
-                    "agents_used": agents_used,
-                    "routing": routing,
-                }
-            # Triage hat JSON mit direct:true zurückgegeben
-            # Nutze AURAContextPilotQuick für schnelle, einfache Antworten
-            agents_used.append("AURAContextPilotQuick")
-            async with AzureAIClient(
-                credential=credential,
-                project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
-                model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-                agent_name=AURA_QUICK_AGENT_NAME,
-                use_latest_version=True,
-            ).create_agent() as quick_agent:
-                quick_result = await quick_agent.run(prompt)
-                return {
-                    "response": quick_result.text,
-                    "agents_used": agents_used,
-                    "routing": routing,
+        yield _agent_event("AURATriage", "started")
+        triage_started = time.perf_counter()
+        triage_text = await _run_agent(AURA_TRIAGE_AGENT_NAME, triage_prompt, share=MFA_DEADLINE_TRIAGE_SHARE)
+        if fast_router is not None:
+            fast_router.record_triage((time.perf_counter() - triage_started) * 1000)
+        with span("triage.parse"):
+            routing = parse_triage_response(triage_text)
+        yield _agent_event("AURATriage", "completed")
+    if (
+        routing["direct"]
+        and not routing.get("direct_response")
+        and breakers is not None
+        and breakers.is_open(AURA_QUICK_AGENT_NAME)
+    ):
+        # Quick-Agent nicht verfügbar → Context-Agent beantwortet die Frage
+        routing.update(direct=False, context=True)
+        routing.setdefault("degraded", []).append("AURAContextPilotQuick")
+    yield {"event": "routing", "routing": public_routing(routing)}
+    
+    planned = [] if routing["direct"] else agent_graph.plan(routing)
+    if speculation is not None:
+        speculation.record_routing(routing)
+        # Vom Routing ausgeschlossene Spekulationen sofort abbrechen
+        for name in [n for n in speculative if n not in planned]:
+            speculative.pop(name).cancel()
+            speculation.record_wasted(name)
+            yield _agent_event(agent_graph.nodes[name].label, "cancelled")
+    
+    # === PHASE 2: DIRECT/QUICK RESPONSE (schnellste Option) ===
+    if routing["direct"]:
+        # Triage hat direkt geantwortet (kein JSON) - nutze diese Antwort
+        if routing.get("direct_response"):
+            yield _done(routing["direct_response"], agents_used, routing)
+            return
+        # Triage hat JSON mit direct:true zurückgegeben
+        # Nutze AURAContextPilotQuick für schnelle, einfache Antworten
+        agents_used.append("AURAContextPilotQuick")
+        yield _agent_event("AURAContextPilotQuick", "started")
+        quick_response = ""
+        async for event in _final_answer(AURA_QUICK_AGENT_NAME, prompt, stream_tokens, timeout=budget()):
+            if "delta" in event:
+                yield event
+            quick_response = event["partial"]
+        yield _agent_event("AURAContextPilotQuick", "completed")
+        yield _done(quick_response, agents_used, routing)
+        return
+    
+    # === PHASE 3/4: AGENT-GRAPH (Fan-Out, Fan-In → Synthesizer) ===
+    if not planned:
+        # Fallback: Kein Agent wurde ausgewählt (sollte nicht passieren)
+        yield _done(
+            f"No routing decision made. Triage reasoning: {routing.get('reasoning', 'none')}",
+            agents_used,
+            routing,
+        )
+        return
+    
+    # Bereits spekulativ laufende Knoten werden übernommen (nicht neu gestartet)
+    preset: dict[str, asyncio.Task[str]] = {}
+    for name in [n for n in speculative if n in planned]:
+        preset[name] = speculative.pop(name)
+        speculation.record_reused(name)
+    
+    async def run_node(node: GraphNode, inputs: dict[str, str], stream: bool) -> AsyncIterator[str]:
+        node_prompt = prompt
+        if node.prompt == "synthesis":
+            node_prompt = _synthesis_prompt(prompt, inputs, routing, earlier_outputs)
+        if stream:
+            async for event in _final_answer(node.agent, node_prompt, True, timeout=budget()):
+                if "delta" in event:
+                    yield event["delta"]
+        else:
+            # Knoten mit Nachfolgern lassen Budget für die Folge-Phasen übrig
+            share = MFA_DEADLINE_BRANCH_SHARE if agent_graph.dependents[node.name] else 1.0
+            yield await _run_agent(node.agent, node_prompt, share=share)
+
+    async def invoke(node: GraphNode, inputs: dict[str, str], stream: bool) -> AsyncIterator[str]:
+        if semantic_cache is not None and cacheable and node.agent == AURA_CONTEXT_AGENT_NAME and node.prompt == "question":
+            # Ähnliche frühere Frage → Context-Antwort ohne Index-Agent-Aufruf
+            with span("semantic_cache.lookup") as cache_span:
+                try:
+                    hit = await semantic_cache.lookup(prompt)
+                except Exception as e:  # Cache-Fehler (Embedder, I/O) = Miss, nie ein Branch-Fehler
+                    logger.warning("Semantic cache lookup failed: %s", e)
+                    hit = None
+                if cache_span is not None:
+                    cache_span.attributes["hit"] = hit is not None
+            if hit is not None:
+                if prefetcher is not None and prefetcher.record_hit(hit["prompt"]):
+                    routing["prefetched"] = True
+                routing.setdefault("semantic_cache", {})[node.label] = {
+                    "similarity": hit["similarity"],
+                    "prompt": hit["prompt"],
                 }
-        
-        # === PHASE 3: AGENT-AUFRUFE ===
-        web_response: str | None = None
-        context_response: str | None = None
-        
-        # Web Agent (nur wenn benötigt)
-        if routing["web"]:
-            agents_used.append("AURAContextPilotWeb")
-            async with AzureAIClient(
-                credential=credential,
-                project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
-                model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-                agent_name=AURA_WEB_AGENT_NAME,
-                use_latest_version=True,
-            ).create_agent() as web_agent:
-                web_result = await web_agent.run(prompt)
-                web_response = web_result.text
-        
-        # Context Agent (nur wenn benötigt)
-        if routing["context"]:
-            agents_used.append("AURAContextPilot")
-            async with AzureAIClient(
-                credential=credential,
-                project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
-                model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-                agent_name=AURA_CONTEXT_AGENT_NAME,
-                use_latest_version=True,
-            ).create_agent() as context_agent:
-                context_result = await context_agent.run(prompt)
-                context_response = context_result.text
-        
-        # === PHASE 4: RESPONSE HANDLING ===
-        
-        # Nur EIN Agent wurde genutzt → Direkte Antwort (kein Synthesizer)
-        if web_response and not context_response:
-            return {
-                "response": web_response,
-                "agents_used": agents_used,
-                "routing": routing,
-            }
-        
-        if context_response and not web_response:
-            return {
-                "response": context_response,
-                "agents_used": agents_used,
-                "routing": routing,
-            }
-        
-        # BEIDE Agents wurden genutzt → Synthesizer
-        if web_response and context_response:
-            agents_used.append("AURAContextPilotResponseSynthesizer")
-            synthesis_prompt = _build_synthesis_prompt(
-                prompt, web_response, context_response, routing.get("reasoning", "")
+                yield hit["response"]
+                return
+            text = ""
+            async for chunk in run_node(node, inputs, stream):
+                text += chunk
+                yield chunk
+            try:
+                await semantic_cache.store(prompt, text)
+            except Exception as e:
+                logger.warning("Semantic cache store failed: %s", e)
+            return
+        async for chunk in run_node(node, inputs, stream):
+            yield chunk
+    
+    # Knoten mit offenem Breaker gelten sofort als fehlgeschlagen (kein Warten auf Timeout)
+    unavailable = {
+        name for name in planned
+        if breakers is not None and name not in preset and breakers.is_open(agent_graph.nodes[name].agent)
+    }
+    if unavailable:
+        routing.setdefault("degraded", []).extend(agent_graph.nodes[name].label for name in sorted(unavailable))
+    run = agent_graph.run(
+        routing, invoke, stream=stream_tokens, preset=preset, unavailable=unavailable, on_timeout=_record_node_timeout
+    )
+    async for event in run:
+        yield event
+    agents_used.extend(run.labels())
+    
+    if run.errors:
+        routing["failed"] = run.errors
+        if not run.outputs:
+            raise RuntimeError(
+                "All MFA agent branches failed: "
+                + "; ".join(f"{name}: {error}" for name, error in run.errors.items())
             )
-            
-            async with AzureAIClient(
-                credential=credential,
-                project_endpoint=AZURE_AI_PROJECT_ENDPOINT,
-                model_deployment_name=AZURE_AI_MODEL_DEPLOYMENT_NAME,
-                agent_name=AURA_SYNTHESIZER_AGENT_NAME,
-                use_latest_version=True,
-            ).create_agent() as synth_agent:
-                synth_result = await synth_agent.run(synthesis_prompt)
-                return {
-                    "response": synth_result.text,
-                    "agents_used": agents_used,
-                    "routing": routing,
-                }
-        
-        # Fallback: Kein Agent wurde ausgewählt (sollte nicht passieren)
-        return {
-            "response": f"No routing decision made. Triage reasoning: {routing.get('reasoning', 'none')}",
-            "agents_used": agents_used,
-            "routing": routing,
-        }
+        routing["partial"] = True
+    
+    # Antwort = Ausgabe des letzten erfolgreichen Knotens (Synthesizer oder einzelner Branch)
+    response = run.answer
+    if stream_tokens and not run.streamed.intersection(run.answer_nodes):
+        yield {"delta": response, "partial": response}
+    outputs = {
+        name: text for name, text in run.outputs.items() if agent_graph.nodes[name].prompt == "question"
+    }
+    yield _done(response, agents_used, routing, outputs=outputs)
+
+
+def _record_node_timeout(node: GraphNode, seconds: float) -> None:
+    """Knoten-Timeout als Fehler für den Breaker (der abgebrochene Aufruf sieht nur CancelledError)."""
+    if breakers is not None:
+        breakers.record(node.agent, False, seconds, f"TimeoutError: node timeout of {node.timeout:.1f}s exceeded")
+
+
+def _synthesis_prompt(
+    prompt: str,
+    inputs: dict[str, str],
+    routing: dict[str, Any],
+    earlier_outputs: dict[str, str] | None,
+) -> str:
+    """Synthese-Prompt aus den Ausgaben der Vorgänger (vorher kompaktiert)."""
+    with span("synthesis.prompt") as prompt_span:
+        if compactor is not None:
+            inputs, report = compactor.compact_all(inputs)
+            routing["compaction"] = report
+            if prompt_span is not None:
+                prompt_span.attributes.update(report)
+        return _build_synthesis_prompt(prompt, inputs, routing.get("reasoning", ""), earlier_outputs)
+
+
+async def _final_answer(
+    agent_name: str,
+    prompt: str,
+    stream_tokens: bool,
+    timeout: float | None = None,
+) -> AsyncIterator[dict[str, Any]]:
+    """Ruft den antwortenden Agent auf; mit stream_tokens als Delta-Events.
+
+    Das letzte Event enthält in "partial" immer den vollständigen Text.
+    timeout gilt beim Streaming für den gesamten Aufruf (nicht pro Token); ohne
+    Streaming gilt das Deadline-Budget von _run_agent.
+    """
+    if not stream_tokens:
+        # _run_agent setzt das Deadline-Budget selbst durch und verbucht Timeouts beim Breaker
+        # (ein äußeres wait_for würde den Aufruf abbrechen, bevor er den Fehler sieht)
+        yield {"partial": await _run_agent(agent_name, prompt)}
+        return
+    if breakers is not None:
+        breakers.check(agent_name)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    deadline = None if timeout is None else started + timeout
+    stream = _stream_agent(agent_name, prompt)
+    text = ""
+    try:
+        while True:
+            remaining = None if deadline is None else max(deadline - loop.time(), 0.0)
+            try:
+                delta = await asyncio.wait_for(stream.__anext__(), remaining)
+            except StopAsyncIteration:
+                break
+            text += delta
+            yield {"delta": delta, "partial": text}
+    except Exception as e:
+        if breakers is not None:
+            breakers.record(agent_name, False, loop.time() - started, f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        await stream.aclose()
+    if breakers is not None:
+        breakers.record(agent_name, True, loop.time() - started)
+    yield {"partial": text}
+
+
+def _agent_event(agent: str, status: str, **extra: Any) -> dict[str, Any]:
+    return {"event": "agent", "agent": agent, "status": status, **extra}
+
+
+def public_routing(routing: dict[str, Any]) -> dict[str, Any]:
+    """Routing-Felder, die an Clients gehen (ohne interne direct_response)."""
+    return {
+        "direct": routing.get("direct", False),
+        "web": routing.get("web", False),
+        "context": routing.get("context", False),
+        "reasoning": routing.get("reasoning", ""),
+        "partial": routing.get("partial", False),
+        "failed": routing.get("failed", {}),
+        "cached": routing.get("cached", False),
+        "fast_path": routing.get("fast_path", False),
+        "coalesced": routing.get("coalesced", False),
+        "batch_triage": routing.get("batch_triage", False),
+        "compaction": routing.get("compaction"),
+        "condensed": routing.get("condensed"),
+        "follow_up": routing.get("follow_up", False),
+        "degraded": routing.get("degraded", []),
+        "semantic_cache": routing.get("semantic_cache"),
+        "prefetched": routing.get("prefetched", False),
+    }
+
+
+def _done(
+    response: str,
+    agents_used: list[str],
+    routing: dict[str, Any],
+    outputs: dict[str, str] | None = None,
+) -> dict[str, Any]:
+    """Abschluss-Event; outputs = Antworten der Fan-Out-Branches (für Sessions)."""
+    event = {"done": True, "response": response, "agents_used": agents_used, "routing": routing}
+    if outputs:
+        event["outputs"] = dict(outputs)
+    return event
 
 
 def _build_synthesis_prompt(
     original_prompt: str,
-    web_response: str,
-    context_response: str,
-    reasoning: str
+    responses: dict[str, str],
+    reasoning: str,
+    earlier_outputs: dict[str, str] | None = None,
 ) -> str:
-    """Erstellt den Prompt für den Synthesizer."""
+    """Erstellt den Prompt für den Synthesizer (optional mit Ergebnissen des letzten Session-Turns)."""
+    earlier = ""
+    if earlier_outputs:
+        limit = MFA_SESSION_CONTEXT_TOKENS * 4  # ~4 Zeichen pro Token
+        earlier = "".join(
+            f"\n=== EARLIER {name.upper()} FINDINGS (previous turn) ===\n{text[:limit]}\n"
+            for name, text in earlier_outputs.items()
+        )
+    sections = "\n\n".join(
+        f"=== RESPONSE FROM {name.upper()} AGENT ===\n{text}" for name, text in responses.items()
+    )
     return f"""Synthesize the following agent responses into one coherent answer.
 
 ORIGINAL QUESTION:
@@ -223,14 +1357,10 @@ ORIGINAL QUESTION:
 ROUTING REASONING:
 {reasoning}
 
-=== RESPONSE FROM WEB AGENT ===
-{web_response}
-
-=== RESPONSE FROM CONTEXT AGENT ===
-{context_response}
-
+{sections}
+{earlier}
 INSTRUCTIONS:
-- Combine insights from both sources
+- Combine insights from all sources
 - Highlight agreements and differences
 - Provide a clear, actionable answer
 - Include relevant sources/references
@@ -0,0 +1,259 @@
+"""Vorab-Antworten aus dem laufenden Transkript (Predictive Prefetch).
+
+Eine Markierung im Frontend braucht ~10s bis zur Antwort, obwohl der
+markierte Begriff meist schon eine Weile im Transkript steht. Das Frontend
+schickt deshalb laufend Transkript-Segmente an POST /api/mfa/prefetch; hier
+werden daraus Kandidaten gewählt, deren Antwort im Hintergrund vorab in den
+Response-Cache (und den Ähnlichkeits-Cache) geschrieben wird.
+
+- Kandidaten pro Stream (Meeting) aus einem rollenden Fenster der letzten
+  Segmente: Projekt-/Produktnamen ("Projekt Phoenix", "ContextPilot"),
+  Kürzel mit Ziffern ("SAP S4", "M365"), mehrteilige Eigennamen → Context-
+  Agent; Akronyme, zitierte Begriffe und Fragen aus dem Gespräch → Quick-
+  Agent. Ein Begriff muss min_mentions-mal im Fenster vorkommen.
+- Prompt = genau der Prompt, den die Markierungs-Aktion "Show more details"
+  im Frontend schickt (EXPAND_PROMPT, siehe live-transcriber/src/App.tsx) –
+  nur dann trifft der exakte Response-Cache.
+- Striktes Token-Budget pro Zeitfenster: ein Prefetch startet nur, wenn die
+  geschätzten Kosten noch ins Budget passen; danach wird mit den
+  tatsächlichen Tokens abgerechnet.
+- Hit-Rate und verschwendete Tokens: ein Prefetch zählt als Treffer, wenn ein
+  späterer /mfa-Request ihn aus dem Cache bedient; läuft er vorher ab, zählen
+  seine Tokens als verschwendet.
+
+Die Ausführung (Agent-Aufruf, Admission, Cache) liegt in mfa_workflow.py;
+dieses Modul wählt nur aus und führt Buch.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+from admission import estimate_tokens
+from response_cache import normalize_prompt
+
+# Muss mit handleHighlightAndExpand im Frontend übereinstimmen (ohne Web-Suche)
+EXPAND_PROMPT = 'Context: "{text}"\n\nGive me 3-5 bullet points with key facts I can use in conversation. Short, precise, no fluff.'
+
+_SPEAKER_TAG = re.compile(r"\[[A-ZÄÖÜ][A-ZÄÖÜ0-9 _-]{0,23}\]")
+_TIMESTAMP = re.compile(r"[\[(]?\b\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?\b[\])]?")
+_PROJECT = re.compile(
+    r"\b(?:Projekt|Project|Programm|Program|Initiative|Produkt|Product)\s+[A-ZÄÖÜ][\w-]+(?:\s+[A-ZÄÖÜ0-9][\w-]*)?"
+)
+_CAMEL = re.compile(r"\b[A-ZÄÖÜ][a-zäöü]+(?:[A-ZÄÖÜ][a-zäöü0-9]+)+\b")
+_CODE = re.compile(r"\b[A-Za-zÄÖÜäöü]+-?\d+[A-Za-z0-9]*\b|\b[A-ZÄÖÜ]{2,}\s+[A-Z]?\d+\b")
+_ACRONYM = re.compile(r"\b[A-ZÄÖÜ]{2,6}s?\b")
+_PROPER = re.compile(r"\b[A-ZÄÖÜ][\wäöüß-]+(?:\s+(?:of|de|von|der|für|for)?\s*[A-ZÄÖÜ][\wäöüß-]+){1,3}")
+_QUOTED = re.compile(r'[„"“]([^"“”„]{3,60})[“”"]')
+_QUESTION = re.compile(r"[^.!?\n]{12,160}\?")
+
+# Häufige Kürzel und Satzanfänge, die keine Nachfrage wert sind
+_STOP = {
+    "ok", "okay", "mic", "speaker", "ich", "wir", "sie", "und", "aber", "also", "das", "die", "der",
+    "the", "and", "but", "so", "ja", "nein", "yes", "no", "ceo", "cto", "cfo", "faq", "pdf", "usa",
+    "eu", "ch", "de", "uk", "ai", "ki", "it", "pm", "am", "ps", "zb", "eg", "ie",
+}
+_QUARTER = re.compile(r"^(?:q[1-4]|h[12]|fy\d{2,4}|kw\d{1,2})$", re.IGNORECASE)
+
+
+def extract_candidates(text: str) -> list[tuple[str, str]]:
+    """Kandidaten eines Transkript-Ausschnitts als (Begriff, Agent-Art "context"|"quick")."""
+    text = _TIMESTAMP.sub(" ", _SPEAKER_TAG.sub(" ", text))
+    found: list[tuple[str, str]] = []
+    for pattern, kind in ((_PROJECT, "context"), (_CAMEL, "context"), (_CODE, "context"), (_ACRONYM, "quick")):
+        found.extend((match.group(0), kind) for match in pattern.finditer(text))
+    for sentence in re.split(r"(?<=[.!?])\s+|\n", text):
+        # Mehrteilige Eigennamen nicht am Satzanfang (dort ist alles großgeschrieben)
+        words = sentence.split(maxsplit=1)
+        if len(words) == 2:
+            found.extend((match.group(0), "context") for match in _PROPER.finditer(words[1]))
+    found.extend((match.group(1), "quick") for match in _QUOTED.finditer(text))
+    found.extend((match.group(0), "quick") for match in _QUESTION.finditer(text))
+    candidates: dict[str, tuple[str, str]] = {}
+    for term, kind in found:
+        term = " ".join(term.split()).strip(" ,;:-")
+        if len(term) >= 2 and term.casefold() not in _STOP and not _QUARTER.match(term):
+            # Pro Ausschnitt einmal zählen; erstes Muster bestimmt den Agent
+            candidates.setdefault(term.casefold(), (term, kind))
+    return list(candidates.values())
+
+
+class TranscriptPrefetcher:
+    """Wählt Prefetch-Kandidaten aus Transkript-Segmenten und führt Budget und Treffer."""
+
+    def __init__(
+        self,
+        token_budget: int = 20000,
+        budget_window_seconds: float = 3600.0,
+        completion_tokens: int = 400,
+        window_segments: int = 40,
+        min_mentions: int = 2,
+        max_per_ingest: int = 3,
+        ttl_seconds: float = 3600.0,
+        max_streams: int = 100,
+    ):
+        self.token_budget = token_budget
+        self.budget_window_seconds = budget_window_seconds
+        self.completion_tokens = completion_tokens
+        self.window_segments = window_segments
+        self.min_mentions = min_mentions
+        self.max_per_ingest = max_per_ingest
+        self.ttl_seconds = ttl_seconds
+        self.max_streams = max_streams
+        self._streams: OrderedDict[str, deque[str]] = OrderedDict()
+        # (Zeitpunkt, Tokens) im Budget-Fenster; Reservierungen werden nachträglich korrigiert
+        self._spent: deque[list[float]] = deque()
+        # normalisierter Prompt → {"term", "kind", "tokens", "at", "hit"}
+        self._prefetched: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._pending: set[str] = set()
+        self.stats = {
+            "segments": 0,
+            "candidates": 0,
+            "started": 0,
+            "completed": 0,
+            "failed": 0,
+            "skipped_budget": 0,
+            "skipped_busy": 0,
+            "skipped_cached": 0,
+            "hits": 0,
+            "tokens_spent": 0,
+            "tokens_hit": 0,
+            "tokens_wasted": 0,
+        }
+
+    # === Kandidaten ===
+
+    def ingest(self, stream_id: str, segments: list[str]) -> list[dict[str, Any]]:
+        """Nimmt Segmente auf und liefert neue Kandidaten (höchstens max_per_ingest).
+
+        Kandidaten: {"term", "kind", "prompt", "mentions", "estimate"}; sortiert
+        nach Häufigkeit im Fenster, bei Gleichstand der zuletzt genannte zuerst.
+        """
+        self._expire()
+        window = self._streams.pop(stream_id, None) or deque(maxlen=self.window_segments)
+        self._streams[stream_id] = window
+        while len(self._streams) > self.max_streams:
+            self._streams.popitem(last=False)
+        window.extend(segment for segment in segments if segment.strip())
+        self.stats["segments"] += len(segments)
+
+        mentions: dict[str, list[Any]] = {}
+        order = 0
+        for segment in window:
+            for term, kind in extract_candidates(segment):
+                order += 1
+                entry = mentions.setdefault(term.casefold(), [term, kind, 0, 0])
+                entry[2] += 1
+                entry[3] = order
+        recent = {term.casefold() for segment in segments for term, _ in extract_candidates(segment)}
+
+        candidates = []
+        for key, (term, kind, count, last) in mentions.items():
+            # Fragen reichen einmal; nur was im neuen Segment vorkommt, ist "gerade Thema"
+            needed = 1 if term.endswith("?") else self.min_mentions
+            if count < needed or key not in recent:
+                continue
+            prompt = EXPAND_PROMPT.format(text=term)
+            if normalize_prompt(prompt) in self._prefetched or normalize_prompt(prompt) in self._pending:
+                continue
+            candidates.append((count, last, {
+                "term": term,
+                "kind": kind,
+                "prompt": prompt,
+                "mentions": count,
+                "estimate": estimate_tokens(prompt) + self.completion_tokens,
+            }))
+        candidates.sort(key=lambda c: c[:2], reverse=True)
+        self.stats["candidates"] += len(candidates)
+        return [candidate for _, _, candidate in candidates[: self.max_per_ingest]]
+
+    # === Budget ===
+
+    def remaining(self) -> int:
+        cutoff = time.monotonic() - self.budget_window_seconds
+        while self._spent and self._spent[0][0] < cutoff:
+            self._spent.popleft()
+        return max(self.token_budget - int(sum(tokens for _, tokens in self._spent)), 0)
+
+    def reserve(self, candidate: dict[str, Any]) -> list[float] | None:
+        """Reserviert die geschätzten Kosten; None, wenn das Budget nicht reicht."""
+        if candidate["estimate"] > self.remaining():
+            self.stats["skipped_budget"] += 1
+            return None
+        reservation = [time.monotonic(), float(candidate["estimate"])]
+        self._spent.append(reservation)
+        self._pending.add(normalize_prompt(candidate["prompt"]))
+        self.stats["started"] += 1
+        return reservation
+
+    def completed(self, candidate: dict[str, Any], reservation: list[float], tokens: int) -> None:
+        """Prefetch fertig und im Cache: Reservierung auf die tatsächlichen Tokens setzen."""
+        key = normalize_prompt(candidate["prompt"])
+        self._pending.discard(key)
+        reservation[1] = float(tokens)
+        self._prefetched[key] = {
+            "term": candidate["term"],
+            "kind": candidate["kind"],
+            "tokens": tokens,
+            "at": time.monotonic(),
+            "hit": False,
+        }
+        self.stats["completed"] += 1
+        self.stats["tokens_spent"] += tokens
+
+    def released(self, candidate: dict[str, Any], reservation: list[float], reason: str, tokens: int = 0) -> None:
+        """Ohne Cache-Eintrag beendet: reason "failed" (Fehler/Abbruch), "busy" oder "cached".
+
+        Bereits verbrauchte Tokens (z.B. Prompt eines fehlgeschlagenen Aufrufs)
+        zählen als verschwendet, der Rest der Reservierung geht zurück ins Budget.
+        """
+        self._pending.discard(normalize_prompt(candidate["prompt"]))
+        reservation[1] = float(tokens)
+        self.stats["failed" if reason == "failed" else f"skipped_{reason}"] += 1
+        self.stats["tokens_spent"] += tokens
+        self.stats["tokens_wasted"] += tokens
+
+    # === Treffer ===
+
+    def record_hit(self, prompt: str) -> bool:
+        """Ein /mfa-Request wurde aus einem Prefetch bedient (je Prefetch einmal gezählt)."""
+        entry = self._prefetched.get(normalize_prompt(prompt))
+        if entry is None or entry["hit"]:
+            return entry is not None
+        entry["hit"] = True
+        self.stats["hits"] += 1
+        self.stats["tokens_hit"] += entry["tokens"]
+        return True
+
+    def _expire(self) -> None:
+        """Abgelaufene Prefetches ohne Treffer zählen als verschwendet."""
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._prefetched:
+            key, entry = next(iter(self._prefetched.items()))
+            if entry["at"] >= cutoff:
+                break
+            del self._prefetched[key]
+            if not entry["hit"]:
+                self.stats["tokens_wasted"] += entry["tokens"]
+
+    def snapshot(self) -> dict[str, Any]:
+        self._expire()
+        completed = self.stats["completed"]
+        unused = sum(entry["tokens"] for entry in self._prefetched.values() if not entry["hit"])
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / completed, 3) if completed else 0.0,
+            "wasted_token_ratio": (
+                round(self.stats["tokens_wasted"] / self.stats["tokens_spent"], 3) if self.stats["tokens_spent"] else 0.0
+            ),
+            "tokens_unused_live": unused,
+            "entries": len(self._prefetched),
+            "running": len(self._pending),
+            "streams": len(self._streams),
+            "token_budget": self.token_budget,
+            "budget_window_seconds": self.budget_window_seconds,
+            "tokens_remaining": self.remaining(),
+        }
@@ -0,0 +1,233 @@
+"""Eingangs-Prompt verdichten, bevor Triage und Agents ihn bezahlen.
+
+Das Frontend schickt Prompts mit großen Transkript-Stücken ("Context: \"…\""
+aus einer Markierung, "[MIC] …"/"[SPEAKER] …"-Blöcke bei der Transkript-
+Analyse). Ohne Verdichtung geht derselbe lange Text an die Triage und dann an
+jeden gewählten Agent – bei Web + Context drei- bis viermal.
+
+Verdichtet wird nur der Transkript-Teil; Anweisungen und die eigentliche
+Frage bleiben wörtlich erhalten:
+
+1. Transkript erkennen: der Text in Context: "…", Zeilen mit Sprecher-Tag
+   ([MIC], [SPEAKER], …) oder Zeitstempel am Anfang.
+2. Zeitstempel und Füllwörter (äh, ähm, uh, umm, you know, …) entfernen,
+   Stotterer ("und und und") zusammenfassen. "um" bleibt: im Deutschen ist es
+   eine Präposition; doppelte Wörter ("die die") sind oft korrekt.
+3. Wiederholte Sätze entfernen; Zwischenstände der Live-Erkennung (ein Satz,
+   der Anfang des nächsten ist) werden durch den vollständigen Satz ersetzt.
+   Aufeinanderfolgende Zeilen desselben Sprechers werden zusammengeführt.
+4. Token-Budget: die jüngsten Sätze bleiben (die Frage bezieht sich meist auf
+   das zuletzt Gesagte), ältere werden durch "[…]" ersetzt.
+
+Die Triage bekommt eine kürzere Fassung (triage_tokens), die Agents den
+verdichteten Kontext. Prompts unter min_tokens bleiben unverändert.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from admission import estimate_tokens
+from compaction import TRIMMED_MARKER, _sentence_key, _split_sentences
+
+# Context: "…" aus den Markierungs-Aktionen des Frontends (Anführungszeichen über mehrere Zeilen)
+_QUOTED_CONTEXT = re.compile(r'^(?P<label>(?:context|kontext|transcript|transkript)\s*:\s*)"(?P<text>.*)"\s*$', re.IGNORECASE | re.DOTALL)
+_SPEAKER = re.compile(r"^\s*\[(?P<speaker>[A-ZÄÖÜ][A-ZÄÖÜ0-9 _-]{0,23})\]\s*")
+_TIMESTAMP = re.compile(r"^\s*[\[(]?\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]?\s*(?:-+>?\s*)?")
+_INLINE_TIMESTAMP = re.compile(r"[\[(]\d{1,2}:\d{2}(?::\d{2})?(?:[.,]\d{1,3})?[\])]\s*")
+_FILLER = re.compile(
+    r"(?<![\w-])(?:äh+m*|öh+m*|ehm+|hm+|mhm|uh+m*|umm+|you know|i mean)(?![\w-])[,.]?\s*",
+    re.IGNORECASE,
+)
+_REPEATED_WORD = re.compile(r"\b(\w+)(?:\s+\1\b){2,}", re.IGNORECASE)
+_SPACES = re.compile(r"[ \t]{2,}")
+
+
+def _is_transcript_line(line: str) -> bool:
+    return bool(_SPEAKER.match(line) or _TIMESTAMP.match(line))
+
+
+class PromptCondenser:
+    """Verdichtet Transkript-Kontext im Prompt und zählt die gesparten Tokens."""
+
+    def __init__(self, token_budget: int = 1200, triage_tokens: int = 250, min_tokens: int = 300):
+        self.token_budget = token_budget
+        self.triage_tokens = triage_tokens
+        self.min_tokens = min_tokens
+        self.stats = {
+            "requests": 0,
+            "condensed": 0,
+            "tokens_before": 0,
+            "tokens_after": 0,
+            "triage_tokens": 0,
+            "duplicates_removed": 0,
+            "fillers_removed": 0,
+            "timestamps_removed": 0,
+            "trimmed": 0,
+        }
+
+    def condense(self, prompt: str, record: bool = True) -> tuple[str, str, dict[str, Any]]:
+        """Liefert (agent_prompt, triage_prompt, report) mit Token vorher/nachher.
+
+        record=False: nur verdichten, nicht zählen (z.B. Batch-Triage, die den
+        Prompt später noch einmal regulär durchläuft).
+        """
+        before = estimate_tokens(prompt)
+        parts = self._split(prompt) if before >= self.min_tokens else None
+        if not parts or not any(kind == "transcript" for kind, _, _ in parts):
+            if record:
+                self._record(before, before, before)
+            return prompt, prompt, {"condensed": False, "tokens_before": before, "tokens_after": before}
+
+        counts = {"duplicates_removed": 0, "fillers_removed": 0, "timestamps_removed": 0}
+        cleaned = [
+            (kind, label, self._clean(lines, counts) if kind == "transcript" else lines)
+            for kind, label, lines in parts
+        ]
+        agent_prompt, trimmed = self._render(cleaned, self.token_budget)
+        triage_prompt, _ = self._render(cleaned, self.triage_tokens)
+        after = estimate_tokens(agent_prompt)
+        triage = estimate_tokens(triage_prompt)
+        report = {
+            "condensed": True,
+            "tokens_before": before,
+            "tokens_after": after,
+            "triage_tokens": triage,
+            "tokens_saved": max(before - after, 0),
+            **counts,
+            "trimmed": trimmed,
+        }
+        if record:
+            self._record(before, after, triage)
+            self.stats["condensed"] += 1
+            self.stats["trimmed"] += int(trimmed)
+            for key, value in counts.items():
+                self.stats[key] += value
+        return agent_prompt, triage_prompt, report
+
+    def _record(self, before: int, after: int, triage: int) -> None:
+        self.stats["requests"] += 1
+        self.stats["tokens_before"] += before
+        self.stats["tokens_after"] += after
+        self.stats["triage_tokens"] += triage
+
+    # === Zerlegen ===
+
+    @staticmethod
+    def _split(prompt: str) -> list[tuple[str, str, list[str]]]:
+        """Absätze → [(kind, label, lines)]; kind "transcript" oder "text" (bleibt wörtlich)."""
+        parts: list[tuple[str, str, list[str]]] = []
+        for paragraph in re.split(r"\n\s*\n", prompt):
+            quoted = _QUOTED_CONTEXT.match(paragraph.strip())
+            if quoted:
+                parts.append(("transcript", quoted.group("label") + '"', quoted.group("text").splitlines()))
+                parts.append(("break", "", []))
+                continue
+            for line in paragraph.splitlines():
+                kind = "transcript" if _is_transcript_line(line) else "text"
+                if parts and parts[-1][0] == kind and not parts[-1][1]:
+                    parts[-1][2].append(line)
+                else:
+                    parts.append((kind, "", [line]))
+            parts.append(("break", "", []))
+        while parts and parts[-1][0] == "break":
+            parts.pop()
+        return parts
+
+    # === Bereinigen ===
+
+    @staticmethod
+    def _clean(lines: list[str], counts: dict[str, int]) -> list[tuple[str | None, str]]:
+        """Zeilen → bereinigte Sätze als (Sprecher, Satz)."""
+        sentences: list[tuple[str | None, str]] = []
+        keys: list[str] = []
+        seen: set[str] = set()
+        speaker = None
+        for line in lines:
+            # Zeitstempel vor dem Sprecher-Tag entfernen ("[00:01] [MIC] …")
+            text, stamps = _TIMESTAMP.subn("", line, count=1)
+            tag = _SPEAKER.match(text)
+            if tag:
+                speaker = tag.group("speaker")
+                text = text[tag.end():]
+            text, inline = _INLINE_TIMESTAMP.subn("", text)
+            counts["timestamps_removed"] += stamps + inline
+            text, fillers = _FILLER.subn("", text)
+            counts["fillers_removed"] += fillers
+            text = _SPACES.sub(" ", _REPEATED_WORD.sub(r"\1", text)).strip(" ,")
+            for sentence in _split_sentences(text):
+                key = _sentence_key(sentence)
+                if not key:
+                    continue
+                if len(key) > 12 and key in seen:
+                    counts["duplicates_removed"] += 1
+                    continue
+                if keys and key.startswith(keys[-1] + " ") and sentences[-1][0] == speaker:
+                    # Zwischenstand der Live-Erkennung durch den vollständigen Satz ersetzen
+                    counts["duplicates_removed"] += 1
+                    seen.discard(keys.pop())
+                    sentences.pop()
+                seen.add(key)
+                keys.append(key)
+                sentences.append((speaker, sentence))
+        return sentences
+
+    # === Rendern ===
+
+    @staticmethod
+    def _render(parts: list[tuple[str, str, list[Any]]], budget: int) -> tuple[str, bool]:
+        """Text-Teile wörtlich; Transkript-Sätze ab dem jüngsten bis zum Budget."""
+        fixed = sum(estimate_tokens(line) for kind, _, lines in parts if kind == "text" for line in lines)
+        left = max(budget - fixed, 0) if budget > 0 else float("inf")  # 0 = nur bereinigen
+        kept: dict[int, list[tuple[str | None, str]]] = {}
+        trimmed = False
+        # Jüngstes Transkript zuerst ins Budget; ältere Sätze fallen weg
+        for index in reversed(range(len(parts))):
+            if parts[index][0] != "transcript":
+                continue
+            chosen = []
+            for speaker, sentence in reversed(parts[index][2]):
+                cost = estimate_tokens(sentence)
+                if trimmed or cost > left:
+                    trimmed = True
+                    continue
+                left -= cost
+                chosen.append((speaker, sentence))
+            kept[index] = chosen[::-1]
+
+        blocks: list[str] = []
+        current: list[str] = []
+        for index, (kind, label, lines) in enumerate(parts):
+            if kind == "break":
+                if current:
+                    blocks.append("\n".join(current))
+                current = []
+            elif kind == "text":
+                current.extend(lines)
+            else:
+                rendered = [TRIMMED_MARKER] if len(kept[index]) < len(lines) else []
+                previous = None
+                for speaker, sentence in kept[index]:
+                    if speaker is not None and speaker != previous:
+                        rendered.append(f"\n[{speaker}] {sentence}")
+                    else:
+                        rendered.append(sentence)
+                    previous = speaker
+                body = " ".join(rendered).replace(" \n", "\n").lstrip("\n")
+                current.append(f'{label}{body}"' if label else body)
+        if current:
+            blocks.append("\n".join(current))
+        return "\n\n".join(blocks), trimmed
+
+    def snapshot(self) -> dict[str, Any]:
+        saved = self.stats["tokens_before"] - self.stats["tokens_after"]
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "token_budget": self.token_budget,
+            "triage_token_budget": self.triage_tokens,
+            "min_tokens": self.min_tokens,
+            "tokens_saved": saved,
+            "avg_tokens_saved": round(saved / requests, 1) if requests else 0.0,
+        }
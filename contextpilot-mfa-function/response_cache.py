@@ -0,0 +1,154 @@
+"""Response-Cache für wiederkehrende MFA-Prompts.
+
+Key: normalisierter Prompt + Routing-Entscheidung ("direct", "context",
+"web", "synthesis"). TTL pro Route: interne/direkte Antworten lange,
+Web-Antworten (aktuelle Daten) kurz.
+
+Backends implementieren CacheBackend (async get/set/delete/clear). Der
+Standard ist InMemoryBackend (LRU, größenbegrenzt); ein Redis-Backend
+(oder ein lokaler Stand-in) kann dieselbe Schnittstelle mit GET/SETEX/DEL
+umsetzen – Werte sind JSON-serialisierbare dicts.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Protocol
+
+# Reihenfolge = Lookup-Reihenfolge vor der Triage (billigste Route zuerst)
+ROUTES = ("direct", "context", "web", "synthesis")
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.:;,]+$")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normalisiert einen Prompt für den Cache-Key.
+
+    Unicode-NFKC, casefold, Whitespace zusammenfassen, Satzzeichen am Ende
+    entfernen – "Umsatz Q3?" und "umsatz  q3" ergeben denselben Key.
+    """
+    text = unicodedata.normalize("NFKC", prompt).casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _TRAILING_PUNCTUATION.sub("", text)
+
+
+def route_of(routing: dict[str, Any]) -> str:
+    """Bildet das Triage-Routing auf einen Routentyp ab."""
+    if routing.get("direct"):
+        return "direct"
+    if routing.get("web") and routing.get("context"):
+        return "synthesis"
+    if routing.get("web"):
+        return "web"
+    return "context"
+
+
+class CacheBackend(Protocol):
+    """Schnittstelle für Cache-Speicher (In-Process, Redis, ...)."""
+
+    async def get(self, key: str) -> dict[str, Any] | None: ...
+
+    async def set(self, key: str, value: dict[str, Any], ttl_seconds: float) -> None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def clear(self) -> None: ...
+
+
+class InMemoryBackend:
+    """LRU-Cache im Worker-Prozess mit TTL pro Eintrag."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    async def get(self, key: str) -> dict[str, Any] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: dict[str, Any], ttl_seconds: float) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    async def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """Cache für fertige Workflow-Ergebnisse, keyed by Prompt + Route."""
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl_seconds: dict[str, float],
+        namespace: str = "mfa:v1",
+    ):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.namespace = namespace
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "skipped": 0}
+
+    def key(self, prompt: str, route: str) -> str:
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return f"{self.namespace}:{route}:{digest}"
+
+    async def lookup(self, prompt: str, route: str | None = None) -> dict[str, Any] | None:
+        """Sucht ein Ergebnis; ohne route werden alle Routen probiert (vor der Triage)."""
+        for candidate in (route,) if route else ROUTES:
+            if self.ttl_seconds.get(candidate, 0) <= 0:
+                continue
+            value = await self.backend.get(self.key(prompt, candidate))
+            if value is not None:
+                self.stats["hits"] += 1
+                return value
+        self.stats["misses"] += 1
+        return None
+
+    async def store(self, prompt: str, result: dict[str, Any]) -> bool:
+        """Speichert ein vollständiges Ergebnis. Teil- und degradierte Ergebnisse werden nicht gecacht."""
+        routing = result.get("routing", {})
+        ttl = self.ttl_seconds.get(route_of(routing), 0)
+        if ttl <= 0 or routing.get("partial") or routing.get("degraded") or not result.get("response"):
+            self.stats["skipped"] += 1
+            return False
+        await self.backend.set(self.key(prompt, route_of(routing)), result, ttl)
+        self.stats["stores"] += 1
+        return True
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        snapshot: dict[str, Any] = {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+        }
+        if isinstance(self.backend, InMemoryBackend):
+            snapshot["entries"] = len(self.backend)
+            snapshot["max_entries"] = self.backend.max_entries
+            snapshot["evictions"] = self.backend.evictions
+        return snapshot
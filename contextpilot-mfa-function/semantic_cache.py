@@ -0,0 +1,377 @@
+"""Ähnlichkeits-Cache (Embeddings) für Antworten des Context-Agents.
+
+Viele Fragen an AURAContextPilot sind Paraphrasen ("Umsatz Q3?", "what was
+Q3 revenue") – der exakte Response-Cache verfehlt sie, jede kostet einen
+vollen Index-Agent-Aufruf. Der SemanticCache hält ein lokales Vektor-Index
+früherer Prompt → Context-Antworten:
+
+- Embeddings über eine austauschbare Funktion (async, Liste von Texten →
+  Matrix n × dim), per MFA_SEMANTIC_EMBEDDER ("modul:funktion") ein echtes
+  Embedding-Modell. HashingEmbedder (Spezifikation "hashing") ist ein
+  deterministischer lokaler Stand-in für Tests und Benchmarks – kein
+  stiller Default: ohne Embedder bleibt der Cache aus.
+- Suche: normierte Vektoren, Kosinus-Ähnlichkeit als ein Matrixprodukt für
+  alle Anfragen eines Batches (NumPy). Treffer ab threshold werden bedient.
+- Anker: Frontend-Prompts teilen sich dieselbe Anweisung und unterscheiden
+  sich nur im markierten Text – ähnliche Vektoren, aber eine andere Frage.
+  Ein Treffer braucht deshalb zusätzlich denselben Anker: den markierten
+  Text aus Context: "…" bzw. ohne Markierung die Entitäten des Prompts
+  (Zahlen, Kürzel, großgeschriebene Wörter außerhalb des Satzanfangs).
+- Größenbegrenzt: ist der Index voll, wird der am längsten nicht genutzte
+  Eintrag überschrieben; Einträge verfallen nach ttl_seconds.
+- Persistenz (optional, path): Vektoren in einer memory-mapped Datei
+  (<path>), Prompts/Antworten als JSONL-Log daneben (<path>.jsonl). Nach
+  einem Worker-Neustart wird beides wieder geladen; passt Dimension,
+  Kapazität oder Embedder nicht mehr, beginnt der Index leer. Flush und
+  Log-Schreiben laufen in einem Worker-Thread (asyncio.to_thread), nicht auf
+  dem Event Loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+
+from response_cache import normalize_prompt
+
+logger = logging.getLogger(__name__)
+
+EmbeddingFunction = Callable[[list[str]], "Awaitable[np.ndarray] | np.ndarray"]
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+_CONTEXT = re.compile(r'^\s*(?:context|kontext)\s*:\s*"(?P<text>.*?)"\s*(?:\n|$)', re.IGNORECASE | re.DOTALL)
+_SENTENCE = re.compile(r"(?:^|[.!?:\n]\s*)(\w+)")
+_ENTITY = re.compile(r"\b(?:\w*\d\w*|[A-ZÄÖÜ][\w-]*)\b")
+
+
+def anchor(prompt: str) -> str:
+    """Was bei einem Treffer exakt übereinstimmen muss (markierter Text bzw. Entitäten)."""
+    quoted = _CONTEXT.match(prompt)
+    if quoted:
+        return "context:" + normalize_prompt(quoted.group("text"))
+    sentence_starts = {match.start(1) for match in _SENTENCE.finditer(prompt)}
+    entities = {
+        match.group(0).casefold()
+        for match in _ENTITY.finditer(prompt)
+        if match.start() not in sentence_starts or any(ch.isdigit() for ch in match.group(0))
+    }
+    return "entities:" + " ".join(sorted(entities))
+
+
+class HashingEmbedder:
+    """Deterministisches lokales Embedding (Feature-Hashing, L2-normiert)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text: str) -> list[str]:
+        normalized = normalize_prompt(text)
+        words = _WORD.findall(normalized)
+        trigrams = [
+            f"#{word[i:i + 3]}"
+            for word in words
+            for i in range(max(len(word) - 2, 1))
+        ]
+        return [*words, *trigrams]
+
+    async def __call__(self, texts: list[str]) -> np.ndarray:
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                # Vorzeichen-Hashing: Kollisionen heben sich im Mittel auf
+                matrix[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return matrix
+
+
+def load_embedder(spec: str | None, dim: int) -> EmbeddingFunction:
+    """"modul:attribut" importieren (Funktion oder Fabrik mit dim); "hashing" = HashingEmbedder."""
+    if not spec:
+        raise ValueError("No embedder configured (set MFA_SEMANTIC_EMBEDDER)")
+    if spec == "hashing":
+        return HashingEmbedder(dim)
+    module_name, _, attribute = spec.partition(":")
+    target = getattr(importlib.import_module(module_name), attribute or "embed")
+    if inspect.isclass(target):
+        target = target(dim)
+    return target
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """Feste Anzahl Slots (capacity × dim, float32) plus Metadaten pro Slot."""
+
+    def __init__(self, dim: int, capacity: int, path: str | None = None, embedder_name: str = ""):
+        self.dim = dim
+        self.capacity = capacity
+        self.path = path
+        self.embedder_name = embedder_name
+        self.used = np.zeros(capacity, dtype=bool)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.entries: list[dict[str, Any] | None] = [None] * capacity
+        self._keys: dict[str, int] = {}
+        self.evictions = 0
+        self._log_lines = 0
+        # Serialisiert Flush/Log-Schreiben aus Worker-Threads
+        self._io_lock = threading.Lock()
+        if path:
+            self.vectors = self._open_memmap(path)
+        else:
+            self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+
+    # === Persistenz ===
+
+    def _header(self) -> dict[str, Any]:
+        return {"dim": self.dim, "capacity": self.capacity, "embedder": self.embedder_name}
+
+    def _open_memmap(self, path: str) -> np.ndarray:
+        log_path = f"{path}.jsonl"
+        header = None
+        if os.path.exists(path) and os.path.exists(log_path):
+            with open(log_path, encoding="utf-8") as f:
+                first = f.readline()
+            try:
+                header = json.loads(first) if first else None
+            except json.JSONDecodeError:
+                header = None
+        reuse = header == self._header() and os.path.getsize(path) == self.capacity * self.dim * 4
+        # Rohdatei ohne eigenen Header – Dimension/Kapazität stehen im Log
+        mapped = np.memmap(path, dtype=np.float32, mode="r+" if reuse else "w+", shape=(self.capacity, self.dim))
+        if reuse:
+            self._replay(log_path)
+        else:
+            self._rewrite_log()
+        return mapped
+
+    def _replay(self, log_path: str) -> None:
+        now_wall, now = time.time(), time.monotonic()
+        with open(log_path, encoding="utf-8") as f:
+            next(f)  # Header
+            for line in f:
+                self._log_lines += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # abgeschnittene letzte Zeile nach Absturz
+                slot = record["slot"]
+                if "entry" in record:
+                    self._place(slot, record["entry"])
+                    # Wanduhr → monotonic: ältere Einträge werden zuerst verdrängt
+                    self.last_used[slot] = now - (now_wall - record["entry"]["at"])
+                elif self.entries[slot] is not None:
+                    self._clear(slot)
+
+    def _rewrite_log(self) -> None:
+        if not self.path:
+            return
+        with self._io_lock:
+            self._write_log()
+
+    def _write_log(self) -> None:
+        tmp = f"{self.path}.jsonl.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self._header()) + "\n")
+            for slot, entry in enumerate(self.entries):
+                if entry is not None:
+                    f.write(json.dumps({"slot": slot, "entry": entry}) + "\n")
+        os.replace(tmp, f"{self.path}.jsonl")
+        self._log_lines = int(self.used.sum())
+
+    def persist(self, records: list[dict[str, Any]]) -> None:
+        """Flusht die Vektoren und hängt records ans Log an (blockierend → Worker-Thread)."""
+        if not self.path or not records:
+            return
+        with self._io_lock:
+            if isinstance(self.vectors, np.memmap):
+                self.vectors.flush()
+            with open(f"{self.path}.jsonl", "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+            self._log_lines += len(records)
+            # Log kompaktieren, wenn es deutlich länger als der Index ist
+            if self._log_lines > 2 * self.capacity:
+                self._write_log()
+
+    # === Slots ===
+
+    def _place(self, slot: int, entry: dict[str, Any]) -> None:
+        previous = self.entries[slot]
+        if previous is not None:
+            self._keys.pop(previous["key"], None)
+        self.entries[slot] = entry
+        self._keys[entry["key"]] = slot
+        self.used[slot] = True
+
+    def _clear(self, slot: int) -> None:
+        entry = self.entries[slot]
+        if entry is not None:
+            self._keys.pop(entry["key"], None)
+        self.entries[slot] = None
+        self.used[slot] = False
+
+    def add(self, vector: np.ndarray, entry: dict[str, Any]) -> int:
+        """Schreibt einen Eintrag (gleicher Prompt → gleicher Slot, sonst frei bzw. LRU).
+
+        Nur im Speicher; persistiert wird mit persist([{"slot", "entry"}]).
+        """
+        slot = self._keys.get(entry["key"])
+        if slot is None:
+            free = np.flatnonzero(~self.used)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self.last_used))
+                self.evictions += 1
+        self.vectors[slot] = vector
+        self._place(slot, entry)
+        self.last_used[slot] = time.monotonic()
+        return slot
+
+    def remove(self, slot: int) -> None:
+        """Nur im Speicher; persistiert wird mit persist([{"slot"}])."""
+        self._clear(slot)
+
+    def search(self, queries: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Bester Slot und Kosinus-Ähnlichkeit pro Anfrage (ein Matrixprodukt für alle)."""
+        if not self.used.any():
+            return np.full(len(queries), -1), np.full(len(queries), -1.0, dtype=np.float32)
+        scores = queries @ self.vectors.T
+        scores[:, ~self.used] = -np.inf
+        best = np.argmax(scores, axis=1)
+        return best, scores[np.arange(len(queries)), best]
+
+    def clear(self) -> None:
+        self.used[:] = False
+        self.entries = [None] * self.capacity
+        self._keys.clear()
+        self._rewrite_log()
+
+    def __len__(self) -> int:
+        return int(self.used.sum())
+
+
+class SemanticCache:
+    """Prompt → Context-Antwort per Embedding-Ähnlichkeit (Schwelle threshold)."""
+
+    def __init__(
+        self,
+        embedder: EmbeddingFunction,
+        dim: int,
+        capacity: int = 5000,
+        threshold: float = 0.9,
+        ttl_seconds: float = 86400.0,
+        path: str | None = None,
+    ):
+        self.embedder = embedder
+        self.dim = dim
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        name = getattr(embedder, "name", getattr(embedder, "__qualname__", type(embedder).__name__))
+        self.index = VectorIndex(dim, capacity, path, embedder_name=name)
+        self.stats = {
+            "lookups": 0,
+            "hits": 0,
+            "misses": 0,
+            "anchor_mismatches": 0,
+            "stores": 0,
+            "expired": 0,
+            "similarity_sum": 0.0,
+        }
+
+    async def _embed(self, texts: list[str]) -> np.ndarray:
+        result = self.embedder(texts)
+        if inspect.isawaitable(result):
+            result = await result
+        matrix = _normalize(result)
+        if matrix.shape != (len(texts), self.dim):
+            raise ValueError(f"Embedding shape {matrix.shape} does not match ({len(texts)}, {self.dim})")
+        return matrix
+
+    async def lookup(self, prompt: str) -> dict[str, Any] | None:
+        return (await self.lookup_many([prompt]))[0]
+
+    async def lookup_many(self, prompts: list[str]) -> list[dict[str, Any] | None]:
+        """Pro Prompt {"response", "prompt", "similarity"} oder None (unter der Schwelle)."""
+        if not prompts:
+            return []
+        queries = await self._embed(prompts)
+        slots, scores = self.index.search(queries)
+        now_wall, now = time.time(), time.monotonic()
+        results: list[dict[str, Any] | None] = []
+        expired: list[dict[str, Any]] = []
+        for prompt, slot, score in zip(prompts, slots.tolist(), scores.tolist()):
+            self.stats["lookups"] += 1
+            entry = self.index.entries[slot] if slot >= 0 else None
+            if entry is not None and now_wall - entry["at"] > self.ttl_seconds:
+                self.index.remove(slot)
+                expired.append({"slot": slot})
+                self.stats["expired"] += 1
+                entry = None
+            if entry is not None and score >= self.threshold and entry.get("anchor") != anchor(prompt):
+                # Gleiche Anweisung, anderer markierter Begriff → andere Frage
+                self.stats["anchor_mismatches"] += 1
+                entry = None
+            if entry is None or score < self.threshold:
+                self.stats["misses"] += 1
+                results.append(None)
+                continue
+            self.index.last_used[slot] = now
+            self.stats["hits"] += 1
+            self.stats["similarity_sum"] += score
+            results.append({"response": entry["response"], "prompt": entry["prompt"], "similarity": round(score, 4)})
+        await self._persist(expired)
+        return results
+
+    async def store(self, prompt: str, response: str) -> None:
+        if not response:
+            return
+        vector = (await self._embed([prompt]))[0]
+        entry = {
+            "key": normalize_prompt(prompt),
+            "anchor": anchor(prompt),
+            "prompt": prompt,
+            "response": response,
+            "at": time.time(),
+        }
+        slot = self.index.add(vector, entry)
+        self.stats["stores"] += 1
+        await self._persist([{"slot": slot, "entry": entry}])
+
+    async def _persist(self, records: list[dict[str, Any]]) -> None:
+        if self.index.path and records:
+            await asyncio.to_thread(self.index.persist, records)
+
+    def clear(self) -> None:
+        self.index.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        hits = self.stats["hits"]
+        lookups = self.stats["lookups"]
+        return {
+            **{key: value for key, value in self.stats.items() if key != "similarity_sum"},
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "avg_hit_similarity": round(self.stats["similarity_sum"] / hits, 4) if hits else 0.0,
+            "entries": len(self.index),
+            "capacity": self.index.capacity,
+            "evictions": self.index.evictions,
+            "threshold": self.threshold,
+            "embedder": self.index.embedder_name,
+            "persistent": self.index.path is not None,
+        }
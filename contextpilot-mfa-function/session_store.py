@@ -0,0 +1,175 @@
+"""Session-Store für Folgefragen im selben Meeting.
+
+Mit "session_id" im /mfa-Request merkt sich der Worker pro Session die
+letzten Turns (Frage, Routing, Agent-Antworten, finale Antwort). Eine
+Folgefrage ("und im letzten Quartal?") muss dann nur das Delta schicken:
+
+- Triage und Agents bekommen die Folgefrage plus eine gekürzte Fassung NUR des
+  letzten Turns (Frage + Antwort, zusammen höchstens context_tokens). Der volle
+  Verlauf ginge sonst bei jeder Folgefrage an Triage und jeden Agent.
+- Der Synthesizer bekommt zusätzlich die gespeicherten Web-/Context-Antworten
+  des letzten Turns als frühere Ergebnisse.
+
+Eviction: Sessions verfallen nach ttl_seconds ohne Aktivität; überschreitet
+der geschätzte Speicher max_bytes (oder die Anzahl max_sessions), werden die
+am längsten inaktiven Sessions verworfen. Pro Session bleiben max_turns Turns.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+from admission import estimate_tokens
+
+
+def _clip(text: str, tokens: int) -> str:
+    """Kürzt text auf ~tokens (4 Zeichen/Token), bevorzugt am Satz-, sonst am Wortende."""
+    if tokens <= 0:
+        return ""
+    if estimate_tokens(text) <= tokens:
+        return text
+    cut = text[: tokens * 4]
+    sentence_end = max(cut.rfind(". "), cut.rfind("\n"))
+    if sentence_end >= len(cut) // 2:
+        return cut[: sentence_end + 1].rstrip() + " …"
+    return cut.rsplit(" ", 1)[0] + " …"
+
+
+def _turn_bytes(turn: dict[str, Any]) -> int:
+    texts = [turn["prompt"], turn["response"], *turn["outputs"].values()]
+    return sum(len(text.encode("utf-8")) for text in texts) + 256  # + Overhead für dict/Routing
+
+
+class _Session:
+    __slots__ = ("turns", "updated_at", "bytes")
+
+    def __init__(self, max_turns: int):
+        self.turns: deque[dict[str, Any]] = deque(maxlen=max_turns)
+        self.updated_at = time.monotonic()
+        self.bytes = 0
+
+
+class SessionStore:
+    """Begrenzter In-Memory-Store für Session-Verläufe (LRU nach letzter Aktivität)."""
+
+    def __init__(
+        self,
+        max_sessions: int = 500,
+        max_turns: int = 10,
+        ttl_seconds: float = 7200.0,
+        max_bytes: int = 32 * 1024 * 1024,
+        context_tokens: int = 800,
+    ):
+        self.max_sessions = max_sessions
+        self.max_turns = max_turns
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.context_tokens = context_tokens
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._bytes = 0
+        self.stats = {"turns": 0, "follow_ups": 0, "expired": 0, "evicted": 0}
+
+    def _drop(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id)
+        self._bytes -= session.bytes
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        # OrderedDict ist nach letzter Aktivität sortiert → abgelaufene stehen vorne
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if now - session.updated_at < self.ttl_seconds:
+                break
+            self._drop(session_id)
+            self.stats["expired"] += 1
+
+    def turns(self, session_id: str) -> list[dict[str, Any]]:
+        """Bisherige Turns einer Session (älteste zuerst); leer für neue/abgelaufene Sessions."""
+        self._purge()
+        session = self._sessions.get(session_id)
+        return list(session.turns) if session is not None else []
+
+    def append(
+        self,
+        session_id: str,
+        prompt: str,
+        response: str,
+        routing: dict[str, Any],
+        outputs: dict[str, str],
+    ) -> None:
+        """Speichert einen abgeschlossenen Turn und erzwingt die Speichergrenzen."""
+        self._purge()
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = _Session(self.max_turns)
+        turn = {"prompt": prompt, "response": response, "routing": routing, "outputs": outputs, "at": time.time()}
+        if len(session.turns) == session.turns.maxlen:
+            dropped = session.turns[0]
+            session.bytes -= _turn_bytes(dropped)
+            self._bytes -= _turn_bytes(dropped)
+        session.turns.append(turn)
+        size = _turn_bytes(turn)
+        session.bytes += size
+        self._bytes += size
+        session.updated_at = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        self.stats["turns"] += 1
+        # Speicher-/Anzahl-Grenze: am längsten inaktive Sessions zuerst (nie die aktuelle)
+        while (self._bytes > self.max_bytes or len(self._sessions) > self.max_sessions) and len(self._sessions) > 1:
+            self._drop(next(iter(self._sessions)))
+            self.stats["evicted"] += 1
+
+    def delete(self, session_id: str) -> bool:
+        if session_id not in self._sessions:
+            return False
+        self._drop(session_id)
+        return True
+
+    def contextualize(self, prompt: str, turns: list[dict[str, Any]]) -> str:
+        """Folgefrage + gekürzter letzter Turn (Token-Budget context_tokens).
+
+        Ältere Turns fließen nicht ein: ihr Inhalt steckt meist schon in der
+        letzten Antwort, und jeder Turn kostet Tokens in Triage und allen Agents.
+        """
+        if not turns:
+            return prompt
+        last = turns[-1]
+        # Frage höchstens ein Viertel des Budgets, der Rest für die Antwort
+        question = _clip(last["prompt"], self.context_tokens // 4)
+        answer = _clip(last["response"], self.context_tokens - estimate_tokens(question))
+        if not question:
+            return prompt
+        self.stats["follow_ups"] += 1
+        return f"""PREVIOUS TURN (shortened):
+Q: {question}
+A: {answer}
+
+FOLLOW-UP QUESTION:
+{prompt}"""
+
+    def snapshot(self, session_id: str | None = None) -> dict[str, Any]:
+        self._purge()
+        if session_id is not None:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return {}
+            return {
+                "session_id": session_id,
+                "bytes": session.bytes,
+                "idle_seconds": round(time.monotonic() - session.updated_at, 1),
+                "turns": [
+                    {"prompt": t["prompt"], "routing": t["routing"], "agents": sorted(t["outputs"]), "at": t["at"]}
+                    for t in session.turns
+                ],
+            }
+        return {
+            **self.stats,
+            "sessions": len(self._sessions),
+            "bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "max_bytes": self.max_bytes,
+            "max_turns": self.max_turns,
+            "ttl_seconds": self.ttl_seconds,
+        }
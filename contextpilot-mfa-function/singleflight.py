@@ -0,0 +1,68 @@
+"""Single-Flight: gleichzeitige identische Requests teilen sich einen Workflow.
+
+Klicken mehrere Teilnehmer im selben Meeting innerhalb von Sekunden auf
+dieselbe Frage, startet nur der erste ("Leader") den Workflow; alle
+weiteren warten auf dasselbe Ergebnis (bzw. denselben Fehler).
+
+Bricht ein wartender Aufrufer ab (Client weg), läuft der gemeinsame
+Workflow für die übrigen weiter (asyncio.shield). Geht der letzte Wartende,
+wird er abgebrochen – sonst liefe er ohne Abnehmer weiter und hielte
+Admission-Slots und TPM-Budget.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Dedupliziert laufende Aufrufe pro Key."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[str, asyncio.Task[T]] = {}
+        self.stats = {"leaders": 0, "coalesced": 0, "max_waiters": 0, "abandoned": 0}
+        self._waiters: dict[str, int] = {}
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Führt factory() einmal pro Key aus. Liefert (Ergebnis, coalesced)."""
+        task = self._inflight.get(key)
+        coalesced = task is not None
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda _: self._forget(key, task))
+            self.stats["leaders"] += 1
+        else:
+            self.stats["coalesced"] += 1
+        self._waiters[key] += 1
+        self.stats["max_waiters"] = max(self.stats["max_waiters"], self._waiters[key])
+        try:
+            return await asyncio.shield(task), coalesced
+        finally:
+            if key in self._waiters and self._inflight.get(key) is task:
+                self._waiters[key] -= 1
+                if self._waiters[key] == 0 and not task.done():
+                    # Sofort austragen: neue Aufrufer starten frisch statt auf den Abbruch zu warten
+                    del self._inflight[key]
+                    del self._waiters[key]
+                    self.stats["abandoned"] += 1
+                    task.cancel()
+
+    def _forget(self, key: str, task: asyncio.Task[T]) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+            del self._waiters[key]
+        if not task.cancelled():
+            task.exception()  # Fehler gehen an die Wartenden; hier nur als abgerufen markieren
+
+    def snapshot(self) -> dict[str, Any]:
+        total = self.stats["leaders"] + self.stats["coalesced"]
+        return {
+            **self.stats,
+            "in_flight": len(self._inflight),
+            "coalesced_rate": round(self.stats["coalesced"] / total, 3) if total else 0.0,
+        }
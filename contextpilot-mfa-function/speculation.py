@@ -0,0 +1,102 @@
+"""Spekulative Ausführung: Agents starten, während AURATriage noch läuft.
+
+SpeculationPolicy sagt aus der jüngsten Routing-Historie voraus, welche
+Branches (web/context) wahrscheinlich gebraucht werden. Bestätigt die
+Triage einen Branch, wird sein Ergebnis übernommen; schließt sie ihn aus,
+wird er abgebrochen und zählt als verschwendeter Aufruf.
+
+Verschwendete Aufrufe sind pro Deployment budgetiert (gleitendes
+60s-Fenster), weil das Foundry-Deployment auf 50k TPM begrenzt ist.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any
+
+BRANCHES = ("web", "context")
+
+
+class SpeculationPolicy:
+    """Vorhersage aus Routing-Historie plus Budget für verschwendete Aufrufe."""
+
+    def __init__(
+        self,
+        deployment: str,
+        default_branches: tuple[str, ...] = ("context",),
+        history_size: int = 50,
+        min_samples: int = 10,
+        min_probability: float = 0.6,
+        max_wasted_per_minute: int = 5,
+    ):
+        self.deployment = deployment
+        self.default_branches = tuple(b for b in default_branches if b in BRANCHES)
+        self.min_samples = min_samples
+        self.min_probability = min_probability
+        self.max_wasted_per_minute = max_wasted_per_minute
+        self._history: deque[dict[str, bool]] = deque(maxlen=history_size)
+        self._wasted: deque[float] = deque()
+        self.stats: dict[str, Any] = {
+            "started": 0,
+            "reused": 0,
+            "wasted": 0,
+            "skipped_budget": 0,
+            "branches": {branch: {"started": 0, "reused": 0, "wasted": 0} for branch in BRANCHES},
+        }
+
+    def probabilities(self) -> dict[str, float]:
+        """Anteil der letzten Requests, die den jeweiligen Branch brauchten."""
+        if not self._history:
+            return {branch: 0.0 for branch in BRANCHES}
+        return {
+            branch: sum(1 for entry in self._history if entry[branch]) / len(self._history)
+            for branch in BRANCHES
+        }
+
+    def predict(self) -> list[str]:
+        """Branches, die jetzt spekulativ gestartet werden sollen ([] = keine)."""
+        if not self._budget_left():
+            self.stats["skipped_budget"] += 1
+            return []
+        if len(self._history) < self.min_samples:
+            return list(self.default_branches)
+        return [b for b, p in self.probabilities().items() if p >= self.min_probability]
+
+    def record_routing(self, routing: dict[str, Any]) -> None:
+        """Fügt eine Routing-Entscheidung der Historie hinzu (direct zählt als keiner)."""
+        direct = bool(routing.get("direct"))
+        self._history.append({
+            "web": not direct and bool(routing.get("web")),
+            "context": not direct and bool(routing.get("context")),
+        })
+
+    def record_started(self, branch: str) -> None:
+        self.stats["started"] += 1
+        self.stats["branches"][branch]["started"] += 1
+
+    def record_reused(self, branch: str) -> None:
+        self.stats["reused"] += 1
+        self.stats["branches"][branch]["reused"] += 1
+
+    def record_wasted(self, branch: str) -> None:
+        self.stats["wasted"] += 1
+        self.stats["branches"][branch]["wasted"] += 1
+        self._wasted.append(time.monotonic())
+
+    def _budget_left(self) -> bool:
+        cutoff = time.monotonic() - 60.0
+        while self._wasted and self._wasted[0] < cutoff:
+            self._wasted.popleft()
+        return len(self._wasted) < self.max_wasted_per_minute
+
+    def snapshot(self) -> dict[str, Any]:
+        self._budget_left()  # Fenster aufräumen
+        return {
+            **self.stats,
+            "deployment": self.deployment,
+            "probabilities": {b: round(p, 3) for b, p in self.probabilities().items()},
+            "history": len(self._history),
+            "wasted_last_minute": len(self._wasted),
+            "max_wasted_per_minute": self.max_wasted_per_minute,
+        }
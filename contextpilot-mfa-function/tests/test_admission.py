@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from admission import AdmissionRejected, TokenBucketScheduler
+
+
+def test_admits_immediately_while_budget_lasts():
+    scheduler = TokenBucketScheduler(tokens_per_minute=6000)
+
+    async def run():
+        return await scheduler.admit(1000, "web")
+
+    assert asyncio.run(run()) == 1000
+    assert scheduler.stats["admitted"] == 1
+    assert scheduler.stats["queued"] == 0
+
+
+def test_rejects_when_wait_would_exceed_limit():
+    scheduler = TokenBucketScheduler(tokens_per_minute=600, max_queue_seconds=20)
+
+    async def run():
+        await scheduler.admit(600, "web")
+        await scheduler.admit(600, "web")
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        asyncio.run(run())
+    assert rejected.value.retry_after >= 59
+    assert scheduler.stats["rejected"] == 1
+
+
+def test_rejects_when_queue_is_full():
+    scheduler = TokenBucketScheduler(tokens_per_minute=6000, max_queue_length=1)
+
+    async def run():
+        await scheduler.admit(6000, "web")
+        first = asyncio.ensure_future(scheduler.admit(10, "web"))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(AdmissionRejected):
+                await scheduler.admit(10, "web")
+        finally:
+            first.cancel()
+
+    asyncio.run(run())
+
+
+def test_queue_serves_higher_priority_routes_first():
+    scheduler = TokenBucketScheduler(tokens_per_minute=6000)
+    order = []
+
+    async def request(route):
+        await scheduler.admit(10, route)
+        order.append(route)
+
+    async def run():
+        await scheduler.admit(6000, "web")
+        synthesis = asyncio.ensure_future(request("synthesis"))
+        await asyncio.sleep(0)
+        direct = asyncio.ensure_future(request("direct"))
+        await asyncio.gather(synthesis, direct)
+
+    asyncio.run(run())
+    assert order == ["direct", "synthesis"]
+    assert scheduler.stats["queued"] == 2
+
+
+def test_settle_refunds_overestimate():
+    scheduler = TokenBucketScheduler(tokens_per_minute=6000)
+
+    async def run():
+        charged = await scheduler.admit(4000, "synthesis")
+        scheduler.settle(charged, 1000)
+
+    asyncio.run(run())
+    assert scheduler.snapshot()["tokens_available"] >= 5000
+    assert scheduler.stats["settled_tokens"] == 1000
@@ -0,0 +1,155 @@
+import asyncio
+
+import pytest
+
+from agent_graph import AgentGraph
+
+NODES = [
+    {"name": "web", "agent": "web-agent", "when": ["web"]},
+    {"name": "context", "agent": "context-agent", "when": ["context"]},
+    {"name": "synthesizer", "agent": "synth-agent", "after": ["web", "context"], "join": "all", "prompt": "synthesis"},
+]
+BOTH = {"web": True, "context": True}
+
+
+def make_invoke(answers, delay=0.0, calls=None):
+    """answers: Agent → Antwort-Text oder Exception."""
+
+    async def invoke(node, inputs, stream):
+        if calls is not None:
+            calls.append((node.name, dict(inputs), stream))
+        await asyncio.sleep(delay)
+        answer = answers[node.agent]
+        if isinstance(answer, BaseException):
+            raise answer
+        if not stream:
+            yield answer
+            return
+        for word in answer.split(" "):
+            yield word + " "
+
+    return invoke
+
+
+def run_graph(graph, routing, invoke, **kwargs):
+    async def run():
+        graph_run = graph.run(routing, invoke, **kwargs)
+        events = [event async for event in graph_run]
+        return graph_run, events
+
+    return asyncio.run(run())
+
+
+def test_both_branches_feed_the_synthesizer():
+    calls = []
+    answers = {"web-agent": "W", "context-agent": "C", "synth-agent": "S"}
+    graph_run, _ = run_graph(AgentGraph(NODES), BOTH, make_invoke(answers, calls=calls))
+    assert graph_run.answer == "S"
+    assert graph_run.labels() == ["web-agent", "context-agent", "synth-agent"]
+    assert ("synthesizer", {"web": "W", "context": "C"}, False) in calls
+
+
+def test_partial_failure_skips_synthesizer_and_returns_surviving_branch():
+    calls = []
+    answers = {"web-agent": RuntimeError("429"), "context-agent": "C", "synth-agent": "S"}
+    graph = AgentGraph(NODES)
+    graph_run, events = run_graph(graph, BOTH, make_invoke(answers, calls=calls))
+    assert graph_run.answer == "C"
+    assert graph_run.answer_nodes == ["context"]
+    assert graph_run.errors == {"web": "RuntimeError: 429"}
+    assert graph_run.status["synthesizer"] == "skipped"
+    assert "synthesizer" not in [name for name, _, _ in calls]
+    assert {"event": "agent", "agent": "web-agent", "status": "failed", "error": "RuntimeError: 429"} in events
+    assert graph.stats["nodes"]["synthesizer"]["skipped"] == 1
+
+
+def test_join_any_runs_after_one_successful_dependency():
+    nodes = [*NODES[:2], {**NODES[2], "join": "any"}]
+    answers = {"web-agent": RuntimeError("down"), "context-agent": "C", "synth-agent": "S"}
+    graph_run, _ = run_graph(AgentGraph(nodes), BOTH, make_invoke(answers))
+    assert graph_run.answer == "S"
+
+
+def test_node_timeout_fails_the_node_and_reports_it():
+    timeouts = []
+    graph = AgentGraph(NODES, default_timeout=0.05)
+    answers = {"web-agent": "W", "context-agent": "C", "synth-agent": "S"}
+    graph_run, _ = run_graph(
+        graph, {"web": True}, make_invoke(answers, delay=1.0), on_timeout=lambda node, s: timeouts.append(node.name)
+    )
+    assert graph_run.errors == {"web": "timeout after 0.05s"}
+    assert graph_run.answer == ""
+    assert timeouts == ["web"]
+    assert graph.stats["nodes"]["web"]["timeouts"] == 1
+
+
+def test_single_sink_is_streamed():
+    answers = {"web-agent": "W", "context-agent": "eins zwei", "synth-agent": "S"}
+    graph_run, events = run_graph(AgentGraph(NODES), {"context": True}, make_invoke(answers), stream=True)
+    assert [event["delta"] for event in events if "delta" in event] == ["eins ", "zwei "]
+    assert graph_run.streamed == {"context"}
+
+
+def test_unavailable_node_fails_without_a_call():
+    calls = []
+    answers = {"web-agent": "W", "context-agent": "C", "synth-agent": "S"}
+    graph_run, _ = run_graph(AgentGraph(NODES), BOTH, make_invoke(answers, calls=calls), unavailable={"web"})
+    assert graph_run.errors == {"web": "circuit open"}
+    assert [name for name, _, _ in calls] == ["context"]
+    assert graph_run.answer == "C"
+
+
+def test_unused_speculative_result_is_cancelled():
+    answers = {"web-agent": "W", "context-agent": "C", "synth-agent": "S"}
+
+    async def run():
+        speculative = asyncio.ensure_future(asyncio.sleep(10, result="W"))
+        graph_run = AgentGraph(NODES).run({"context": True}, make_invoke(answers), preset={"web": speculative})
+        [event async for event in graph_run]
+        await asyncio.sleep(0)
+        return graph_run, speculative
+
+    graph_run, speculative = asyncio.run(run())
+    assert graph_run.answer == "C"
+    assert speculative.cancelled()
+
+
+def test_used_speculative_result_replaces_the_call():
+    calls = []
+    answers = {"web-agent": "W", "context-agent": "C", "synth-agent": "S"}
+
+    async def run():
+        speculative = asyncio.ensure_future(asyncio.sleep(0, result="W-spec"))
+        graph_run = AgentGraph(NODES).run(BOTH, make_invoke(answers, calls=calls), preset={"web": speculative})
+        [event async for event in graph_run]
+        return graph_run
+
+    graph_run = asyncio.run(run())
+    assert graph_run.outputs["web"] == "W-spec"
+    assert "web" not in [name for name, _, _ in calls]
+
+
+@pytest.mark.parametrize(
+    "nodes, message",
+    [
+        (
+            [{"name": "a", "agent": "x", "after": ["b"]}, {"name": "b", "agent": "y", "after": ["a"]}],
+            "cycle",
+        ),
+        ([{"name": "a", "agent": "x", "after": ["missing"]}], "unknown"),
+        ([{"name": "a", "agent": "x"}, {"name": "a", "agent": "y"}], "duplicate"),
+        ([{"name": "a", "agent": "x", "join": "most"}], "join"),
+        ([{"name": "a", "agent": "x", "prompt": "synthesis"}], "needs 'after'"),
+        ([{"name": "a", "agent": "$MFA_TEST_UNSET_AGENT"}], "unresolved"),
+    ],
+)
+def test_invalid_config_is_rejected(nodes, message, monkeypatch):
+    monkeypatch.delenv("MFA_TEST_UNSET_AGENT", raising=False)
+    with pytest.raises(ValueError, match=message):
+        AgentGraph(nodes)
+
+
+def test_plan_follows_routing_and_joins():
+    graph = AgentGraph(NODES)
+    assert graph.plan(BOTH) == ["web", "context", "synthesizer"]
+    assert graph.plan({"web": True}) == ["web"]
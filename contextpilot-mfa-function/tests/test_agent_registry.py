@@ -0,0 +1,89 @@
+import asyncio
+import contextlib
+import time
+
+import pytest
+
+pytest.importorskip("agent_framework")
+exceptions = pytest.importorskip("azure.core.exceptions")
+
+import agent_registry  # noqa: E402
+from agent_registry import AgentRegistry, _AgentHandle  # noqa: E402
+
+
+class FakeCredential:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def make_registry():
+    registry = AgentRegistry("https://example", "gpt")
+    opened = []
+
+    async def ensure_credential():
+        if registry._credential is None:
+            registry._credential = FakeCredential()
+        return registry._credential
+
+    async def open_handle(agent_name, deployment=None):
+        opened.append(agent_name)
+        return _AgentHandle(object(), contextlib.AsyncExitStack(), time.monotonic())
+
+    registry._ensure_credential = ensure_credential
+    registry._open = open_handle
+    return registry, opened
+
+
+class Throttled(Exception):
+    status_code = 429
+
+
+def test_transient_error_keeps_handle():
+    registry, opened = make_registry()
+
+    async def run():
+        with pytest.raises(Throttled):
+            async with registry.lease("web"):
+                raise Throttled()
+        async with registry.lease("web"):
+            pass
+
+    asyncio.run(run())
+    assert opened == ["web"]
+
+
+def test_not_found_drops_handle():
+    registry, opened = make_registry()
+
+    async def run():
+        with pytest.raises(exceptions.ResourceNotFoundError):
+            async with registry.lease("web"):
+                raise exceptions.ResourceNotFoundError("agent gone")
+        async with registry.lease("web"):
+            pass
+
+    asyncio.run(run())
+    assert opened == ["web", "web"]
+
+
+def test_invalidate_closes_credential_after_last_lease():
+    registry, _ = make_registry()
+
+    async def run():
+        async with registry.lease("web"):
+            credential = registry._credential
+            await registry.invalidate()
+            assert not credential.closed
+        return credential
+
+    assert asyncio.run(run()).closed
+
+
+def test_stale_error_follows_cause_chain():
+    wrapper = RuntimeError("service failed")
+    wrapper.__cause__ = exceptions.ClientAuthenticationError("expired")
+    assert agent_registry._is_stale_handle_error(wrapper)
+    assert not agent_registry._is_stale_handle_error(Throttled())
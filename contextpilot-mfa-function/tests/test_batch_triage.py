@@ -0,0 +1,98 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+TOOLS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools")
+ENV = {
+    "AZURE_AI_PROJECT_ENDPOINT": "https://mock.invalid",
+    "AZURE_AI_MODEL_DEPLOYMENT_NAME": "mock",
+    "AURA_TRIAGE_AGENT_NAME": "AURATriage",
+    "AURA_WEB_AGENT_NAME": "AURAContextPilotWeb",
+    "AURA_CONTEXT_AGENT_NAME": "AURAContextPilot",
+    "AURA_SYNTHESIZER_AGENT_NAME": "AURAContextPilotResponseSynthesizer",
+}
+
+
+@pytest.fixture(scope="module")
+def workflow():
+    """mfa_workflow gegen tools/mock_foundry importieren; sys.modules danach zurücksetzen."""
+    modules, environ, path = dict(sys.modules), dict(os.environ), list(sys.path)
+    os.environ.update(ENV)
+    sys.path.insert(0, TOOLS)
+    try:
+        import mock_foundry
+
+        mock_foundry.install()
+        import mfa_workflow
+
+        yield mfa_workflow
+    finally:
+        sys.modules.clear()
+        sys.modules.update(modules)
+        os.environ.clear()
+        os.environ.update(environ)
+        sys.path[:] = path
+
+
+def batch_triage(workflow, monkeypatch, prompts, answer):
+    sent = []
+
+    async def run_agent(agent_name, prompt, share=1.0):
+        sent.append((agent_name, prompt))
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(workflow, "_run_agent", run_agent)
+    return asyncio.run(workflow._batch_triage(prompts)), sent
+
+
+def test_parse_triage_response_formats(workflow):
+    parse = workflow.parse_triage_response
+    routing = parse('{"routing": {"direct": false, "web": true}, "reasoning": "aktuell"}')
+    assert (routing["direct"], routing["web"], routing["context"], routing["reasoning"]) == (False, True, False, "aktuell")
+    assert parse('{"agents": {"context": true}}')["context"] is True
+    assert parse('{"foo": 1}')["reasoning"] == "Unknown format fallback"
+    direct = parse("Hallo heißt auf Englisch Hello.")
+    assert direct["direct"] is True
+    assert direct["direct_response"] == "Hallo heißt auf Englisch Hello."
+
+
+def test_strip_code_fence(workflow):
+    assert workflow._strip_code_fence('```json\n[{"a": 1}]\n```') == '[{"a": 1}]\n'
+    assert workflow._strip_code_fence('  [1, 2]  ') == "[1, 2]"
+
+
+def test_batch_routes_each_prompt_in_order(workflow, monkeypatch):
+    answer = json.dumps([
+        {"routing": {"direct": False, "web": True, "context": False}},
+        {"routing": {"direct": False, "web": False, "context": True}},
+    ])
+    routings, sent = batch_triage(workflow, monkeypatch, ["News heute?", "Projekt Phoenix?"], f"```json\n{answer}\n```")
+    assert [(r["web"], r["context"], r["batch_triage"]) for r in routings] == [(True, False, True), (False, True, True)]
+    assert sent[0][0] == "AURATriage"
+    assert "1. News heute?\n2. Projekt Phoenix?" in sent[0][1]
+
+
+def test_unusable_items_fall_back_individually(workflow, monkeypatch):
+    answer = json.dumps([{"routing": {"direct": True}}, {"reasoning": "ohne routing"}])
+    routings, _ = batch_triage(workflow, monkeypatch, ["A?", "B?"], answer)
+    assert routings[0]["direct"] is True
+    assert routings[1] is None
+
+
+@pytest.mark.parametrize(
+    "answer",
+    [
+        "Das kann ich direkt beantworten.",
+        json.dumps([{"routing": {"web": True}}]),
+        json.dumps({"routing": {"web": True}}),
+        RuntimeError("429"),
+    ],
+)
+def test_unusable_answer_falls_back_to_per_prompt_triage(workflow, monkeypatch, answer):
+    routings, _ = batch_triage(workflow, monkeypatch, ["A?", "B?"], answer)
+    assert routings == [None, None]
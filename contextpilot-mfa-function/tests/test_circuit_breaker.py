@@ -0,0 +1,57 @@
+import pytest
+
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, BreakerRegistry, CircuitBreaker, CircuitOpen
+
+
+def test_opens_on_failure_rate_after_min_calls():
+    breaker = CircuitBreaker(failure_rate=0.5, min_calls=4)
+    for ok in (True, False, True):
+        breaker.record(ok, 0.1)
+    assert breaker.state == CLOSED
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats["rejected"] == 1
+
+
+def test_opens_on_slow_calls():
+    breaker = CircuitBreaker(slow_call_seconds=1.0, slow_call_rate=0.5, min_calls=2)
+    breaker.record(True, 2.0)
+    breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_allows_one_probe():
+    breaker = CircuitBreaker(min_calls=1, cooldown_seconds=60.0)
+    breaker.record(False, 0.1)
+    breaker._opened_at -= 60.0  # Cooldown abgelaufen
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # Probe läuft noch
+
+
+def test_probe_result_closes_or_reopens():
+    breaker = CircuitBreaker(min_calls=1, cooldown_seconds=0.0)
+    breaker.record(False, 0.1)
+    assert breaker.allow()
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+
+    breaker.record(False, 0.1)
+    assert breaker.allow()
+    breaker.record(False, 0.1, "TimeoutError: node timeout of 90s exceeded")
+    assert breaker.state == OPEN
+    assert breaker.stats["opened"] == 3
+    assert breaker.stats["last_error"].startswith("TimeoutError")
+
+
+def test_registry_check_raises_circuit_open():
+    breakers = BreakerRegistry(min_calls=1, cooldown_seconds=30.0)
+    breakers.check("web")
+    breakers.record("web", False, 0.1)
+    with pytest.raises(CircuitOpen) as rejected:
+        breakers.check("web")
+    assert rejected.value.agent == "web"
+    assert 0 < rejected.value.retry_after <= 30.0
+    assert breakers.open_agents() == ["web"]
+    assert not breakers.is_open("context")
@@ -0,0 +1,49 @@
+from admission import estimate_tokens
+from compaction import TRIMMED_MARKER, SynthesisCompactor, split_response
+
+
+def test_split_response_separates_sources():
+    lines, sources = split_response(
+        "Der Umsatz stieg um 5 Mrd. Euro. Die Marge blieb stabil.\n\nSources:\n[1] https://example.com/a\nhttps://example.com/b"
+    )
+    assert lines[0] == ["Der Umsatz stieg um 5 Mrd. Euro.", "Die Marge blieb stabil."]
+    assert sources == ["[1] https://example.com/a", "https://example.com/b"]
+
+
+def test_duplicate_sentences_stay_in_the_context_answer():
+    shared = "Swiss Post migriert bis 2026 alle Standorte auf Microsoft 365."
+    compactor = SynthesisCompactor(token_budget=0)
+    compacted, report = compactor.compact_all({
+        "web": f"{shared} Die Presse berichtet positiv.",
+        "context": f"{shared} Intern ist Phase 2 gestartet.",
+    })
+    assert compacted["context"] == f"{shared} Intern ist Phase 2 gestartet."
+    assert compacted["web"] == "Die Presse berichtet positiv."
+    assert list(compacted) == ["web", "context"]
+    assert report["duplicates_removed"] == 1
+
+
+def test_sources_are_kept_once():
+    compactor = SynthesisCompactor(token_budget=0)
+    compacted, _ = compactor.compact_all({
+        "web": "Erster Satz zum Thema.\n\nSources:\n[1] https://example.com/a\n[2] https://example.com/b",
+        "context": "Ein anderer Satz.\n\nSources:\n[1] https://example.com/a",
+    })
+    assert compacted["context"].endswith("Sources:\n[1] https://example.com/a")
+    assert compacted["web"].endswith("Sources:\n[2] https://example.com/b")
+
+
+def test_trims_to_budget_and_keeps_urls_of_dropped_sentences():
+    sentences = [f"Satz Nummer {i} enthält ein paar zusätzliche Details zum Projekt." for i in range(40)]
+    sentences[-1] = "Details stehen unter https://example.com/spaeter im Bericht."
+    compactor = SynthesisCompactor(token_budget=50)
+    compacted, report = compactor.compact_all({"web": " ".join(sentences)})
+    text = compacted["web"]
+    assert report["trimmed"] is True
+    assert text.startswith("Satz Nummer 0 ")
+    assert TRIMMED_MARKER in text
+    assert text.endswith("Sources:\nhttps://example.com/spaeter")
+    body = text.split(TRIMMED_MARKER)[0]
+    assert estimate_tokens(body) <= 50 + 5
+    assert report["tokens_saved"] > 0
+    assert compactor.stats["trimmed"] == 1
@@ -0,0 +1,21 @@
+import pytest
+
+from env import env_flag
+
+
+@pytest.mark.parametrize("value", ["1", "true", "TRUE", "yes", " Yes "])
+def test_truthy_values(monkeypatch, value):
+    monkeypatch.setenv("MFA_TEST_FLAG", value)
+    assert env_flag("MFA_TEST_FLAG", False) is True
+
+
+@pytest.mark.parametrize("value", ["0", "false", "no", "", "off"])
+def test_other_values_are_false(monkeypatch, value):
+    monkeypatch.setenv("MFA_TEST_FLAG", value)
+    assert env_flag("MFA_TEST_FLAG", True) is False
+
+
+def test_unset_uses_default(monkeypatch):
+    monkeypatch.delenv("MFA_TEST_FLAG", raising=False)
+    assert env_flag("MFA_TEST_FLAG", True) is True
+    assert env_flag("MFA_TEST_FLAG", False) is False
@@ -0,0 +1,48 @@
+import json
+
+from fast_router import DEFAULT_RULES, FastRouter
+from response_cache import route_of
+
+
+def make_router(**kwargs):
+    return FastRouter(DEFAULT_RULES, internal_terms=["Projekt Phoenix"], **kwargs)
+
+
+def test_clear_prompts_take_the_fast_path():
+    router = make_router()
+    assert route_of(router.classify("Übersetze das bitte auf Englisch")) == "direct"
+    assert route_of(router.classify("Was gibt es heute für News?")) == "web"
+    assert route_of(router.classify("Wie steht es um Projekt Phoenix?")) == "context"
+    assert router.stats["fast_path"] == 3
+
+
+def test_web_and_context_signals_route_to_synthesis():
+    routing = make_router().classify("Aktuelle News zu Projekt Phoenix")
+    assert route_of(routing) == "synthesis"
+    assert routing["fast_path"] is True
+    assert set(routing["fast_path_rules"]) == {"current_events", "internal_terms"}
+
+
+def test_ambiguous_and_long_prompts_fall_through():
+    router = make_router()
+    assert router.classify("Wie sollen wir weiter vorgehen?") is None
+    assert router.classify("heute " * 100) is None
+    assert router.stats["fallthrough"] == 2
+
+
+def test_explain_does_not_count():
+    router = make_router()
+    assert router.explain("Übersetze das auf Englisch") is not None
+    assert router.stats["fast_path"] == 0
+
+
+def test_from_config_reads_rules_and_threshold(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({
+        "threshold": 0.5,
+        "rules": [{"name": "pricing", "route": "context", "weight": 0.5, "keywords": ["preisliste"]}],
+    }), encoding="utf-8")
+    router = FastRouter.from_config(str(path), internal_terms=[], threshold=0.9)
+    assert router.threshold == 0.5
+    assert route_of(router.classify("Wo liegt die Preisliste?")) == "context"
+    assert router.classify("Übersetze das auf Englisch") is None
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from hedging import HedgePolicy, budget, deadline_scope
+
+
+def sleeper(seconds_by_deployment, fail=False):
+    async def attempt(deployment):
+        await asyncio.sleep(seconds_by_deployment[deployment])
+        if fail:
+            raise RuntimeError("boom")
+        return f"answer from {deployment}"
+
+    return attempt
+
+
+def test_threshold_needs_min_samples():
+    policy = HedgePolicy(percentile=0.95, min_samples=3)
+    policy.record("a", 1.0)
+    policy.record("a", 2.0)
+    assert policy.threshold("a") is None
+    policy.record("a", 3.0)
+    assert policy.threshold("a") == 3.0
+
+
+def test_timeout_is_recorded_as_budget():
+    policy = HedgePolicy(min_samples=1)
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.call("a", sleeper({None: 1.0}), timeout=0.05)
+
+    asyncio.run(run())
+    assert list(policy._latencies["a"]) == [pytest.approx(0.05)]
+
+
+def test_failed_attempt_is_recorded():
+    policy = HedgePolicy(min_samples=1)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await policy.call("a", sleeper({None: 0.02}, fail=True), timeout=1.0)
+
+    asyncio.run(run())
+    assert len(policy._latencies["a"]) == 1
+
+
+def test_losing_attempt_is_recorded_and_hedge_wins():
+    policy = HedgePolicy(min_samples=1, max_hedge_ratio=1.0, alternate_deployment="alt")
+    policy.record("a", 0.02)
+
+    async def run():
+        return await policy.call("a", sleeper({None: 1.0, "alt": 0.01}), timeout=2.0)
+
+    assert asyncio.run(run()) == "answer from alt"
+    samples = list(policy._latencies["a"])[1:]
+    # Gewinner (Hedge) und abgebrochener Primärversuch (mindestens bis zum Hedge-Ende)
+    assert len(samples) == 2
+    assert max(samples) >= 0.02
+    assert policy.stats["hedge_wins"] == 1
+
+
+def test_hedge_budget_limits_duplicate_calls():
+    policy = HedgePolicy(min_samples=1, max_hedge_ratio=0.5)
+    policy.record("a", 0.001)
+    policy._recent.append(True)  # Budget bereits ausgeschöpft
+
+    async def run():
+        return await policy.call("a", sleeper({None: 0.02}), timeout=1.0)
+
+    assert asyncio.run(run()) == "answer from None"
+    assert policy.stats["hedged"] == 0
+    assert policy.stats["skipped_budget"] == 1
+
+
+def test_budget_share_of_deadline():
+    async def run():
+        assert budget() is None
+        with deadline_scope(10.0):
+            assert budget(0.5) == pytest.approx(5.0, abs=0.1)
+
+    asyncio.run(run())
@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from hedging import budget
+from jobs import InMemoryJobStore, JobManager, JobStoreFull, public_job
+
+
+def make_manager(workflow, **kwargs):
+    return JobManager(InMemoryJobStore(), workflow, public_routing=lambda routing: routing, **kwargs)
+
+
+def done_event(response):
+    return {"done": True, "response": response, "agents_used": [], "routing": {}}
+
+
+def test_job_runs_under_its_own_deadline():
+    async def workflow(prompt):
+        yield done_event(str(budget()))
+
+    async def run():
+        manager = make_manager(workflow, deadline_seconds=600)
+        job = await manager.submit("Frage", "cid")
+        await asyncio.sleep(0.01)
+        return await manager.store.get(job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == "succeeded"
+    assert float(job["result"]["output_text"]) == pytest.approx(600, abs=1)
+
+
+def slow_workflow(started=None):
+    async def workflow(prompt):
+        yield {"event": "routing", "routing": {"web": True}}
+        yield {"event": "agent", "agent": "web", "status": "started"}
+        if started is not None:
+            started.set()
+        await asyncio.sleep(10)
+        yield done_event("zu spät")
+
+    return workflow
+
+
+def test_submit_then_poll_until_succeeded():
+    async def workflow(prompt):
+        yield {"event": "routing", "routing": {"context": True}}
+        yield {"delta": "Teil", "partial": "Teil"}
+        yield done_event(f"Antwort auf {prompt}")
+
+    async def run():
+        manager = make_manager(workflow, flush_seconds=0)
+        job = await manager.submit("Frage", "cid")
+        assert job["status"] == "queued"
+        await asyncio.sleep(0.01)
+        return manager, await manager.store.get(job["job_id"])
+
+    manager, job = asyncio.run(run())
+    assert job["status"] == "succeeded"
+    assert job["routing"] == {"context": True}
+    assert job["result"]["output_text"] == "Antwort auf Frage"
+    assert manager.stats["succeeded"] == 1
+
+
+def test_cancel_stops_a_running_job():
+    async def run():
+        started = asyncio.Event()
+        manager = make_manager(slow_workflow(started))
+        job = await manager.submit("Frage", "cid")
+        await started.wait()
+        cancelled = await manager.cancel(job["job_id"])
+        return manager, cancelled
+
+    manager, job = asyncio.run(run())
+    assert job["status"] == "cancelled"
+    assert job["agents"] == {"web": "started"}
+    assert manager.stats["cancelled"] == 1
+    assert manager.snapshot()["running"] == 0
+
+
+def test_cancel_requested_by_another_worker_is_noticed():
+    async def workflow(prompt):
+        for i in range(100):
+            yield {"event": "agent", "agent": f"a{i}", "status": "started"}
+            await asyncio.sleep(0.01)
+        yield done_event("fertig")
+
+    async def run():
+        store = InMemoryJobStore()
+        manager = JobManager(store, workflow, public_routing=lambda routing: routing)
+        job = await manager.submit("Frage", "cid")
+        await asyncio.sleep(0.02)
+        # Anderer Worker: kennt den Task nicht, setzt nur das Flag
+        await store.update(job["job_id"], {"cancel_requested": True})
+        await asyncio.sleep(0.05)
+        return await store.get(job["job_id"])
+
+    assert asyncio.run(run())["status"] == "cancelled"
+
+
+def test_failed_workflow_marks_the_job_failed():
+    async def workflow(prompt):
+        raise RuntimeError("Foundry down")
+        yield  # pragma: no cover
+
+    async def run():
+        manager = make_manager(workflow)
+        job = await manager.submit("Frage", "cid")
+        await asyncio.sleep(0.01)
+        return await manager.store.get(job["job_id"])
+
+    job = asyncio.run(run())
+    assert job["status"] == "failed"
+    assert job["error"] == "Foundry down"
+
+
+def test_finished_jobs_expire_and_make_room():
+    async def run():
+        store = InMemoryJobStore(max_jobs=2, ttl_seconds=60)
+        await store.create({"job_id": "a", "status": "succeeded", "updated_at": 0.0})
+        expired = await store.get("a")
+        await store.create({"job_id": "b", "status": "succeeded", "updated_at": 1e12})
+        await store.create({"job_id": "c", "status": "running", "updated_at": 1e12})
+        await store.create({"job_id": "d", "status": "running", "updated_at": 1e12})
+        with pytest.raises(JobStoreFull):
+            await store.create({"job_id": "e", "status": "running", "updated_at": 1e12})
+        return expired, store
+
+    expired, store = asyncio.run(run())
+    assert expired is None
+    assert store.evictions == 1
+    assert store.snapshot()["by_status"] == {"running": 2}
+
+
+def test_public_job_hides_prompt_and_flags():
+    assert public_job({"job_id": "a", "prompt": "geheim", "cancel_requested": True}) == {"job_id": "a"}
@@ -0,0 +1,64 @@
+import pytest
+
+from metrics import Histogram, MetricsRegistry, MfaMetrics, _Metric
+
+
+def test_histogram_renders_cumulative_buckets_sum_and_count():
+    histogram = Histogram("mfa_seconds", "Latenz", ("route",), buckets=(1.0, 0.5))
+    for value in (0.2, 0.5, 0.7, 3.0):
+        histogram.observe(value, "web")
+    assert histogram.render() == [
+        "# HELP mfa_seconds Latenz",
+        "# TYPE mfa_seconds histogram",
+        'mfa_seconds_bucket{route="web",le="0.5"} 2',
+        'mfa_seconds_bucket{route="web",le="1"} 3',
+        'mfa_seconds_bucket{route="web",le="+Inf"} 4',
+        'mfa_seconds_sum{route="web"} 4.4',
+        'mfa_seconds_count{route="web"} 4',
+    ]
+    assert histogram.count("web") == 4
+    assert histogram.count("context") == 0
+
+
+def test_counter_and_gauge_series_with_escaped_labels():
+    registry = MetricsRegistry()
+    counter = registry.counter("mfa_total", "Requests", ("agent",))
+    gauge = registry.gauge("mfa_in_flight", "Laufend")
+    counter.inc('Web "Agent"')
+    counter.inc('Web "Agent"', amount=2)
+    gauge.inc()
+    gauge.dec(amount=0.5)
+    text = registry.render()
+    assert 'mfa_total{agent="Web \\"Agent\\""} 3\n' in text
+    assert "mfa_in_flight 0.5\n" in text
+    with pytest.raises(ValueError, match="already registered"):
+        registry.counter("mfa_total", "doppelt")
+
+
+def test_broken_callback_does_not_fail_the_scrape():
+    registry = MetricsRegistry()
+    registry.gauge_callback("mfa_queue", "Queue", lambda: {(): 1 / 0})
+    registry.gauge_callback("mfa_open", "Offene Breaker", lambda: {("web",): 1}, ("agent",))
+    text = registry.render()
+    assert "# mfa_queue unavailable: ZeroDivisionError" in text
+    assert 'mfa_open{agent="web"} 1' in text
+
+
+def test_metric_without_render_cannot_be_instantiated():
+    class Incomplete(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("mfa_x", "x")
+
+
+def test_mfa_metrics_record_requests_and_agent_calls():
+    metrics = MfaMetrics()
+    metrics.request_finished("web", "ok", 1.2, cached=True)
+    metrics.agent_finished("AURAContextPilotWeb", "ok", 1.1, prompt_tokens=100, completion_tokens=0)
+    assert metrics.requests.value("web", "ok") == 1
+    assert metrics.cache_hits.value("web") == 1
+    assert metrics.request_seconds.count("web") == 1
+    assert metrics.tokens.value("AURAContextPilotWeb", "prompt") == 100
+    assert ("AURAContextPilotWeb", "completion") not in metrics.tokens._values
+    assert 'mfa_agent_call_duration_seconds_bucket{agent="AURAContextPilotWeb",le="2.5"} 1' in metrics.render()
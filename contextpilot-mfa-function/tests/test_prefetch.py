@@ -0,0 +1,70 @@
+from prefetch import EXPAND_PROMPT, TranscriptPrefetcher, extract_candidates
+
+
+def test_extracts_projects_codes_and_acronyms_without_tags():
+    candidates = extract_candidates("[00:12] [MIC] Wir reden über Projekt Phoenix und die Migration auf SAP S4. Okay.")
+    assert candidates == [("Projekt Phoenix", "context"), ("SAP S4", "context"), ("SAP", "quick")]
+
+
+def test_term_needs_min_mentions_and_questions_one():
+    prefetcher = TranscriptPrefetcher(min_mentions=2)
+    assert prefetcher.ingest("meeting", ["Projekt Phoenix startet."]) == []
+    [candidate] = prefetcher.ingest("meeting", ["Bei Projekt Phoenix fehlt noch Budget."])
+    assert candidate["term"] == "Projekt Phoenix"
+    assert candidate["kind"] == "context"
+    assert candidate["prompt"] == EXPAND_PROMPT.format(text="Projekt Phoenix")
+    [question] = prefetcher.ingest("meeting", ["Wie hoch ist eigentlich das Budget dafür?"])
+    assert question["kind"] == "quick" and question["mentions"] == 1
+
+
+def test_streams_are_counted_separately():
+    prefetcher = TranscriptPrefetcher(min_mentions=2)
+    prefetcher.ingest("a", ["Projekt Phoenix startet."])
+    assert prefetcher.ingest("b", ["Projekt Phoenix startet."]) == []
+
+
+def test_budget_limits_reservations_and_settles_actual_tokens():
+    prefetcher = TranscriptPrefetcher(token_budget=1000, min_mentions=1)
+    first, second = (
+        {"term": term, "kind": "context", "prompt": EXPAND_PROMPT.format(text=term), "estimate": 600}
+        for term in ("Projekt Phoenix", "Projekt Atlas")
+    )
+    reservation = prefetcher.reserve(first)
+    assert prefetcher.reserve(second) is None
+    assert prefetcher.stats["skipped_budget"] == 1
+    prefetcher.completed(first, reservation, 300)
+    assert prefetcher.remaining() == 700
+    assert prefetcher.reserve(second) is not None
+
+
+def test_hits_and_expired_prefetches_are_accounted():
+    prefetcher = TranscriptPrefetcher(ttl_seconds=60.0)
+    hit, miss = (
+        {"term": term, "kind": "context", "prompt": EXPAND_PROMPT.format(text=term), "estimate": 500}
+        for term in ("Projekt Phoenix", "Projekt Atlas")
+    )
+    prefetcher.completed(hit, prefetcher.reserve(hit), 400)
+    prefetcher.completed(miss, prefetcher.reserve(miss), 300)
+    assert prefetcher.record_hit(hit["prompt"]) and prefetcher.record_hit(hit["prompt"])
+    assert not prefetcher.record_hit("Was kostet M365 E5?")
+    assert prefetcher.ingest("meeting", ["Bei Projekt Phoenix fehlt Budget.", "Projekt Phoenix."]) == []
+
+    for entry in prefetcher._prefetched.values():
+        entry["at"] -= 60.0  # TTL abgelaufen
+    snapshot = prefetcher.snapshot()
+    assert snapshot["hits"] == 1
+    assert snapshot["hit_rate"] == 0.5
+    assert snapshot["tokens_hit"] == 400
+    assert snapshot["tokens_wasted"] == 300
+    assert snapshot["entries"] == 0
+
+
+def test_released_prefetch_counts_spent_tokens_as_wasted():
+    prefetcher = TranscriptPrefetcher(token_budget=1000)
+    candidate = {"term": "SAP", "kind": "quick", "prompt": EXPAND_PROMPT.format(text="SAP"), "estimate": 500}
+    reservation = prefetcher.reserve(candidate)
+    prefetcher.released(candidate, reservation, "failed", tokens=50)
+    assert prefetcher.remaining() == 950
+    assert prefetcher.stats["failed"] == 1
+    assert prefetcher.stats["tokens_wasted"] == 50
+    assert prefetcher.snapshot()["running"] == 0
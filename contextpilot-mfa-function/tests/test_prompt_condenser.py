@@ -0,0 +1,71 @@
+from admission import estimate_tokens
+from prompt_condenser import PromptCondenser
+
+QUESTION = "Give me 3-5 bullet points with key facts I can use in conversation."
+
+
+def transcript(sentences):
+    return "\n".join(f"[00:{i:02d}] [SPEAKER] {sentence}" for i, sentence in enumerate(sentences))
+
+
+def test_short_prompts_stay_unchanged():
+    condenser = PromptCondenser(min_tokens=300)
+    agent_prompt, triage_prompt, report = condenser.condense("Was kostet M365 E5?")
+    assert agent_prompt == triage_prompt == "Was kostet M365 E5?"
+    assert report["condensed"] is False
+
+
+def test_removes_timestamps_fillers_and_repeats():
+    condenser = PromptCondenser(min_tokens=0, token_budget=0)
+    lines = [
+        "Äh wir haben das Budget für das Projekt Phoenix freigegeben.",
+        "Äh wir haben das Budget für das Projekt Phoenix freigegeben.",
+        "Der Rollout startet im im im März.",
+    ]
+    agent_prompt, _, report = condenser.condense(f"{transcript(lines)}\n\n{QUESTION}")
+    assert agent_prompt.count("Projekt Phoenix") == 1
+    assert "[00:" not in agent_prompt and "Äh" not in agent_prompt
+    assert "im März" in agent_prompt and "im im" not in agent_prompt
+    assert agent_prompt.count("[SPEAKER]") == 1
+    assert agent_prompt.endswith(QUESTION)
+    assert report["duplicates_removed"] == 1
+    assert report["timestamps_removed"] == 3
+
+
+def test_german_um_and_legitimate_repeats_survive():
+    condenser = PromptCondenser(min_tokens=0, token_budget=0)
+    text = "Wir treffen uns morgen um 10 Uhr, um die Zahlen zu prüfen. Es geht um den Umsatz, den die die Kunden melden."
+    agent_prompt, _, report = condenser.condense(f"[00:01] [MIC] {text}\n\n{QUESTION}")
+    assert agent_prompt == f"[MIC] {text}\n\n{QUESTION}"
+    assert report["fillers_removed"] == 0
+
+
+def test_consecutive_lines_of_one_speaker_are_merged():
+    condenser = PromptCondenser(min_tokens=0, token_budget=0)
+    prompt = "[00:01] [MIC] Wir treffen uns morgen.\n[00:02] [MIC] Es geht weiter.\n[00:03] [SPEAKER] Gut.\n\n" + QUESTION
+    agent_prompt, _, _ = condenser.condense(prompt)
+    assert agent_prompt == f"[MIC] Wir treffen uns morgen. Es geht weiter.\n[SPEAKER] Gut.\n\n{QUESTION}"
+
+
+def test_live_recognition_drafts_are_replaced_by_full_sentence():
+    condenser = PromptCondenser(min_tokens=0, token_budget=0)
+    lines = ["Wir planen den Rollout", "Wir planen den Rollout im zweiten Quartal."]
+    agent_prompt, _, _ = condenser.condense(f'Context: "{chr(10).join(lines)}"\n\n{QUESTION}')
+    assert agent_prompt == f'Context: "Wir planen den Rollout im zweiten Quartal."\n\n{QUESTION}'
+
+
+def test_budget_keeps_latest_sentences_and_question():
+    condenser = PromptCondenser(min_tokens=0, token_budget=120, triage_tokens=60)
+    lines = [f"Punkt {i} betrifft das Thema Nummer {i} im Detail und ausführlich." for i in range(60)]
+    agent_prompt, triage_prompt, report = condenser.condense(f"{transcript(lines)}\n\n{QUESTION}")
+    assert report["trimmed"] is True
+    assert "Punkt 59 " in agent_prompt and "Punkt 0 " not in agent_prompt
+    assert agent_prompt.endswith(QUESTION) and triage_prompt.endswith(QUESTION)
+    assert estimate_tokens(triage_prompt) < estimate_tokens(agent_prompt) <= 120 + 20
+    assert condenser.stats["condensed"] == 1
+
+
+def test_record_false_does_not_count():
+    condenser = PromptCondenser(min_tokens=0)
+    condenser.condense(f"{transcript(['Ein Satz.'])}\n\n{QUESTION}", record=False)
+    assert condenser.stats["requests"] == 0
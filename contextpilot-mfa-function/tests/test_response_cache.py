@@ -0,0 +1,64 @@
+import asyncio
+
+from response_cache import InMemoryBackend, ResponseCache, normalize_prompt, route_of
+
+TTL = {"direct": 60, "context": 60, "web": 0, "synthesis": 60}
+
+
+def result(routing, response="antwort"):
+    return {"response": response, "agents_used": [], "routing": routing}
+
+
+def test_normalize_prompt_ignores_case_whitespace_and_trailing_punctuation():
+    assert normalize_prompt("  Umsatz   Q3?! ") == normalize_prompt("umsatz q3")
+
+
+def test_route_of():
+    assert route_of({"direct": True, "web": True}) == "direct"
+    assert route_of({"web": True, "context": True}) == "synthesis"
+    assert route_of({"web": True}) == "web"
+    assert route_of({"context": True}) == "context"
+
+
+def test_store_and_lookup_without_route():
+    cache = ResponseCache(InMemoryBackend(), TTL)
+
+    async def run():
+        await cache.store("Wer ist Kunde X?", result({"context": True}))
+        return await cache.lookup("wer ist kunde x")
+
+    assert asyncio.run(run())["response"] == "antwort"
+    assert cache.stats["hits"] == 1
+
+
+def test_partial_degraded_and_uncached_routes_are_skipped():
+    cache = ResponseCache(InMemoryBackend(), TTL)
+
+    async def run():
+        stored = [
+            await cache.store("a", result({"context": True, "partial": True})),
+            await cache.store("b", result({"context": True, "degraded": True})),
+            await cache.store("c", result({"web": True})),
+            await cache.store("d", result({"context": True}, response="")),
+        ]
+        return stored, await cache.lookup("c")
+
+    stored, hit = asyncio.run(run())
+    assert stored == [False, False, False, False]
+    assert hit is None
+    assert cache.stats["skipped"] == 4
+
+
+def test_in_memory_backend_expires_and_evicts():
+    backend = InMemoryBackend(max_entries=2)
+
+    async def run():
+        await backend.set("expired", {"v": 0}, ttl_seconds=-1)
+        await backend.set("a", {"v": 1}, ttl_seconds=60)
+        await backend.set("b", {"v": 2}, ttl_seconds=60)
+        await backend.get("a")  # a ist jetzt zuletzt benutzt
+        await backend.set("c", {"v": 3}, ttl_seconds=60)
+        return [await backend.get(key) for key in ("expired", "a", "b", "c")]
+
+    assert asyncio.run(run()) == [None, {"v": 1}, None, {"v": 3}]
+    assert backend.evictions == 2
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from semantic_cache import HashingEmbedder, SemanticCache, anchor, load_embedder  # noqa: E402
+
+EXPAND = 'Context: "{}"\n\nGive me 3-5 bullet points with key facts I can use in conversation. Short, precise, no fluff.'
+
+
+def make_cache(**kwargs):
+    return SemanticCache(HashingEmbedder(384), 384, **kwargs)
+
+
+def test_same_template_different_entity_misses():
+    cache = make_cache(threshold=0.9)
+
+    async def run():
+        await cache.store(EXPAND.format("Projekt Phoenix"), "Phoenix facts")
+        return await cache.lookup(EXPAND.format("Projekt Atlas"))
+
+    assert asyncio.run(run()) is None
+    assert cache.stats["anchor_mismatches"] == 1
+
+
+def test_same_entity_hits():
+    cache = make_cache(threshold=0.9)
+
+    async def run():
+        await cache.store(EXPAND.format("Projekt Phoenix"), "Phoenix facts")
+        return await cache.lookup(EXPAND.format("projekt  phoenix"))
+
+    hit = asyncio.run(run())
+    assert hit is not None and hit["response"] == "Phoenix facts"
+
+
+def test_free_prompt_with_other_number_misses():
+    cache = make_cache(threshold=0.8)
+
+    async def run():
+        await cache.store("Wie hoch war der Umsatz im Q3 2024?", "a")
+        return await cache.lookup("Wie hoch war der Umsatz im Q3 2023?"), await cache.lookup(
+            "wie hoch war der Umsatz im Q3 2024"
+        )
+
+    other_year, paraphrase = asyncio.run(run())
+    assert other_year is None
+    assert paraphrase is not None
+
+
+def test_anchor_prefers_highlighted_text():
+    assert anchor(EXPAND.format("Swiss Post")) == "context:swiss post"
+    assert anchor("Was kostet M365 E5?") == anchor("was kostet M365 E5")
+
+
+def test_embedder_is_required():
+    with pytest.raises(ValueError):
+        load_embedder(None, 384)
+    assert isinstance(load_embedder("hashing", 64), HashingEmbedder)
+
+
+def test_lru_eviction_when_full():
+    cache = SemanticCache(HashingEmbedder(64), 64, capacity=3, threshold=0.99)
+
+    async def run():
+        for i in range(5):
+            await cache.store(f"frage nummer {i}", f"a{i}")
+        return await cache.lookup_many(["frage nummer 4", "frage nummer 0"])
+
+    recent, evicted = asyncio.run(run())
+    assert recent["response"] == "a4"
+    assert evicted is None
+    assert cache.index.evictions == 2
+
+
+def test_persistence_roundtrip(tmp_path):
+    path = str(tmp_path / "sem.idx")
+
+    async def run():
+        first = SemanticCache(HashingEmbedder(64), 64, capacity=10, threshold=0.9, path=path)
+        await first.store("Welche Kunden haben gekündigt?", "drei")
+        second = SemanticCache(HashingEmbedder(64), 64, capacity=10, threshold=0.9, path=path)
+        return len(second.index), await second.lookup("Welche Kunden haben gekündigt")
+
+    entries, hit = asyncio.run(run())
+    assert entries == 1
+    assert hit["response"] == "drei"
+
+
+def test_store_persists_off_the_event_loop(tmp_path, monkeypatch):
+    cache = SemanticCache(HashingEmbedder(64), 64, capacity=10, threshold=0.9, path=str(tmp_path / "sem.idx"))
+    threads = []
+    persist = cache.index.persist
+
+    def recording_persist(records):
+        threads.append(threading.current_thread())
+        persist(records)
+
+    monkeypatch.setattr(cache.index, "persist", recording_persist)
+    asyncio.run(cache.store("Welche Kunden haben gekündigt?", "drei"))
+    assert threads and threads[0] is not threading.main_thread()
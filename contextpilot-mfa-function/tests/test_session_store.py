@@ -0,0 +1,41 @@
+from admission import estimate_tokens
+from session_store import SessionStore
+
+
+def add_turns(store, session_id, count, answer_words=50):
+    for i in range(count):
+        store.append(session_id, f"Frage {i}?", " ".join(f"antwort{i}" for _ in range(answer_words)), {}, {})
+
+
+def test_contextualize_uses_only_the_last_turn():
+    store = SessionStore(context_tokens=200)
+    add_turns(store, "s", 3)
+    prompt = store.contextualize("und danach?", store.turns("s"))
+    assert "Frage 2?" in prompt
+    assert "Frage 0?" not in prompt and "Frage 1?" not in prompt
+    assert prompt.endswith("FOLLOW-UP QUESTION:\nund danach?")
+    assert store.stats["follow_ups"] == 1
+
+
+def test_contextualize_stays_within_budget():
+    store = SessionStore(context_tokens=100)
+    add_turns(store, "s", 1, answer_words=2000)
+    prompt = store.contextualize("und danach?", store.turns("s"))
+    # Budget plus feste Rahmen-Zeilen
+    assert estimate_tokens(prompt) <= 100 + 20
+    assert "…" in prompt
+
+
+def test_contextualize_without_turns_returns_prompt():
+    store = SessionStore()
+    assert store.contextualize("Frage?", []) == "Frage?"
+    assert store.stats["follow_ups"] == 0
+
+
+def test_byte_limit_evicts_idle_sessions_first():
+    store = SessionStore(max_bytes=2000)
+    add_turns(store, "old", 2)
+    add_turns(store, "new", 2)
+    assert store.turns("old") == []
+    assert len(store.turns("new")) == 2
+    assert store.stats["evicted"] >= 1
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert runs == [1]
+    assert [coalesced for _, coalesced in results] == [False, True, True]
+    assert {result for result, _ in results} == {"answer"}
+    assert flight.snapshot()["in_flight"] == 0
+
+
+def test_error_reaches_all_waiters():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work) for _ in range(2)), return_exceptions=True)
+
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+
+
+def test_leader_survives_while_a_waiter_remains():
+    flight = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+
+    async def run():
+        first = asyncio.ensure_future(flight.do("k", work))
+        second = asyncio.ensure_future(flight.do("k", work))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == ("answer", True)
+    assert flight.stats["abandoned"] == 0
+
+
+def test_leader_is_cancelled_when_last_waiter_leaves():
+    flight = SingleFlight()
+    state = {}
+
+    async def work():
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            state["cancelled"] = True
+            raise
+        return "answer"
+
+    async def run():
+        waiters = [asyncio.ensure_future(flight.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        assert flight.snapshot()["in_flight"] == 0
+        # Ein neuer Aufrufer startet frisch statt den abgebrochenen Lauf zu erben
+        return await flight.do("k", lambda: asyncio.sleep(0, result="fresh"))
+
+    assert asyncio.run(run()) == ("fresh", False)
+    assert state == {"cancelled": True}
+    assert flight.stats["abandoned"] == 1
+
+
+def test_keys_do_not_coalesce_with_each_other():
+    flight = SingleFlight()
+
+    async def run():
+        return await asyncio.gather(
+            flight.do("a", lambda: asyncio.sleep(0.01, result="a")),
+            flight.do("b", lambda: asyncio.sleep(0.01, result="b")),
+        )
+
+    assert asyncio.run(run()) == [("a", False), ("b", False)]
+    assert flight.stats["leaders"] == 2
+    with pytest.raises(KeyError):
+        flight._waiters["a"]
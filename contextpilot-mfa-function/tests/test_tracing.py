@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+import pytest
+
+import tracing
+from tracing import current_trace, span, start_trace
+
+CORRELATION_ID = "0f8fad5b-d9cb-469f-a165-70867728950e"
+
+
+def test_span_without_trace_is_a_noop():
+    with span("agent.run") as current:
+        assert current is None
+    assert current_trace() is None
+
+
+def test_spans_nest_under_the_root_and_record_errors():
+    with pytest.raises(RuntimeError):
+        with start_trace(CORRELATION_ID) as trace:
+            with span("triage", agent="AURATriage"):
+                pass
+            with span("agent.run", agent="AURAContextPilotWeb"):
+                raise RuntimeError("429")
+    assert current_trace() is None
+    assert trace.trace_id == "0f8fad5bd9cb469fa16570867728950e"
+    timings = trace.timings()
+    assert timings["correlation_id"] == CORRELATION_ID
+    assert [s["name"] for s in timings["spans"]] == ["triage", "agent.run"]
+    assert timings["spans"][0]["attributes"] == {"agent": "AURATriage"}
+    assert timings["spans"][1]["error"] == "RuntimeError: 429"
+    assert trace.root.error == "RuntimeError: 429"
+
+
+def test_tasks_inherit_the_trace_and_cancellation_is_marked():
+    async def run():
+        with start_trace("c-1") as trace:
+            async def branch():
+                with span("web"):
+                    await asyncio.sleep(10)
+
+            task = asyncio.ensure_future(branch())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return trace
+
+    trace = asyncio.run(run())
+    assert [(s.name, s.error) for s in trace.spans] == [("web", "cancelled")]
+    assert len(trace.trace_id) == 32 and trace.trace_id != "c1"
+
+
+def test_otlp_payload_links_spans_to_the_root():
+    with start_trace(CORRELATION_ID) as trace:
+        with span("synthesis", tokens=120, cached=False, ratio=0.5):
+            pass
+    spans = trace.to_otlp()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    root, child = spans
+    assert "parentSpanId" not in root
+    assert child["parentSpanId"] == root["spanId"]
+    assert {s["traceId"] for s in spans} == {trace.trace_id}
+    assert child["status"] == {"code": 1}
+    assert int(child["endTimeUnixNano"]) >= int(child["startTimeUnixNano"])
+    attributes = {a["key"]: a["value"] for a in child["attributes"]}
+    assert attributes == {
+        "correlation_id": {"stringValue": CORRELATION_ID},
+        "tokens": {"intValue": "120"},
+        "cached": {"boolValue": False},
+        "ratio": {"doubleValue": 0.5},
+    }
+
+
+def test_file_export_writes_one_line_per_trace(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "MFA_TRACE_EXPORT", f"file:{path}")
+    for correlation_id in ("c-1", "c-2"):
+        with start_trace(correlation_id):
+            pass
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "mfa.request"
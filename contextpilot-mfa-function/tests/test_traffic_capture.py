@@ -0,0 +1,63 @@
+import json
+
+from traffic_capture import TrafficCapture, capture_route, load_capture, prompt_hash
+
+PROMPT = "Wie steht es um Projekt Phoenix?"
+RESULT = {
+    "response": "Projekt Phoenix ist im Zeitplan.",
+    "routing": {"direct": False, "web": False, "context": True, "reasoning": "interne Frage zu Phoenix"},
+    "agents_used": ["AURATriage", "AURAContextPilot"],
+}
+TIMINGS = {
+    "spans": [
+        {"name": "agent.run", "start_ms": 1.0, "duration_ms": 900.0, "attributes": {"agent": "AURAContextPilot", "prompt": PROMPT}},
+        {"name": "parse", "start_ms": 901.0, "duration_ms": 0.2, "error": "ValueError: Phoenix"},
+    ],
+}
+
+
+def test_prompt_hash_is_salted_and_normalized():
+    assert prompt_hash(PROMPT) == prompt_hash(f"  {PROMPT.upper()} ")
+    assert prompt_hash(PROMPT, "salt") != prompt_hash(PROMPT)
+    assert len(prompt_hash(PROMPT)) == 16
+
+
+def test_record_writes_no_prompt_or_answer_text(tmp_path):
+    path = tmp_path / "capture" / "mfa.jsonl"
+    capture = TrafficCapture(str(path), salt="s")
+    capture.record(PROMPT, 1760000000.1234, 200, 912.345, RESULT, TIMINGS)
+    line = path.read_text(encoding="utf-8")
+    assert "Phoenix" not in line
+    entry = json.loads(line)
+    assert entry["prompt_hash"] == prompt_hash(PROMPT, "s")
+    assert entry["prompt_chars"] == len(PROMPT)
+    assert entry["route"] == "context"
+    assert entry["routing"] == {"direct": False, "web": False, "context": True}
+    assert entry["latency_ms"] == 912.3
+    assert entry["spans"] == [
+        {"name": "agent.run", "agent": "AURAContextPilot", "start_ms": 1.0, "duration_ms": 900.0},
+        {"name": "parse", "start_ms": 901.0, "duration_ms": 0.2, "error": True},
+    ]
+    assert capture.snapshot()["salted"] is True
+
+
+def test_capture_route_distinguishes_triage_direct():
+    assert capture_route(None, []) == "unknown"
+    assert capture_route({"direct": True}, ["AURATriage"]) == "triage_direct"
+    assert capture_route({"direct": True}, ["AURATriage", "AURAContextPilotQuick"]) == "direct"
+
+
+def test_sampling_and_write_errors_are_counted(tmp_path):
+    sampled = TrafficCapture(str(tmp_path / "sampled.jsonl"), sample_rate=0.0)
+    sampled.record(PROMPT, 1.0, 200, 1.0)
+    assert sampled.stats == {"captured": 0, "sampled_out": 1, "write_errors": 0}
+
+    broken = TrafficCapture(str(tmp_path))  # Verzeichnis statt Datei
+    broken.record(PROMPT, 1.0, 500, 1.0)
+    assert broken.stats["write_errors"] == 1
+
+
+def test_load_capture_sorts_and_skips_broken_lines(tmp_path):
+    path = tmp_path / "mfa.jsonl"
+    path.write_text('{"t": 2}\nkaputt\n{"t": 1}\n', encoding="utf-8")
+    assert [entry["t"] for entry in load_capture(str(path))] == [1, 2]
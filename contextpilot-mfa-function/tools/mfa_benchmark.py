@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""Offline-Benchmark für den MFA-Workflow (ohne Azure, ohne Tokens).
+
+Führt run_mfa_workflow (Target "workflow") oder den /mfa HTTP-Handler aus
+function_app (Target "http", benötigt azure-functions) gegen den lokalen
+Foundry-Stand-in aus mock_foundry aus und berichtet:
+
+- Latenz p50/p95/p99 (simulierte ms, d.h. durch time_scale geteilt)
+- Durchsatz pro Concurrency-Stufe
+- Fehler- und Teilergebnis-Rate
+- Phasen-Breakdown aus den tracing-Spans (Median/p95 pro Span-Name)
+
+Beispiele:
+    python tools/mfa_benchmark.py --requests 200 --concurrency 1,8,32 --time-scale 0.01
+    python tools/mfa_benchmark.py --profile bench.json --repeat-ratio 0.3 --json out.json
+
+Profil (JSON, alle Keys optional) – siehe mock_foundry.DEFAULT_CONFIG:
+    {"agents": {"AURAContextPilotWeb": {"latency": "lognormal:9000,0.6", "failure_rate": 0.05}},
+     "routing_mix": {"direct": 0.5, "synthesis": 0.5}}
+
+MFA_*-Umgebungsvariablen (Cache, Fast-Path, Spekulation, ...) wirken wie im
+Deployment. Ohne --tpm ist die Admission Control aus, damit der Benchmark
+die Workflow-Latenz misst und nicht das TPM-Budget.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from typing import Any
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+FUNCTION_DIR = os.path.dirname(TOOLS_DIR)
+
+BENCH_ENV_DEFAULTS = {
+    "AZURE_AI_PROJECT_ENDPOINT": "https://mock.local/api/projects/bench",
+    "AZURE_AI_MODEL_DEPLOYMENT_NAME": "mock-deployment",
+    "AURA_TRIAGE_AGENT_NAME": "AURATriage",
+    "AURA_QUICK_AGENT_NAME": "AURAContextPilotQuick",
+    "AURA_WEB_AGENT_NAME": "AURAContextPilotWeb",
+    "AURA_CONTEXT_AGENT_NAME": "AURAContextPilot",
+    "AURA_SYNTHESIZER_AGENT_NAME": "AURAContextPilotResponseSynthesizer",
+}
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank Perzentil (0 bei leerer Liste)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def make_prompts(count: int, repeat_ratio: float, rng: random.Random) -> list[str]:
+    """Erzeugt Prompts; repeat_ratio steuert den Anteil wiederholter Fragen (Cache)."""
+    prompts: list[str] = []
+    for i in range(count):
+        if prompts and rng.random() < repeat_ratio:
+            prompts.append(rng.choice(prompts))
+        else:
+            prompts.append(f"Benchmark-Frage {i}: Welche Auswirkungen hat Initiative {rng.randint(1, 10**6)}?")
+    return prompts
+
+
+class Runner:
+    """Kapselt das Ziel (workflow/http) und sammelt Ergebnisse pro Request."""
+
+    def __init__(self, target: str, time_scale: float):
+        self.target = target
+        self.time_scale = time_scale
+        import mfa_workflow
+        import tracing
+
+        self.mfa_workflow = mfa_workflow
+        self.tracing = tracing
+        if target == "http":
+            import azure.functions as func
+            import function_app
+
+            self.func = func
+            self.function_app = function_app
+
+    async def one(self, prompt: str) -> dict[str, Any]:
+        correlation_id = str(uuid.uuid4())
+        started = time.perf_counter()
+        record: dict[str, Any] = {"ok": False, "partial": False, "spans": []}
+        try:
+            if self.target == "http":
+                record.update(await self._http(prompt, correlation_id))
+            else:
+                with self.tracing.start_trace(correlation_id) as trace:
+                    result = await self.mfa_workflow.run_mfa_workflow(prompt)
+                record["ok"] = True
+                record["partial"] = bool(result["routing"].get("partial"))
+                record["cached"] = bool(result["routing"].get("cached"))
+                record["spans"] = trace.timings()["spans"]
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+        record["latency_ms"] = (time.perf_counter() - started) * 1000 / self.time_scale
+        return record
+
+    async def _http(self, prompt: str, correlation_id: str) -> dict[str, Any]:
+        req = self.func.HttpRequest(
+            method="POST",
+            url="http://localhost/api/mfa",
+            headers={"x-correlation-id": correlation_id, "content-type": "application/json"},
+            body=json.dumps({"prompt": prompt, "timings": True}).encode("utf-8"),
+        )
+        resp = await self.function_app.mfa_endpoint(req)
+        payload = json.loads(resp.get_body() or b"{}")
+        if resp.status_code != 200:
+            return {"error": f"HTTP {resp.status_code}: {payload.get('error', '')}"}
+        return {
+            "ok": True,
+            "partial": bool(payload.get("routing", {}).get("partial")),
+            "cached": bool(payload.get("routing", {}).get("cached")),
+            "spans": payload.get("timings", {}).get("spans", []),
+        }
+
+
+async def run_level(runner: Runner, prompts: list[str], concurrency: int) -> dict[str, Any]:
+    """Arbeitet alle Prompts mit fester Concurrency ab (geschlossenes System)."""
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for prompt in prompts:
+        queue.put_nowait(prompt)
+    records: list[dict[str, Any]] = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            records.append(await runner.one(queue.get_nowait()))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = (time.perf_counter() - started) / runner.time_scale
+    return summarize(records, elapsed, concurrency, runner.time_scale)
+
+
+def summarize(records: list[dict[str, Any]], elapsed_s: float, concurrency: int, time_scale: float) -> dict[str, Any]:
+    latencies = [r["latency_ms"] for r in records if r["ok"]]
+    phases: dict[str, list[float]] = {}
+    for record in records:
+        for span in record["spans"]:
+            name = span["name"]
+            agent = span.get("attributes", {}).get("agent")
+            key = f"{name}[{agent}]" if agent else name
+            phases.setdefault(key, []).append(span["duration_ms"] / time_scale)
+    errors: dict[str, int] = {}
+    for record in records:
+        if not record["ok"]:
+            errors[record["error"]] = errors.get(record["error"], 0) + 1
+    return {
+        "concurrency": concurrency,
+        "requests": len(records),
+        "ok": len(latencies),
+        "partial": sum(1 for r in records if r["partial"]),
+        "errors": errors,
+        "throughput_rps": round(len(records) / elapsed_s, 3) if elapsed_s else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+            "p99": round(percentile(latencies, 99), 1),
+            "mean": round(statistics.fmean(latencies), 1) if latencies else 0.0,
+        },
+        "phases_ms": {
+            key: {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 1),
+                "p95": round(percentile(values, 95), 1),
+            }
+            for key, values in sorted(phases.items())
+        },
+    }
+
+
+def print_report(levels: list[dict[str, Any]]) -> None:
+    print(f"\n{'conc':>5} {'reqs':>6} {'ok':>5} {'part':>5} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for level in levels:
+        lat = level["latency_ms"]
+        print(
+            f"{level['concurrency']:>5} {level['requests']:>6} {level['ok']:>5} {level['partial']:>5} "
+            f"{level['throughput_rps']:>8.2f} {lat['p50']:>9.1f} {lat['p95']:>9.1f} {lat['p99']:>9.1f}"
+        )
+    for level in levels:
+        print(f"\nPhasen (concurrency={level['concurrency']}):")
+        for key, stats in level["phases_ms"].items():
+            print(f"  {key:<55} n={stats['count']:<5} p50={stats['p50']:>9.1f}  p95={stats['p95']:>9.1f}")
+        for error, count in level["errors"].items():
+            print(f"  ! {count}x {error}")
+
+
+async def main_async(args: argparse.Namespace) -> list[dict[str, Any]]:
+    profile: dict[str, Any] = {}
+    if args.profile:
+        with open(args.profile, encoding="utf-8") as f:
+            profile = json.load(f)
+    profile["time_scale"] = args.time_scale
+
+    for key, value in BENCH_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ["MFA_TPM_LIMIT"] = str(args.tpm)
+
+    sys.path.insert(0, FUNCTION_DIR)
+    sys.path.insert(0, TOOLS_DIR)
+    import mock_foundry
+
+    mock_foundry.install(profile, seed=args.seed)
+    runner = Runner(args.target, args.time_scale)
+
+    rng = random.Random(args.seed)
+    levels = []
+    for concurrency in args.concurrency:
+        # Pro Stufe frische Caches/Zähler, damit Stufen vergleichbar bleiben
+        if runner.mfa_workflow.response_cache is not None:
+            await runner.mfa_workflow.response_cache.clear()
+        prompts = make_prompts(args.requests, args.repeat_ratio, rng)
+        levels.append(await run_level(runner, prompts, concurrency))
+    print_report(levels)
+    print(f"\nMock-Agent-Aufrufe gesamt: {dict(sorted(mock_foundry.calls.items()))}")
+    return levels
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["workflow", "http"], default="workflow")
+    parser.add_argument("--requests", type=int, default=100, help="Requests pro Concurrency-Stufe")
+    parser.add_argument(
+        "--concurrency",
+        type=lambda v: [int(x) for x in v.split(",")],
+        default=[1, 8, 32],
+        help="Kommagetrennte Concurrency-Stufen (Default: 1,8,32)",
+    )
+    parser.add_argument("--profile", help="JSON-Profil für mock_foundry (Latenzen, Fehler, Routing-Mix)")
+    parser.add_argument("--time-scale", type=float, default=0.01, help="Faktor für simulierte Latenzen (Default 0.01)")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="Anteil wiederholter Prompts (0..1)")
+    parser.add_argument("--tpm", type=int, default=0, help="MFA_TPM_LIMIT für die Admission Control (0 = aus)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON-Datei schreiben")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    levels = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""Replay eines /mfa-Mitschnitts (MFA_CAPTURE_PATH) gegen den lokalen Foundry-Stand-in.
+
+Anders als mfa_benchmark.py (geschlossenes System, feste Concurrency) spielt
+der Replay die aufgezeichneten Ankunftszeiten offen ab: jeder Request startet
+zu seinem Zeitpunkt, auch wenn frühere noch laufen – Schübe, Wiederholungen
+und Routen-Mix bleiben wie im echten Meeting.
+
+- Prompts: synthetisch pro prompt_hash, mit der aufgezeichneten Länge.
+  Wiederholte Fragen bleiben Wiederholungen (Response-/Semantic-Cache,
+  Single-Flight greifen wie im Original).
+- Routing: die aufgezeichnete Route pro Prompt (mock_foundry "prompt_routes").
+- Latenzen: mit --latency-from-capture empirisch pro Agent aus den
+  agent.run-Spans des Mitschnitts (inkl. Fehlerrate), sonst --profile bzw.
+  mock_foundry.DEFAULT_CONFIG.
+- Zeit: --speed 1,5,20 teilt die Abstände zwischen Ankünften (mehr Last);
+  --time-scale skaliert Ankünfte UND Agent-Latenzen gleich (schnellerer
+  Lauf bei gleicher Last). Berichtete Zeiten sind simulierte ms.
+
+Beispiele:
+    python tools/mfa_replay.py capture.jsonl --speed 1,5,20 --time-scale 0.05
+    python tools/mfa_replay.py capture.jsonl --latency-from-capture --max-gap 60 --json replay.json
+
+Folgefragen (Sessions) laufen im Replay als eigenständige Prompts.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any
+
+from mfa_benchmark import BENCH_ENV_DEFAULTS, FUNCTION_DIR, TOOLS_DIR, Runner, percentile, summarize
+
+# Obergrenze für empirische Latenz-Samples pro Agent (Länge der Profil-Spezifikation)
+MAX_LATENCY_SAMPLES = 500
+
+
+def synthetic_prompt(entry: dict[str, Any]) -> str:
+    """Stabiler Prompt pro Hash; das replay-Token trägt die Route (prompt_routes)."""
+    head = f"replay-{entry['prompt_hash']} Frage"
+    filler = " lorem"
+    missing = max(entry.get("prompt_chars", 0) - len(head), 0)
+    return head + (filler * (missing // len(filler) + 1))[:missing]
+
+
+def prompt_routes(entries: list[dict[str, Any]]) -> dict[str, str]:
+    """Token → aufgezeichnete Route (häufigste Route pro Prompt-Hash)."""
+    counts: dict[str, Counter[str]] = {}
+    for entry in entries:
+        if entry.get("route") not in (None, "unknown"):
+            counts.setdefault(f"replay-{entry['prompt_hash']}", Counter())[entry["route"]] += 1
+    return {token: routes.most_common(1)[0][0] for token, routes in counts.items()}
+
+
+def latency_profile(entries: list[dict[str, Any]], rng: random.Random) -> dict[str, Any]:
+    """Empirische Latenz und Fehlerrate pro Agent aus agent.run/agent.stream-Spans."""
+    samples: dict[str, list[float]] = {}
+    failures: dict[str, int] = {}
+    for entry in entries:
+        for span in entry.get("spans", []):
+            agent = span.get("agent")
+            if span["name"] not in ("agent.run", "agent.stream") or not agent:
+                continue
+            samples.setdefault(agent, []).append(span["duration_ms"])
+            failures[agent] = failures.get(agent, 0) + int(bool(span.get("error")))
+    agents = {}
+    for agent, values in samples.items():
+        chosen = values if len(values) <= MAX_LATENCY_SAMPLES else rng.sample(values, MAX_LATENCY_SAMPLES)
+        agents[agent] = {
+            "latency": "empirical:" + ",".join(f"{value:.1f}" for value in chosen),
+            "failure_rate": round(failures[agent] / len(values), 4),
+        }
+    return {"agents": agents}
+
+
+def arrival_offsets(entries: list[dict[str, Any]], max_gap: float | None) -> list[float]:
+    """Sekunden seit der ersten Ankunft; Pausen über max_gap werden gekappt."""
+    offsets, offset = [], 0.0
+    for previous, entry in zip([None, *entries], entries):
+        if previous is not None:
+            gap = max(entry["t"] - previous["t"], 0.0)
+            offset += gap if max_gap is None else min(gap, max_gap)
+        offsets.append(offset)
+    return offsets
+
+
+async def replay(
+    runner: Runner,
+    prompts: list[str],
+    offsets: list[float],
+    speed: float,
+) -> dict[str, Any]:
+    """Startet jeden Prompt zu offset / speed (offenes System) und fasst die Ergebnisse zusammen."""
+    loop = asyncio.get_running_loop()
+    scale = runner.time_scale / speed
+    in_flight = peak = 0
+    lags: list[float] = []
+
+    async def fire(prompt: str, due: float) -> dict[str, Any]:
+        nonlocal in_flight, peak
+        await asyncio.sleep(max(due - loop.time(), 0.0))
+        lags.append((loop.time() - due) * 1000 / runner.time_scale)
+        in_flight += 1
+        peak = max(peak, in_flight)
+        try:
+            return await runner.one(prompt)
+        finally:
+            in_flight -= 1
+
+    started = loop.time()
+    wall = time.perf_counter()
+    records = await asyncio.gather(*(fire(prompt, started + offset * scale) for prompt, offset in zip(prompts, offsets)))
+    elapsed = (time.perf_counter() - wall) / runner.time_scale
+    summary = summarize(list(records), elapsed, peak, runner.time_scale)
+    summary.pop("concurrency")
+    ok = summary["ok"]
+    return {
+        "speed": speed,
+        **summary,
+        "peak_in_flight": peak,
+        "offered_rps": round(len(prompts) / (offsets[-1] / speed), 3) if offsets and offsets[-1] else 0.0,
+        "cache_hit_rate": round(sum(1 for r in records if r.get("cached")) / ok, 3) if ok else 0.0,
+        "schedule_lag_ms_p95": round(percentile(lags, 95), 1),
+    }
+
+
+def recorded_summary(entries: list[dict[str, Any]]) -> dict[str, Any]:
+    latencies = [entry["latency_ms"] for entry in entries if entry.get("status") == 200]
+    routes: dict[str, int] = {}
+    for entry in entries:
+        routes[entry.get("route", "unknown")] = routes.get(entry.get("route", "unknown"), 0) + 1
+    return {
+        "requests": len(entries),
+        "distinct_prompts": len({entry["prompt_hash"] for entry in entries}),
+        "duration_s": round(entries[-1]["t"] - entries[0]["t"], 1) if entries else 0.0,
+        "routes": dict(sorted(routes.items())),
+        "latency_ms": {"p50": round(percentile(latencies, 50), 1), "p95": round(percentile(latencies, 95), 1)},
+    }
+
+
+def print_report(recorded: dict[str, Any], levels: list[dict[str, Any]]) -> None:
+    lat = recorded["latency_ms"]
+    print(
+        f"\nMitschnitt: {recorded['requests']} Requests, {recorded['distinct_prompts']} verschiedene Prompts, "
+        f"{recorded['duration_s']}s, Routen {recorded['routes']}, p50={lat['p50']} p95={lat['p95']}"
+    )
+    print(
+        f"\n{'speed':>6} {'reqs':>6} {'ok':>5} {'err':>5} {'peak':>5} {'offer/s':>8} {'cache':>6}"
+        f" {'p50':>9} {'p95':>9} {'p99':>9} {'lag95':>8}"
+    )
+    for level in levels:
+        lat = level["latency_ms"]
+        errors = sum(level["errors"].values())
+        print(
+            f"{level['speed']:>5g}x {level['requests']:>6} {level['ok']:>5} {errors:>5} {level['peak_in_flight']:>5} "
+            f"{level['offered_rps']:>8.2f} {level['cache_hit_rate']:>6.2f} {lat['p50']:>9.1f} {lat['p95']:>9.1f} "
+            f"{lat['p99']:>9.1f} {level['schedule_lag_ms_p95']:>8.1f}"
+        )
+    for level in levels:
+        for error, count in level["errors"].items():
+            print(f"  ! {level['speed']:g}x: {count}x {error}")
+
+
+async def main_async(args: argparse.Namespace) -> dict[str, Any]:
+    for key, value in BENCH_ENV_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    os.environ["MFA_TPM_LIMIT"] = str(args.tpm)
+    # Ein Replay soll den Mitschnitt nicht erneut mitschneiden
+    os.environ.pop("MFA_CAPTURE_PATH", None)
+
+    sys.path.insert(0, FUNCTION_DIR)
+    from traffic_capture import load_capture
+
+    entries = load_capture(args.capture)
+    if args.limit:
+        entries = entries[: args.limit]
+    if not entries:
+        raise SystemExit(f"No requests in {args.capture}")
+
+    rng = random.Random(args.seed)
+    profile: dict[str, Any] = {}
+    if args.profile:
+        with open(args.profile, encoding="utf-8") as f:
+            profile = json.load(f)
+    if args.latency_from_capture:
+        captured = latency_profile(entries, rng)
+        profile["agents"] = {**profile.get("agents", {}), **captured["agents"]}
+    profile["time_scale"] = args.time_scale
+    profile["prompt_routes"] = prompt_routes(entries)
+
+    sys.path.insert(0, TOOLS_DIR)
+    import mock_foundry
+
+    mock_foundry.install(profile, seed=args.seed)
+    runner = Runner(args.target, args.time_scale)
+
+    prompts = [synthetic_prompt(entry) for entry in entries]
+    offsets = arrival_offsets(entries, args.max_gap)
+    levels = []
+    for speed in args.speed:
+        # Pro Stufe frische Caches, damit Stufen vergleichbar bleiben
+        if runner.mfa_workflow.response_cache is not None:
+            await runner.mfa_workflow.response_cache.clear()
+        if runner.mfa_workflow.semantic_cache is not None:
+            runner.mfa_workflow.semantic_cache.clear()
+        levels.append(await replay(runner, prompts, offsets, speed))
+    recorded = recorded_summary(entries)
+    print_report(recorded, levels)
+    print(f"\nMock-Agent-Aufrufe gesamt: {dict(sorted(mock_foundry.calls.items()))}")
+    return {"recorded": recorded, "levels": levels}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture", help="JSONL-Mitschnitt (MFA_CAPTURE_PATH)")
+    parser.add_argument("--target", choices=["workflow", "http"], default="workflow")
+    parser.add_argument(
+        "--speed",
+        type=lambda v: [float(x) for x in v.split(",")],
+        default=[1.0, 5.0, 20.0],
+        help="Kommagetrennte Beschleunigungen der Ankünfte (Default: 1,5,20)",
+    )
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Faktor für Ankünfte und Agent-Latenzen (Default 1.0)")
+    parser.add_argument("--max-gap", type=float, help="Pausen zwischen Requests auf N Sekunden kappen (z.B. zwischen Meetings)")
+    parser.add_argument("--limit", type=int, help="Nur die ersten N Requests abspielen")
+    parser.add_argument("--latency-from-capture", action="store_true", help="Agent-Latenzen/Fehler aus dem Mitschnitt")
+    parser.add_argument("--profile", help="JSON-Profil für mock_foundry (wie mfa_benchmark.py)")
+    parser.add_argument("--tpm", type=int, default=0, help="MFA_TPM_LIMIT für die Admission Control (0 = aus)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON-Datei schreiben")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    report = asyncio.run(main_async(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), **report}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
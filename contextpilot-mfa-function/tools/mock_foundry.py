@@ -0,0 +1,194 @@
+"""Lokaler Stand-in für AzureAIClient / DefaultAzureCredential (Benchmarks).
+
+Simuliert Foundry-Agents mit konfigurierbarer Latenz-Verteilung,
+Fehlerrate und Triage-Routing-Mix – ohne Tokens gegen Azure zu verbrauchen.
+
+install(config) registriert die Mock-Klassen unter den Modulnamen, die
+agent_registry importiert (agent_framework.azure, azure.identity.aio;
+azure.core.exceptions nur, falls azure-core nicht installiert ist).
+Muss VOR dem Import von mfa_workflow aufgerufen werden.
+
+Latenz-Spezifikation (Millisekunden):
+    "fixed:200"            immer 200ms
+    "uniform:100,300"      gleichverteilt
+    "lognormal:800,0.5"    Median 800ms, sigma 0.5 (langer Tail wie Foundry)
+    "empirical:120,340,…"  zufällig aus beobachteten Werten (z.B. aus einem Mitschnitt)
+
+"prompt_routes" ({Token: Route}) legt die Triage-Entscheidung für Prompts fest,
+die eines der Tokens enthalten (Replay: aufgezeichnete Route pro Prompt-Hash);
+alle anderen Prompts werden nach routing_mix gesampelt.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import json
+import math
+import random
+import sys
+import types
+from typing import Any, AsyncIterator
+
+DEFAULT_CONFIG: dict[str, Any] = {
+    "time_scale": 1.0,
+    "agents": {
+        "AURATriage": {"latency": "lognormal:900,0.3", "failure_rate": 0.0},
+        "AURAContextPilotQuick": {"latency": "lognormal:1500,0.3", "failure_rate": 0.0},
+        "AURAContextPilotWeb": {"latency": "lognormal:7000,0.5", "failure_rate": 0.02},
+        "AURAContextPilot": {"latency": "lognormal:5000,0.4", "failure_rate": 0.01},
+        "AURAContextPilotResponseSynthesizer": {"latency": "lognormal:4000,0.3", "failure_rate": 0.0},
+    },
+    # Anteil der Triage-Entscheidungen; "triage_direct" = Triage antwortet selbst (kein JSON)
+    "routing_mix": {"triage_direct": 0.05, "direct": 0.25, "web": 0.2, "context": 0.3, "synthesis": 0.2},
+    "prompt_routes": {},
+    "response_chars": 1200,
+    "stream_chunk_chars": 40,
+}
+
+_config: dict[str, Any] = DEFAULT_CONFIG
+_rng = random.Random()
+calls: dict[str, int] = {}
+
+
+def sample_latency_ms(spec: str) -> float:
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return _rng.uniform(values[0], values[1])
+    if kind == "lognormal":
+        return _rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == "empirical":
+        return _rng.choice(values)
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def _sample_route(prompt: str = "") -> str:
+    routes = _config.get("prompt_routes")
+    if routes:
+        for token in prompt.split():
+            if token in routes:
+                return routes[token]
+    mix = _config["routing_mix"]
+    return _rng.choices(list(mix), weights=list(mix.values()))[0]
+
+
+def _triage_text(route: str) -> str:
+    if route == "triage_direct":
+        return "Direkte Antwort der Triage (Mock)."
+    routing = {
+        "direct": route == "direct",
+        "web": route in ("web", "synthesis"),
+        "context": route in ("context", "synthesis"),
+    }
+    return json.dumps({"routing": routing, "reasoning": f"mock:{route}"})
+
+
+class MockResult:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class MockAgent:
+    def __init__(self, agent_name: str):
+        self.agent_name = agent_name
+        self._profile = _config["agents"].get(agent_name, {"latency": "fixed:500", "failure_rate": 0.0})
+
+    async def __aenter__(self) -> "MockAgent":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> bool:
+        return False
+
+    async def _simulate(self) -> None:
+        calls[self.agent_name] = calls.get(self.agent_name, 0) + 1
+        await asyncio.sleep(sample_latency_ms(self._profile["latency"]) / 1000 * _config["time_scale"])
+        if _rng.random() < self._profile.get("failure_rate", 0.0):
+            raise RuntimeError(f"Mock failure in {self.agent_name}")
+
+    def _text(self, prompt: str) -> str:
+        if self.agent_name == "AURATriage":
+            if "QUESTIONS:" in prompt:  # Batch-Triage: JSON-Array, ein Eintrag pro Frage
+                lines = prompt.split("QUESTIONS:", 1)[1].strip().splitlines()
+                return "[" + ",".join(_triage_text(_sample_route(line).replace("triage_direct", "direct")) for line in lines) + "]"
+            return _triage_text(_sample_route(prompt))
+        filler = f"[{self.agent_name}] Antwort auf: {prompt[:60]} "
+        return (filler * (_config["response_chars"] // len(filler) + 1))[: _config["response_chars"]]
+
+    async def run(self, prompt: str, **kwargs: Any) -> MockResult:
+        await self._simulate()
+        return MockResult(self._text(prompt))
+
+    async def run_stream(self, prompt: str, **kwargs: Any) -> AsyncIterator[MockResult]:
+        await self._simulate()
+        text = self._text(prompt)
+        step = _config["stream_chunk_chars"]
+        for i in range(0, len(text), step):
+            await asyncio.sleep(0)
+            yield MockResult(text[i:i + step])
+
+
+class MockAzureAIClient:
+    def __init__(self, agent_name: str, **kwargs: Any):
+        self.agent_name = agent_name
+
+    def create_agent(self) -> MockAgent:
+        return MockAgent(self.agent_name)
+
+
+class MockCredential:
+    async def get_token(self, *scopes: str, **kwargs: Any) -> Any:
+        await asyncio.sleep(0.05 * _config["time_scale"])
+        return types.SimpleNamespace(token="mock", expires_on=2**31)
+
+    async def close(self) -> None:
+        return None
+
+    async def __aenter__(self) -> "MockCredential":
+        return self
+
+    async def __aexit__(self, *exc: Any) -> bool:
+        return False
+
+
+def configure(config: dict[str, Any] | None = None, seed: int | None = None) -> None:
+    """Setzt Profil (fehlende Keys aus DEFAULT_CONFIG) und optional den Zufalls-Seed."""
+    global _config
+    merged = {**DEFAULT_CONFIG, **(config or {})}
+    merged["agents"] = {**DEFAULT_CONFIG["agents"], **(config or {}).get("agents", {})}
+    _config = merged
+    if seed is not None:
+        _rng.seed(seed)
+
+
+def _module(name: str, **attrs: Any) -> types.ModuleType:
+    """Registriert ein Mock-Modul; fehlende Eltern-Packages werden als leere Packages ergänzt."""
+    parent, _, child = name.rpartition(".")
+    if parent and parent not in sys.modules:
+        try:
+            importlib.import_module(parent)
+        except ImportError:
+            _module(parent).__path__ = []
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    if parent:
+        setattr(sys.modules[parent], child, module)
+    return module
+
+
+def install(config: dict[str, Any] | None = None, seed: int | None = None) -> None:
+    """Registriert die Mocks als agent_framework.azure / azure.identity.aio."""
+    configure(config, seed)
+    _module("agent_framework.azure", AzureAIClient=MockAzureAIClient)
+    _module("azure.identity.aio", DefaultAzureCredential=MockCredential)
+    try:
+        importlib.import_module("azure.core.exceptions")
+    except ImportError:
+        _module(
+            "azure.core.exceptions",
+            ClientAuthenticationError=type("ClientAuthenticationError", (Exception,), {}),
+            ResourceNotFoundError=type("ResourceNotFoundError", (Exception,), {}),
+        )
@@ -0,0 +1,197 @@
+"""Phasen-Timing (Spans) für den MFA-Workflow, exportierbar als OTLP/JSON.
+
+Ein Trace pro Request (tagged mit der x-correlation-id) sammelt Spans für
+jede Phase: Credential, Agent-Auflösung, jedes agent.run, Parsing,
+Synthese. Der aktive Trace liegt in einer ContextVar; asyncio-Tasks
+(Fan-Out, Spekulation) erben ihn automatisch. Ohne aktiven Trace ist
+span() ein No-Op.
+
+Export (optional, MFA_TRACE_EXPORT):
+- "file:/pfad/traces.jsonl"          → eine OTLP/JSON-Zeile pro Trace
+- "otlp:http://localhost:4318"       → POST an <endpoint>/v1/traces (Collector)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from typing import Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "contextpilot-mfa-function"
+
+_current: contextvars.ContextVar["Trace | None"] = contextvars.ContextVar("mfa_trace", default=None)
+_HEX32 = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Span:
+    __slots__ = ("name", "span_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, attributes: dict[str, Any]):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.start_ns = time.time_ns()
+        self.end_ns: int | None = None
+        self.attributes = attributes
+        self.error: str | None = None
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end - self.start_ns) / 1e6
+
+
+class Trace:
+    """Alle Spans eines Requests; der Root-Span umfasst den gesamten Request."""
+
+    def __init__(self, correlation_id: str, name: str = "mfa.request"):
+        self.correlation_id = correlation_id
+        compact = correlation_id.replace("-", "").lower()
+        # UUID-Correlation-IDs direkt als Trace-ID übernehmen (Logs ↔ Traces)
+        self.trace_id = compact if _HEX32.match(compact) else secrets.token_hex(16)
+        self.root = Span(name, {"correlation_id": correlation_id})
+        self.spans: list[Span] = []
+
+    def timings(self) -> dict[str, Any]:
+        """Kompakte Form für die Response ("timings"-Key)."""
+        return {
+            "correlation_id": self.correlation_id,
+            "total_ms": round(self.root.duration_ms, 1),
+            "spans": [
+                {
+                    "name": span.name,
+                    "start_ms": round((span.start_ns - self.root.start_ns) / 1e6, 1),
+                    "duration_ms": round(span.duration_ms, 1),
+                    **({"attributes": span.attributes} if span.attributes else {}),
+                    **({"error": span.error} if span.error else {}),
+                }
+                for span in self.spans
+            ],
+        }
+
+    def to_otlp(self) -> dict[str, Any]:
+        """OTLP/JSON (ExportTraceServiceRequest) für Collector oder Datei."""
+
+        def otlp_span(span: Span, parent_id: str | None) -> dict[str, Any]:
+            attributes = {"correlation_id": self.correlation_id, **span.attributes}
+            return {
+                "traceId": self.trace_id,
+                "spanId": span.span_id,
+                **({"parentSpanId": parent_id} if parent_id else {}),
+                "name": span.name,
+                "kind": 1,  # INTERNAL
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns or time.time_ns()),
+                "attributes": [_otlp_attribute(k, v) for k, v in attributes.items()],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", SERVICE_NAME)]},
+                "scopeSpans": [{
+                    "scope": {"name": "mfa_workflow"},
+                    "spans": [otlp_span(self.root, None)]
+                    + [otlp_span(span, self.root.span_id) for span in self.spans],
+                }],
+            }],
+        }
+
+
+def _otlp_attribute(key: str, value: Any) -> dict[str, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def start_trace(correlation_id: str, name: str = "mfa.request") -> Iterator[Trace]:
+    """Aktiviert einen Trace für den aktuellen Kontext und exportiert ihn am Ende."""
+    trace = Trace(correlation_id, name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    except BaseException as e:
+        trace.root.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        trace.root.end_ns = time.time_ns()
+        _current.reset(token)
+        export(trace)
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span | None]:
+    """Misst eine Phase im aktiven Trace (No-Op ohne Trace)."""
+    trace = _current.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(name, attributes)
+    trace.spans.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}" if not isinstance(e, asyncio.CancelledError) else "cancelled"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+
+
+# === EXPORT ===
+
+MFA_TRACE_EXPORT = os.environ.get("MFA_TRACE_EXPORT", "")
+
+# Referenzen auf laufende Export-Tasks (sonst kann der GC sie vorzeitig einsammeln)
+_pending_exports: set[asyncio.Task[None]] = set()
+
+
+def export(trace: Trace) -> None:
+    """Exportiert einen abgeschlossenen Trace gemäß MFA_TRACE_EXPORT (Fehler nur loggen)."""
+    if not MFA_TRACE_EXPORT:
+        return
+    try:
+        kind, _, target = MFA_TRACE_EXPORT.partition(":")
+        if kind == "file":
+            with open(target, "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_otlp()) + "\n")
+        elif kind == "otlp":
+            task = asyncio.get_running_loop().create_task(
+                _post_otlp(target.rstrip("/") + "/v1/traces", trace.to_otlp())
+            )
+            _pending_exports.add(task)
+            task.add_done_callback(_pending_exports.discard)
+        else:
+            logger.warning("Unknown MFA_TRACE_EXPORT target: %s", MFA_TRACE_EXPORT)
+    except Exception as e:
+        logger.warning("Trace export failed: %s", e)
+
+
+async def _post_otlp(url: str, payload: dict[str, Any]) -> None:
+    import aiohttp
+
+    try:
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=5)) as session:
+            async with session.post(url, json=payload) as resp:
+                if resp.status >= 300:
+                    logger.warning("OTLP export to %s returned %s", url, resp.status)
+    except Exception as e:
+        logger.warning("OTLP export to %s failed: %s", url, e)
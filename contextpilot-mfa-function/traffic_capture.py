@@ -0,0 +1,125 @@
+"""Mitschnitt des /mfa-Traffics (anonymisiert) für Replay und Kapazitätstests.
+
+Synthetische Last (tools/mfa_benchmark.py) bildet echte Meetings schlecht ab:
+Fragen kommen in Schüben, wiederholen sich, und der Routen-Mix ist schief.
+Mit MFA_CAPTURE_PATH schreibt /api/mfa pro Request eine JSONL-Zeile:
+
+    {"t": 1760000000.123, "prompt_hash": "9f2c…", "prompt_chars": 54,
+     "prompt_tokens": 14, "status": 200, "route": "synthesis", "routing": {...},
+     "agents_used": [...], "latency_ms": 8123.4, "spans": [{"name", "agent",
+     "start_ms", "duration_ms"}]}
+
+Kein Prompt- oder Antworttext: nur ein gesalzener Hash des normalisierten
+Prompts (Wiederholungen bleiben erkennbar), Längen und Metadaten. Der Salt
+(MFA_CAPTURE_SALT) sollte pro Deployment gesetzt sein, sonst ließen sich
+kurze Prompts per Wörterbuch zurückrechnen. tools/mfa_replay.py spielt die
+Datei mit 1x/5x/20x Geschwindigkeit gegen den lokalen Foundry-Stand-in ab.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+from typing import Any
+
+from admission import estimate_tokens
+from response_cache import normalize_prompt, route_of
+
+logger = logging.getLogger(__name__)
+
+# Routing-Felder ohne Freitext (reasoning, failed-Meldungen) – nur Flags/Labels
+_ROUTING_FLAGS = (
+    "direct", "web", "context", "partial", "cached", "fast_path",
+    "coalesced", "batch_triage", "follow_up", "degraded", "prefetched",
+)
+
+
+def prompt_hash(prompt: str, salt: str = "") -> str:
+    """Gesalzener Hash des normalisierten Prompts (16 Hex-Zeichen)."""
+    return hashlib.sha256((salt + normalize_prompt(prompt)).encode("utf-8")).hexdigest()[:16]
+
+
+def capture_route(routing: dict[str, Any] | None, agents_used: list[str]) -> str:
+    """Routentyp fürs Replay; "triage_direct" = Triage hat selbst geantwortet."""
+    if routing is None:
+        return "unknown"
+    if routing.get("direct") and agents_used == ["AURATriage"]:
+        return "triage_direct"
+    return route_of(routing)
+
+
+class TrafficCapture:
+    """Hängt pro Request eine anonymisierte JSONL-Zeile an (optional gesampelt)."""
+
+    def __init__(self, path: str, salt: str = "", sample_rate: float = 1.0):
+        self.path = path
+        self.salt = salt
+        self.sample_rate = sample_rate
+        self.stats = {"captured": 0, "sampled_out": 0, "write_errors": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(
+        self,
+        prompt: str,
+        arrived: float,
+        status: int,
+        latency_ms: float,
+        result: dict[str, Any] | None = None,
+        timings: dict[str, Any] | None = None,
+    ) -> None:
+        """arrived: Wanduhr-Zeitpunkt (time.time()) beim Eingang des Requests."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            self.stats["sampled_out"] += 1
+            return
+        routing = (result or {}).get("routing")
+        agents_used = list((result or {}).get("agents_used", []))
+        entry = {
+            "t": round(arrived, 3),
+            "prompt_hash": prompt_hash(prompt, self.salt),
+            "prompt_chars": len(prompt),
+            "prompt_tokens": estimate_tokens(prompt),
+            "status": status,
+            "route": capture_route(routing, agents_used),
+            "routing": {key: routing[key] for key in _ROUTING_FLAGS if key in routing} if routing else None,
+            "agents_used": agents_used,
+            "latency_ms": round(latency_ms, 1),
+            "spans": [
+                {
+                    "name": span["name"],
+                    **({"agent": span["attributes"]["agent"]} if "agent" in span.get("attributes", {}) else {}),
+                    "start_ms": span["start_ms"],
+                    "duration_ms": span["duration_ms"],
+                    **({"error": True} if span.get("error") else {}),
+                }
+                for span in (timings or {}).get("spans", [])
+            ],
+        }
+        try:
+            # Eine Zeile pro write() im Append-Modus: parallele Worker verschachteln keine Zeilen
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        except OSError as e:
+            self.stats["write_errors"] += 1
+            logger.warning("Traffic capture to %s failed: %s", self.path, e)
+            return
+        self.stats["captured"] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"path": self.path, "sample_rate": self.sample_rate, "salted": bool(self.salt), **self.stats}
+
+
+def load_capture(path: str) -> list[dict[str, Any]]:
+    """Liest einen Mitschnitt, sortiert nach Ankunftszeit (defekte Zeilen werden übersprungen)."""
+    entries = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return sorted(entries, key=lambda entry: entry["t"])
@@ -0,0 +1,169 @@
+"""Cold-Start-Reduktion: Module vorladen, Credential/Agents vorab auflösen.
+
+Der erste /mfa-Request nach Idle bezahlt sonst den Lazy-Import von
+mfa_workflow (agent_framework, azure-ai-projects, pydantic, aiohttp) und
+das erste Token. Drei Wege, das vorzuziehen:
+
+- Beim Indexing (MFA_WARMUP_ON_STARTUP): Import der schweren Module in
+  einem Hintergrund-Thread – blockiert das Worker-Indexing nicht.
+- Warm-up-Trigger (Premium/Elastic Premium) bzw. GET/POST /warmup
+  (z.B. vom Proxy beim Start oder per Keep-alive-Ping): Imports plus
+  Token und Agent-Auflösung auf dem Event Loop des Workers.
+- Import-Profil: `python warmup.py --profile` (oder /warmup?profile=1) misst
+  per `python -X importtime` in einem frischen Interpreter, welche Module
+  den Start dominieren.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Reihenfolge: Abhängigkeiten zuerst, mfa_workflow zuletzt (importiert den Rest)
+HEAVY_MODULES = (
+    "aiohttp",
+    "pydantic",
+    "azure.identity.aio",
+    "azure.ai.projects",
+    "agent_framework",
+    "agent_framework.azure",
+    "mfa_workflow",
+)
+
+FUNCTION_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_preload_thread: threading.Thread | None = None
+_preload_report: dict[str, Any] = {}
+_warm_task: asyncio.Task[dict[str, Any]] | None = None
+
+
+def preload_modules(modules: tuple[str, ...] = HEAVY_MODULES) -> dict[str, Any]:
+    """Importiert die Module (bereits geladene kosten 0ms). Fehler werden gemeldet, nicht geworfen."""
+    report: dict[str, Any] = {}
+    for name in modules:
+        if name in sys.modules:
+            report[name] = {"ok": True, "ms": 0.0, "cached": True}
+            continue
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:  # z.B. fehlende App Settings beim Import von mfa_workflow
+            report[name] = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            continue
+        report[name] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 1)}
+    return report
+
+
+def preload_in_background() -> None:
+    """Startet preload_modules einmalig in einem Daemon-Thread (beim Worker-Indexing)."""
+    global _preload_thread
+    if _preload_thread is not None:
+        return
+
+    def run() -> None:
+        _preload_report.update(preload_modules())
+        logger.info("MFA module preload finished: %s", _preload_report)
+
+    _preload_thread = threading.Thread(target=run, name="mfa-preload", daemon=True)
+    _preload_thread.start()
+
+
+async def warm_up() -> dict[str, Any]:
+    """Imports (ggf. auf den Startup-Thread warten), dann Token + Agents auflösen."""
+    started = time.perf_counter()
+    if _preload_thread is not None and _preload_thread.is_alive():
+        await asyncio.get_running_loop().run_in_executor(None, _preload_thread.join)
+    imports = preload_modules()
+    report: dict[str, Any] = {"imports": imports, "startup_preload": dict(_preload_report)}
+    if imports["mfa_workflow"]["ok"]:
+        from mfa_workflow import warm_agents
+
+        report["agents"] = await warm_agents()
+    # Einzelne Module in HEAVY_MODULES sind nur Vorlade-Hinweise; entscheidend ist mfa_workflow
+    report["ok"] = imports["mfa_workflow"]["ok"] and all(
+        item["ok"] for item in report.get("agents", {}).values()
+    )
+    report["total_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return report
+
+
+def warm_up_in_background() -> bool:
+    """Startet warm_up als Task (max. einer gleichzeitig). False, wenn bereits einer läuft."""
+    global _warm_task
+    if _warm_task is not None and not _warm_task.done():
+        return False
+    _warm_task = asyncio.ensure_future(warm_up())
+    _warm_task.add_done_callback(
+        lambda task: task.cancelled() or logger.info("MFA warm-up finished: %s", task.result())
+    )
+    return True
+
+
+def profile_imports(module: str = "mfa_workflow", top: int = 15) -> dict[str, Any]:
+    """Misst den Import in einem frischen Interpreter (python -X importtime).
+
+    Returns:
+        {"module", "total_ms", "by_cumulative": [...], "by_self": [...]} –
+        je Eintrag {"module", "self_ms", "cumulative_ms"}
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=FUNCTION_DIR,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    entries: list[dict[str, Any]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line[len("import time:"):].split("|", 2))
+        entries.append({
+            "module": name.strip(),
+            "self_ms": round(int(self_us) / 1000, 1),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+        })
+    root = next((e for e in entries if e["module"] == module), None)
+    result: dict[str, Any] = {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "total_ms": root["cumulative_ms"] if root else None,
+        "by_cumulative": sorted(entries, key=lambda e: e["cumulative_ms"], reverse=True)[:top],
+        "by_self": sorted(entries, key=lambda e: e["self_ms"], reverse=True)[:top],
+    }
+    if proc.returncode != 0:
+        result["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"
+    return result
+
+
+def _print_profile(profile: dict[str, Any]) -> None:
+    print(f"Import von {profile['module']}: {profile['total_ms']} ms" + ("" if profile["ok"] else f" ({profile['error']})"))
+    print("\nNach kumulativer Zeit:")
+    for entry in profile["by_cumulative"]:
+        print(f"  {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+    print("\nNach eigener Zeit:")
+    for entry in profile["by_self"]:
+        print(f"  {entry['self_ms']:>9.1f} ms  {entry['module']}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import-Profil für den MFA-Cold-Start")
+    parser.add_argument("--profile", action="store_true", help="Import-Zeiten pro Modul messen")
+    parser.add_argument("--module", default="mfa_workflow")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+    if args.profile:
+        _print_profile(profile_imports(args.module, args.top))
+    else:
+        print(preload_modules())
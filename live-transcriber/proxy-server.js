@@ -842,6 +842,9 @@ async function handleMFARequest(req, res, body, mfaConfig) {
     const headers = {
       "Content-Type": "application/json",
       "x-correlation-id": correlationId,
+      // Deadline etwas unter dem Proxy-Timeout: die Function antwortet (ggf. mit
+      // Teilergebnis), bevor der Proxy abbricht
+      "x-mfa-deadline-ms": String(Math.max(timeoutMs - 10000, 1000)),
     };
     if (mfaConfig.functionKey) {
       headers["x-functions-key"] = mfaConfig.functionKey;
@@ -3,16 +3,32 @@
 Live Transcriber - Server Starter
 ==================================
 Startet den Proxy-Server und den Vite/React Dev-Server parallel.
+
+Supervisor-Modus (--supervise oder Befehl [w]): abgestürzte Server werden
+mit Backoff neu gestartet. Die letzten Log-Zeilen jedes Servers liegen in
+einem Ring-Puffer (Befehl [l]); CPU/RSS werden periodisch gemessen
+(Befehl [m]) – mit psutil für den ganzen Prozessbaum, ohne psutil unter
+Linux über /proc.
 """
 
 import subprocess
 import sys
 import os
 import signal
+import socket
 import time
 import threading
+import urllib.request
+import urllib.error
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+try:
+    import psutil
+except ImportError:  # optional: ohne psutil nur Linux-/proc-Messung
+    psutil = None
+
 # Farbcodes für Windows Terminal
 class Colors:
     GREEN = '\033[92m'
@@ -22,10 +38,61 @@ class Colors:
     BOLD = '\033[1m'
     END = '\033[0m'
 
+# Ports: Proxy liest PORT (Default 8080, siehe proxy-server.js), Vite nutzt 5173
+PROXY_PORT = int(os.environ.get('PORT', '8080'))
+VITE_PORT = int(os.environ.get('VITE_PORT', '5173'))
+
+# Readiness-Probes pro Server: erst Port-Connect, dann HTTP-Health (Status < 500)
+SERVICES = {
+    'proxy': {
+        'label': 'Proxy Server',
+        'port': PROXY_PORT,
+        'health_url': f'http://localhost:{PROXY_PORT}/',
+        'timeout': 20,
+    },
+    'vite': {
+        'label': 'Vite/React',
+        'port': VITE_PORT,
+        'health_url': f'http://localhost:{VITE_PORT}/',
+        'timeout': 45,  # Erster Start kompiliert Dependencies
+    },
+}
+
+# Ring-Puffer: letzte Log-Zeilen pro Server; Ressourcen-Samples (Default: 1h bei 5s)
+LOG_RING_SIZE = int(os.environ.get('START_LOG_LINES', '2000'))
+SAMPLE_INTERVAL = float(os.environ.get('START_SAMPLE_SECONDS', '5'))
+SAMPLE_HISTORY = 720
+
+# Supervisor: Neustart nach Absturz mit exponentiellem Backoff
+supervisor = {
+    'enabled': False,
+    'backoff_initial': 1.0,
+    'backoff_max': 30.0,
+    'stable_after': 60.0,  # Lief der Prozess so lange, beginnt der Backoff von vorn
+}
+
+# Start/Stop und automatische Neustarts nicht überlappen lassen
+lifecycle_lock = threading.RLock()
+
+def _new_status():
+    return {
+        'running': False,
+        'ready': False,
+        'ready_ms': None,
+        'process': None,
+        'started_at': None,
+        'logs': deque(maxlen=LOG_RING_SIZE),
+        'samples': deque(maxlen=SAMPLE_HISTORY),
+        'cpu_prev': None,
+        'restarts': 0,
+        'backoff': supervisor['backoff_initial'],
+        'restart_at': None,
+    }
+
 # Status der Server
 server_status = {
-    'proxy': {'running': False, 'process': None},
-    'vite': {'running': False, 'process': None}
+    'proxy': _new_status(),
+    'vite': _new_status()
 }
 
 def print_banner():
@@ -38,20 +105,100 @@ def print_banner():
 ╚══════════════════════════════════════════════════════════════╝{Colors.END}
 """)
 
+def _status_line(name):
+    """Eine Statuszeile: ● bereit (Port erreichbar), ◐ Prozess läuft, ○ gestoppt."""
+    server = server_status[name]
+    service = SERVICES[name]
+    alive = server['process'] is not None and server['process'].poll() is None
+    # Live prüfen statt nur das Prozess-Objekt anzusehen
+    if alive and port_open(service['port']):
+        icon = f"{Colors.GREEN}●{Colors.END}"
+        detail = f"bereit nach {server['ready_ms'] / 1000:.1f}s" if server['ready_ms'] is not None else "bereit"
+    elif alive:
+        icon = f"{Colors.YELLOW}◐{Colors.END}"
+        detail = "startet / Port nicht erreichbar"
+    else:
+        icon = f"{Colors.RED}○{Colors.END}"
+        detail = "gestoppt"
+    url = f"http://localhost:{service['port']}"
+    return f"│  {icon}  {service['label']:<15}  →  {url:<24} {detail}"
+
 def print_status():
     """Zeigt den aktuellen Status beider Server an."""
-    proxy_icon = f"{Colors.GREEN}●{Colors.END}" if server_status['proxy']['running'] else f"{Colors.RED}○{Colors.END}"
-    vite_icon = f"{Colors.GREEN}●{Colors.END}" if server_status['vite']['running'] else f"{Colors.RED}○{Colors.END}"
-    
     print(f"""
 {Colors.BOLD}┌─────────────────────────────────────────────────────────────┐
 │  SERVER STATUS                                               │
 ├─────────────────────────────────────────────────────────────┤{Colors.END}
-│  {proxy_icon}  Proxy Server     →  http://localhost:3001            │
-│  {vite_icon}  Vite/React       →  http://localhost:5173            │
+{_status_line('proxy')}
+{_status_line('vite')}
 {Colors.BOLD}└─────────────────────────────────────────────────────────────┘{Colors.END}
 """)
 
+def port_open(port, host='localhost', timeout=0.3):
+    """True, wenn der Port Verbindungen annimmt (IPv4 oder IPv6)."""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def http_healthy(url, timeout=2.0):
+    """True, wenn die URL mit einem Status < 500 antwortet."""
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status < 500
+    except urllib.error.HTTPError as e:
+        return e.code < 500
+    except (OSError, ValueError):
+        return False
+
+def probe_service(name, started_at):
+    """Wartet, bis der Server Port und HTTP-Health bestanden hat (oder Timeout/Absturz).
+
+    Returns:
+        (ready, elapsed_ms, detail)
+    """
+    service = SERVICES[name]
+    process = server_status[name]['process']
+    deadline = started_at + service['timeout']
+    delay = 0.05
+    port_ready = False
+    while time.monotonic() < deadline:
+        if process is None or process.poll() is not None:
+            code = None if process is None else process.returncode
+            return False, (time.monotonic() - started_at) * 1000, f"Prozess beendet (Exit-Code {code})"
+        if not port_ready:
+            port_ready = port_open(service['port'])
+        if port_ready and http_healthy(service['health_url']):
+            return True, (time.monotonic() - started_at) * 1000, "bereit"
+        time.sleep(delay)
+        delay = min(delay * 1.5, 0.5)  # Schnell pollen am Anfang, dann seltener
+    detail = "HTTP-Health fehlgeschlagen" if port_ready else "Port nicht erreichbar"
+    return False, service['timeout'] * 1000, f"Timeout nach {service['timeout']}s ({detail})"
+
+def wait_until_ready(names, started_at):
+    """Prüft alle Server parallel und meldet die Zeit bis zur Bereitschaft."""
+    with ThreadPoolExecutor(max_workers=len(names)) as pool:
+        results = dict(zip(names, pool.map(lambda name: probe_service(name, started_at), names)))
+    for name, (ready, elapsed_ms, detail) in results.items():
+        label = SERVICES[name]['label']
+        server_status[name]['ready'] = ready
+        server_status[name]['ready_ms'] = elapsed_ms if ready else None
+        if ready:
+            print(f"  {Colors.GREEN}✓{Colors.END} {label} bereit nach {elapsed_ms / 1000:.2f}s")
+        else:
+            print(f"  {Colors.RED}✗{Colors.END} {label}: {detail}")
+    return all(ready for ready, _, _ in results.values())
+
+def wait_until_stopped(names, timeout=5.0):
+    """Wartet, bis die Ports der Server wieder frei sind (statt fester Pause)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not any(port_open(SERVICES[name]['port'], timeout=0.1) for name in names):
+            return True
+        time.sleep(0.1)
+    return False
+
 def print_commands():
     """Zeigt die verfügbaren Befehle an."""
     print(f"""
@@ -61,28 +208,57 @@ def print_commands():
 │  [q]                →  Server stoppen (Fenster bleibt offen)│
 │  [r]                →  Beide Server neu starten             │
 │  [s]                →  Status anzeigen                      │
+│  [l] [proxy|vite] [n] → Letzte n Log-Zeilen anzeigen        │
+│  [m]                →  CPU/RSS der Server anzeigen          │
+│  [w]                →  Supervisor (Auto-Neustart) an/aus    │
 │  [o]                →  App im Browser öffnen                │
 │  [x] oder [Ctrl+C]  →  Programm komplett beenden            │
 └─────────────────────────────────────────────────────────────┘{Colors.END}
 """)
 
 def drain_output(process, name):
-    """Leert den Output-Buffer eines Prozesses im Hintergrund."""
+    """Liest den Output blockweise in den Ring-Puffer des Servers.
+
+    Ein os.read pro Block statt readline pro Zeile; Zeilen bleiben Bytes und
+    werden erst beim Anzeigen ([l]) dekodiert. Ein Zeitstempel pro Block.
+    """
+    logs = server_status[name]['logs']
+
     def reader():
+        fd = process.stdout.fileno()
+        pending = b''
         try:
             while True:
-                line = process.stdout.readline()
-                if not line and process.poll() is not None:
+                chunk = os.read(fd, 65536)
+                if not chunk:
                     break
-                # Optional: Ausgabe anzeigen (auskommentiert für weniger Spam)
-                # if line:
-                #     print(f"  [{name}] {line.decode('utf-8', errors='ignore').strip()}")
-        except:
+                lines = (pending + chunk).split(b'\n')
+                pending = lines.pop()
+                if len(pending) > 65536:  # Sehr lange Zeile ohne Umbruch nicht unbegrenzt puffern
+                    lines.append(pending)
+                    pending = b''
+                if lines:
+                    stamp = time.time()
+                    logs.extend((stamp, line) for line in lines)
+        except OSError:
             pass
-    thread = threading.Thread(target=reader, daemon=True)
+        if pending:
+            logs.append((time.time(), pending))
+
+    thread = threading.Thread(target=reader, name=f'{name}-reader', daemon=True)
     thread.start()
     return thread
 
+def print_logs(name=None, count=40):
+    """Zeigt die letzten count Zeilen aus dem Ring-Puffer (ein oder beide Server)."""
+    names = [name] if name else list(SERVICES)
+    for service in names:
+        lines = list(server_status[service]['logs'])[-count:]
+        print(f"\n{Colors.BOLD}── {SERVICES[service]['label']} (letzte {len(lines)} Zeilen) ──{Colors.END}")
+        for stamp, line in lines:
+            text = line.decode('utf-8', errors='replace').rstrip('\r')
+            print(f"  {datetime.fromtimestamp(stamp).strftime('%H:%M:%S')}  {text}")
+
 def start_proxy_server():
     """Startet den Proxy-Server in einem komplett separaten Prozess."""
     try:
@@ -113,9 +289,12 @@ def start_proxy_server():
         
         server_status['proxy']['process'] = process
         server_status['proxy']['running'] = True
+        server_status['proxy']['ready'] = False
+        server_status['proxy']['started_at'] = time.monotonic()
+        server_status['proxy']['cpu_prev'] = None
         
         # Buffer im Hintergrund leeren, damit Prozess nicht blockiert
-        drain_output(process, 'PROXY')
+        drain_output(process, 'proxy')
         
         print(f"  {Colors.GREEN}✓{Colors.END} Proxy Server gestartet (PID: {process.pid})")
         return process
@@ -154,9 +333,12 @@ def start_vite_server():
         
         server_status['vite']['process'] = process
         server_status['vite']['running'] = True
+        server_status['vite']['ready'] = False
+        server_status['vite']['started_at'] = time.monotonic()
+        server_status['vite']['cpu_prev'] = None
         
         # Buffer im Hintergrund leeren, damit Prozess nicht blockiert
-        drain_output(process, 'VITE')
+        drain_output(process, 'vite')
         
         print(f"  {Colors.GREEN}✓{Colors.END} Vite/React Server gestartet (PID: {process.pid})")
         return process
@@ -167,10 +349,17 @@ def start_vite_server():
 
 def stop_servers():
     """Stoppt beide Server und alle Kindprozesse."""
+    with lifecycle_lock:
+        _stop_servers()
+
+def _stop_servers():
     print(f"\n  {Colors.YELLOW}Stoppe Server...{Colors.END}")
     
     for name, server in server_status.items():
+        # Gewolltes Stoppen: Supervisor darf nicht neu starten
+        server['restart_at'] = None
         if server['process']:
+            server['running'] = False
             try:
                 pid = server['process'].pid
                 if os.name == 'nt':
@@ -195,6 +384,7 @@ def stop_servers():
                         pass
                 
                 server['running'] = False
+                server['ready'] = False
                 print(f"  {Colors.GREEN}✓{Colors.END} {name.capitalize()} Server gestoppt")
             except subprocess.TimeoutExpired:
                 print(f"  {Colors.YELLOW}!{Colors.END} {name.capitalize()}: Timeout beim Beenden")
@@ -204,50 +394,184 @@ def stop_servers():
     server_status['proxy']['process'] = None
     server_status['vite']['process'] = None
     
-    # Kurz warten, damit Ports freigegeben werden
-    time.sleep(1)
+    # Warten, bis die Ports freigegeben sind (statt fester Pause)
+    if not wait_until_stopped(list(SERVICES)):
+        print(f"  {Colors.YELLOW}!{Colors.END} Ports noch belegt – läuft ein anderer Prozess?")
 
 def restart_servers():
-    """Startet beide Server neu."""
-    print(f"\n{Colors.CYAN}Neustart der Server...{Colors.END}\n")
-    stop_servers()
-    time.sleep(2)
-    start_all_servers()
+    """Startet beide Server neu (gleiche Readiness-Probes wie beim Start)."""
+    with lifecycle_lock:
+        print(f"\n{Colors.CYAN}Neustart der Server...{Colors.END}\n")
+        _stop_servers()
+        _start_all_servers()
 
 def start_all_servers():
-    """Startet beide Server nacheinander mit ausreichend Abstand."""
+    """Startet beide Server gleichzeitig und wartet auf echte Bereitschaft."""
+    with lifecycle_lock:
+        _start_all_servers()
+
+def _start_all_servers():
     print(f"\n{Colors.CYAN}Starte Server...{Colors.END}\n")
     
-    # Erst Proxy starten und warten bis er bereit ist
+    started_at = time.monotonic()
+    # Vite hängt zur Laufzeit nicht vom Proxy ab → beide sofort starten
     start_proxy_server()
-    print(f"  {Colors.YELLOW}Warte auf Proxy-Server...{Colors.END}")
-    time.sleep(3)  # Mehr Zeit für Node.js Startup
-    
-    # Dann Vite starten
     start_vite_server()
-    print(f"  {Colors.YELLOW}Warte auf Vite-Server...{Colors.END}")
-    time.sleep(4)  # Vite braucht mehr Zeit zum Kompilieren
+    print(f"  {Colors.YELLOW}Warte auf Bereitschaft (Port + HTTP)...{Colors.END}")
+    names = [name for name in SERVICES if server_status[name]['process'] is not None]
+    if names:
+        ready = wait_until_ready(names, started_at)
+        total = time.monotonic() - started_at
+        color = Colors.GREEN if ready else Colors.YELLOW
+        print(f"  {color}Startzeit gesamt: {total:.2f}s{Colors.END}")
     
     print_status()
 
 def open_browser():
     """Öffnet die App im Standard-Browser."""
     import webbrowser
-    webbrowser.open('http://localhost:5173')
+    webbrowser.open(f'http://localhost:{VITE_PORT}')
     print(f"  {Colors.GREEN}✓{Colors.END} Browser geöffnet")
 
+def _process_tree_linux(pid):
+    """(cpu_sekunden, rss_bytes) für pid + Nachfahren über /proc (ohne psutil)."""
+    ticks = os.sysconf('SC_CLK_TCK')
+    page = os.sysconf('SC_PAGE_SIZE')
+    stats = {}
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                fields = f.read().rsplit(b')', 1)[1].split()
+        except OSError:
+            continue
+        # Felder nach dem Namen: state(0) ppid(1) ... utime(11) stime(12) ... rss(21)
+        child = int(entry)
+        stats[child] = ((int(fields[11]) + int(fields[12])) / ticks, int(fields[21]) * page)
+        children.setdefault(int(fields[1]), []).append(child)
+    cpu = rss = 0
+    todo = [pid]
+    while todo:
+        current = todo.pop()
+        if current in stats:
+            cpu += stats[current][0]
+            rss += stats[current][1]
+        todo.extend(children.get(current, []))
+    return (cpu, rss) if pid in stats else None
+
+def sample_process_tree(pid):
+    """(cpu_sekunden, rss_bytes) des Prozessbaums (npm → node); None, wenn nicht messbar."""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            cpu = rss = 0
+            for proc in [root] + root.children(recursive=True):
+                try:
+                    times = proc.cpu_times()
+                    cpu += times.user + times.system
+                    rss += proc.memory_info().rss
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+            return cpu, rss
+        except psutil.NoSuchProcess:
+            return None
+    if os.path.isdir('/proc'):
+        return _process_tree_linux(pid)
+    return None
+
+def sample_resources():
+    """Misst CPU% und RSS aller laufenden Server und legt ein Sample ab."""
+    now = time.monotonic()
+    for server in server_status.values():
+        process = server['process']
+        if process is None or process.poll() is not None:
+            continue
+        sample = sample_process_tree(process.pid)
+        if sample is None:
+            continue
+        cpu_seconds, rss = sample
+        prev = server['cpu_prev']
+        server['cpu_prev'] = (now, cpu_seconds)
+        if prev is None:
+            continue
+        cpu_percent = max(cpu_seconds - prev[1], 0) / max(now - prev[0], 1e-6) * 100
+        server['samples'].append((time.time(), cpu_percent, rss))
+
+def print_metrics():
+    """CPU/RSS pro Server inkl. RSS-Trend über das Sample-Fenster (Speicherwachstum)."""
+    if psutil is None and not os.path.isdir('/proc'):
+        print(f"  {Colors.YELLOW}Ressourcen-Messung braucht psutil (pip install psutil).{Colors.END}")
+        return
+    print(f"\n{Colors.BOLD}  Server            CPU      RSS        RSS min/max          Trend       Neustarts{Colors.END}")
+    for name, server in server_status.items():
+        label = SERVICES[name]['label']
+        samples = list(server['samples'])
+        if not samples:
+            print(f"  {label:<16}  –  (noch keine Samples)   {server['restarts']:>5}")
+            continue
+        _, cpu, rss = samples[-1]
+        rss_values = [s[2] for s in samples]
+        span_hours = (samples[-1][0] - samples[0][0]) / 3600
+        trend = (samples[-1][2] - samples[0][2]) / span_hours / 2**20 if span_hours > 0 else 0.0
+        print(
+            f"  {label:<16} {cpu:5.1f}%  {rss / 2**20:7.1f} MB  "
+            f"{min(rss_values) / 2**20:7.1f}/{max(rss_values) / 2**20:7.1f} MB  "
+            f"{trend:+7.1f} MB/h  {server['restarts']:>5}"
+        )
+
+STARTERS = {
+    'proxy': start_proxy_server,
+    'vite': start_vite_server,
+}
+
+def restart_service(name):
+    """Startet einen abgestürzten Server neu (Supervisor) und prüft seine Bereitschaft."""
+    with lifecycle_lock:
+        server = server_status[name]
+        if server['restart_at'] is None:  # Inzwischen gewollt gestoppt
+            return
+        server['restart_at'] = None
+        server['restarts'] += 1
+        print(f"\n  {Colors.CYAN}Supervisor: starte {SERVICES[name]['label']} neu (#{server['restarts']})...{Colors.END}")
+        started_at = time.monotonic()
+        if STARTERS[name]() is not None:
+            wait_until_ready([name], started_at)
+
 def monitor_processes():
-    """Überwacht die Prozesse im Hintergrund."""
+    """Überwacht die Prozesse im Hintergrund (Absturz, Supervisor-Neustart, Ressourcen)."""
+    next_sample = time.monotonic()
     while True:
+        now = time.monotonic()
         for name, server in server_status.items():
-            if server['process']:
-                poll = server['process'].poll()
-                if poll is not None:
+            process = server['process']
+            with lifecycle_lock:
+                crashed = process is not None and server['running'] and process.poll() is not None
+                if crashed:
                     server['running'] = False
-        time.sleep(2)
+                    server['ready'] = False
+                    server['logs'].append((time.time(), f'--- Prozess beendet (Exit-Code {process.returncode}) ---'.encode()))
+                    if supervisor['enabled']:
+                        # Lief der Prozess lange genug stabil, Backoff zurücksetzen
+                        if server['started_at'] is not None and now - server['started_at'] > supervisor['stable_after']:
+                            server['backoff'] = supervisor['backoff_initial']
+                        server['restart_at'] = now + server['backoff']
+                        print(
+                            f"\n  {Colors.RED}✗{Colors.END} {SERVICES[name]['label']} abgestürzt "
+                            f"(Exit-Code {process.returncode}) – Neustart in {server['backoff']:.0f}s"
+                        )
+                        server['backoff'] = min(server['backoff'] * 2, supervisor['backoff_max'])
+            if server['restart_at'] is not None and now >= server['restart_at']:
+                restart_service(name)
+        if now >= next_sample:
+            sample_resources()
+            next_sample = now + SAMPLE_INTERVAL
+        time.sleep(0.5)
 
 def main():
     """Hauptfunktion."""
+    supervisor['enabled'] = '--supervise' in sys.argv
     print_banner()
     
     # Wechsle ins Script-Verzeichnis
@@ -281,12 +605,23 @@ def main():
                 print_commands()
             elif cmd == 's':
                 print_status()
+            elif cmd == 'l' or cmd.startswith('l '):
+                args = cmd.split()[1:]
+                name = next((a for a in args if a in SERVICES), None)
+                count = next((int(a) for a in args if a.isdigit()), 40)
+                print_logs(name, count)
+            elif cmd == 'm':
+                print_metrics()
+            elif cmd == 'w':
+                supervisor['enabled'] = not supervisor['enabled']
+                state = 'an' if supervisor['enabled'] else 'aus'
+                print(f"  {Colors.GREEN}✓{Colors.END} Supervisor (Auto-Neustart) {state}")
             elif cmd == 'o':
                 open_browser()
             elif cmd == '':
                 continue
             else:
-                print(f"  {Colors.YELLOW}Unbekannter Befehl. Nutze Q, R, S oder O.{Colors.END}")
+                print(f"  {Colors.YELLOW}Unbekannter Befehl. Nutze Q, R, S, L, M, W oder O.{Colors.END}")
                 
     except KeyboardInterrupt:
         pass
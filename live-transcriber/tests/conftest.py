@@ -0,0 +1,6 @@
+"""Tests laufen ohne Paket-Installation: start.py liegt direkt im Projektverzeichnis."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
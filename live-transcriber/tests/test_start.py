@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from collections import deque
+
+import pytest
+
+import start
+
+
+def run_child(code):
+    return subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+@pytest.mark.parametrize("name", ["proxy", "vite"])
+def test_drain_output_fills_the_ring_buffer(name, monkeypatch):
+    monkeypatch.setitem(start.server_status, name, start._new_status())
+    process = run_child("print('eins'); print('zwei'); print('ohne umbruch', end='')")
+    start.drain_output(process, name).join(timeout=5)
+    process.wait(timeout=5)
+    lines = [line for _, line in start.server_status[name]["logs"]]
+    assert lines == [b"eins", b"zwei", b"ohne umbruch"]
+
+
+def test_ring_buffer_keeps_only_the_latest_lines(monkeypatch):
+    status = start._new_status()
+    status["logs"] = deque(maxlen=3)
+    monkeypatch.setitem(start.server_status, "proxy", status)
+    process = run_child("for i in range(10): print(i)")
+    start.drain_output(process, "proxy").join(timeout=5)
+    process.wait(timeout=5)
+    assert [line for _, line in status["logs"]] == [b"7", b"8", b"9"]
+
+
+def test_drain_output_keeps_a_chatty_child_from_blocking(monkeypatch):
+    monkeypatch.setitem(start.server_status, "vite", start._new_status())
+    # Deutlich mehr als ein Pipe-Puffer (64 KiB): ohne Leser bliebe das Kind hängen
+    process = run_child("import sys\nfor _ in range(20000): sys.stdout.write('x' * 40 + '\\n')")
+    start.drain_output(process, "vite")
+    assert process.wait(timeout=10) == 0
+
+
+def test_print_logs_decodes_lines(monkeypatch, capsys):
+    status = start._new_status()
+    status["logs"].append((0.0, "Server läuft\r".encode()))
+    monkeypatch.setitem(start.server_status, "proxy", status)
+    start.print_logs("proxy")
+    assert "Server läuft" in capsys.readouterr().out